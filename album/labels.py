@@ -0,0 +1,45 @@
+# album/labels.py
+"""
+Per-user track labels.
+
+Renaming someone else's track in one of your albums stores the new name
+on each of your AlbumTrack rows for that track (album_rename_track), and
+your player lists show the track under it. All of a user's labels are
+read as one ``track_id -> label`` map, cached per user; the AlbumTrack
+signals and album_rename_track invalidate it.
+"""
+from django.core.cache import cache
+
+from .models import AlbumTrack
+
+LABELS_CACHE_TIMEOUT = 60 * 60  # signals invalidate on change
+
+
+def _labels_key(user_id) -> str:
+    return f"album:labels:{user_id}"
+
+
+def user_track_labels(user) -> dict[int, str]:
+    """The user's labels by track ID (empty for guests)."""
+    if not getattr(user, "is_authenticated", False):
+        return {}
+    key = _labels_key(user.id)
+    labels = cache.get(key)
+    if labels is None:
+        labels = {}
+        rows = (
+            AlbumTrack.objects.filter(album__owner=user)
+            .exclude(custom_name__isnull=True)
+            .exclude(custom_name="")
+            .order_by("position", "id")
+            .values_list("track_id", "custom_name")
+        )
+        for track_id, label in rows:
+            labels.setdefault(track_id, label)
+        cache.set(key, labels, LABELS_CACHE_TIMEOUT)
+    return labels
+
+
+def invalidate_user_track_labels(user_id) -> None:
+    """Call after bulk writes that bypass AlbumTrack signals."""
+    cache.delete(_labels_key(user_id))
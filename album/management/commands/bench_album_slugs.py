@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from album.models import Album
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark slug allocation: create COUNT albums with the same name "
+        "and report time and queries. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10_000)
+        parser.add_argument("--name", default="Chill")
+
+    def handle(self, *args, **options):
+        count, name = options["count"], options["name"]
+        with transaction.atomic():
+            owner = get_user_model().objects.create(username="__bench_slugs__")
+            queries = 0
+
+            def counted(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(counted):
+                start = time.perf_counter()
+                for _ in range(count):
+                    Album.objects.create(owner=owner, name=name)
+                elapsed = time.perf_counter() - start
+            last = Album.objects.filter(owner=owner).order_by("-pk")[0].slug
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} albums named {name!r} in {elapsed:.2f}s "
+                f"({elapsed / count * 1000:.2f} ms each, "
+                f"{queries / count:.1f} queries each); "
+                f"last slug {last!r}."
+            )
+        )
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:35
+
+from django.db import migrations, models
+from django.db.models import F
+
+KEY_GAP = 1024
+PARK_OFFSET = 4 * 10**18  # keys sit out of range while they are rewritten
+
+# Re-key the old dense positions by rank in each list, so single moves
+# have room between neighbours and old ties become distinct keys.
+# (model, key field, list field, old display order)
+SORTED_FIELDS = [
+    ("album", "Album", "order", "owner", ["order", "id"]),
+    ("album", "AlbumTrack", "position", "album", ["position", "id"]),
+]
+
+
+def spread_by_rank(model, key_field, scope_field, order_by):
+    """
+    Set ``key_field`` to each row's rank within its list (rows sharing
+    ``scope_field``) in ``order_by`` display order, times KEY_GAP. Kept
+    here rather than imported so later changes to app code cannot alter
+    what this migration does.
+    """
+    qs = model._default_manager.all()
+    qs.update(**{key_field: F(key_field) + PARK_OFFSET})
+
+    # Read every (id, list) pair first: SQLite does not isolate a cursor
+    # from writes made to the same table while it is being read
+    rows = list(qs.order_by(scope_field, *order_by).values_list("pk", scope_field))
+    batch, rank, scope = [], 0, object()
+    for pk, row_scope in rows:
+        rank = rank + 1 if row_scope == scope else 0
+        scope = row_scope
+        batch.append(model(pk=pk, **{key_field: rank * KEY_GAP}))
+        if len(batch) >= 1000:
+            model._default_manager.bulk_update(batch, [key_field])
+            batch = []
+    model._default_manager.bulk_update(batch, [key_field])
+
+
+def spread_keys(apps, schema_editor):
+    for app_label, model_name, field, scope, order_by in SORTED_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        spread_by_rank(model, field, scope, order_by)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("album", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="album",
+            name="order",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="albumtrack",
+            name="position",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(spread_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def from_created(apps, schema_editor):
+    Album = apps.get_model("album", "Album")
+    Album.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("album", "0003_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(from_created, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,20 @@
 # ----------------------- album/models.py ----------------------- #
+import re
 import uuid
 
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.db.models import Q
 from django.db.models.deletion import ProtectedError
+from django.db.models.functions import Length
 from django.utils.text import slugify
 
+from core.ordering import next_key
+from core.snapshots import HASH_LENGTH, content_hash, with_hash_field
+
+SLUG_BASE_LENGTH = 160  # room for a "-N" suffix within the 180-char column
+SLUG_RETRIES = 5
+
 
 class Album(models.Model):
     """Music album belonging to a user, grouping tracks in order."""
@@ -22,7 +30,13 @@ class Album(models.Model):
     is_default = models.BooleanField(default=False)
     slug = models.SlugField(max_length=180, unique=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Sparse sort key (see core.ordering); 0 means "append on save"
+    order = models.BigIntegerField(default=0)
+    # Hash of name/description, compared against saved snapshots
+    content_hash = models.CharField(max_length=HASH_LENGTH, blank=True, editable=False)
+
+    HASHED_FIELDS = ("name", "description")
 
     class Meta:
         ordering = ["order", "id"]
@@ -37,26 +51,54 @@ class Album(models.Model):
 
     def _make_unique_slug(self) -> str:
         """
-        Generate a unique slug for the album based on its name.
-        Falls back to a UUID snippet if too many conflicts.
+        Slug from the name: ``base`` if free, else ``base-N`` one past the
+        highest N in use. One query matches exactly ``base`` and
+        ``base-<digits>`` and orders them longest-first, so thousands of
+        "Chill" (or "Chill Out") albums still cost a single round trip.
         """
-        base = slugify(self.name) or "album"
-        slug = base
-        i = 1
-        Model = self.__class__
-
-        while Model.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-            i += 1
-            slug = f"{base}-{i}"
-            if i > 30:  # safety fallback
-                slug = f"{base}-{uuid.uuid4().hex[:8]}"
-                break
-        return slug
+        base = slugify(self.name)[:SLUG_BASE_LENGTH] or "album"
+        last = (
+            self.__class__.objects.filter(
+                Q(slug=base) | Q(slug__regex=rf"^{re.escape(base)}-[0-9]+$")
+            )
+            .exclude(pk=self.pk)
+            .order_by(Length("slug").desc(), "-slug")
+            .values_list("slug", flat=True)
+            .first()
+        )
+        if last is None:
+            return base
+        suffix = last[len(base) + 1 :]
+        return f"{base}-{int(suffix or 1) + 1}"
 
     def save(self, *args, **kwargs):
-        if not self.slug:
+        if self._state.adding and not self.order:
+            self.order = next_key()
+        self.content_hash = content_hash(self.name, self.description)
+        update_fields = with_hash_field(kwargs.get("update_fields"), self.HASHED_FIELDS)
+        if update_fields is not None:
+            update_fields = {*update_fields, "updated_at"}
+        kwargs["update_fields"] = update_fields
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # Another save may claim the same slug between our read and write;
+        # pick again until the unique index accepts one
+        for attempt in range(SLUG_RETRIES):
             self.slug = self._make_unique_slug()
-        super().save(*args, **kwargs)
+            if attempt == SLUG_RETRIES - 1:
+                self.slug = f"{self.slug}-{uuid.uuid4().hex[:8]}"
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = (
+                    self.__class__.objects.filter(slug=self.slug)
+                    .exclude(pk=self.pk)
+                    .exists()
+                )
+                if not taken or attempt == SLUG_RETRIES - 1:
+                    raise
 
     def delete(self, *args, **kwargs):
         if self.is_default:
@@ -80,7 +122,7 @@ class AlbumTrack(models.Model):
         on_delete=models.CASCADE,
         related_name="track_albums",
     )
-    position = models.PositiveIntegerField(default=0, db_index=True)
+    position = models.BigIntegerField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     # Users can rename other users track on their own album
     # only without changing the original track name
@@ -102,15 +144,10 @@ class AlbumTrack(models.Model):
         Ensure newly created items get a position at the end of the album
         if the caller doesn't provide one, but avoid interfering when
         updating an existing object's position (e.g. via drag-and-drop
-        reordering).
+        reordering). Append keys come from the clock, so no query is needed.
         """
         if self._state.adding and self.position == 0:
-            last = (
-                AlbumTrack.objects.filter(album=self.album)
-                .order_by("-position")
-                .first()
-            )
-            self.position = (last.position + 1) if last else 0
+            self.position = next_key()
         super().save(*args, **kwargs)
 
     def __str__(self):
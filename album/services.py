@@ -1,62 +1,33 @@
 # album/services.py
-from django.db.models import Avg, Count, Exists, OuterRef, Prefetch
+from collections import defaultdict
 
-from album.models import AlbumTrack
-from playlist.models import Playlist, PlaylistItem
-from ratings.utils import annotate_albums
-from tracks.models import Favorite
-from tracks.utils import annotate_is_in_my_albums
+from tracks.cards import CardRow, track_cards
 
+from .models import AlbumTrack
 
-def hydrate_albums_for_cards(qs, user):
+
+def attach_track_cards(albums, user):
     """
-    Prefetch album_tracks with per-track flags so that templates using
-    _album_card.html + _track_card.html render correctly everywhere.
-    Returns a list(albums) with:
-      - at.is_favorited
-      - at.track_avg, at.track_count
-      - at.track.is_in_my_albums
-      - at.track.in_playlist
-      - album.rating_avg, album.rating_count (via annotate_albums)
+    Set ``album.track_cards`` (what _album_card.html lists) on each album:
+    its rows as TrackCardVMs in album order, shown under the row's custom
+    name. One track_cards call covers all the albums. Returns a list.
     """
-
-    # Per-track favourites + rating aggregates (on the through row)
-    fav_subq = Favorite.objects.filter(owner=user, track=OuterRef("track_id"))
-    at_qs = (
-        AlbumTrack.objects.select_related("track", "track__owner")
-        .annotate(
-            is_favorited=Exists(fav_subq),
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-        )
-        .order_by("position", "id")
-    )
-
-    # Put the annotations onto the default relation name "album_tracks"
-    qs = annotate_albums(qs).prefetch_related(Prefetch("album_tracks", queryset=at_qs))
-
-    albums = list(qs)
-
-    # Build the user's playlist membership set once
-    in_playlist_ids = set()
-    if getattr(user, "is_authenticated", False):
-        pl = Playlist.objects.filter(owner=user, name="My Playlist").first()
-        if pl:
-            in_playlist_ids = set(
-                PlaylistItem.objects.filter(playlist=pl).values_list(
-                    "track_id", flat=True
-                )
-            )
-
-    # Attach per-track flags used by _track_card.html
+    albums = list(albums)
+    rows = defaultdict(list)
+    if albums:
+        for album_id, item_id, track_id, custom_name in (
+            AlbumTrack.objects.filter(album__in=albums)
+            .order_by("position", "id")
+            .values_list("album_id", "id", "track_id", "custom_name")
+        ):
+            rows[album_id].append(CardRow(track_id, item_id, custom_name or ""))
+
+    cards = {
+        card.item_id: card
+        for card in track_cards(user, [r for a in albums for r in rows[a.pk]])
+    }
     for album in albums:
-        ats = list(getattr(album, "album_tracks").all())
-
-        # Saved/ownership union flag on each track (🗃 vs 💾)
-        annotate_is_in_my_albums(ats, user, attr="track")
-
-        # Playlist membership ✓/➕
-        for at in ats:
-            at.track.in_playlist = at.track.id in in_playlist_ids
-
+        album.track_cards = [
+            cards[r.item_id] for r in rows[album.pk] if r.item_id in cards
+        ]
     return albums
@@ -1,12 +1,23 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
 from django.db.models.deletion import ProtectedError
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
+
+from cloud_connect.models import CloudFolderLink
+from core import stamps
+from ratings.models import AlbumRating
 
-from .models import Album
+from .labels import invalidate_user_track_labels
+from .models import Album, AlbumTrack
 
 User = get_user_model()
 
+LOGIN_FIELDS = frozenset({"last_login", "password"})
+
 
 @receiver(post_save, sender=User)
 def ensure_default_album(sender, instance, created, **kwargs):
@@ -25,3 +36,129 @@ def prevent_default_album_delete(sender, instance, **kwargs):
     """Block deletion attempts for default albums."""
     if instance.is_default:
         raise ProtectedError("Default albums cannot be deleted.", [instance])
+
+
+# ---- Change stamps (core.stamps) ----
+
+
+def touch_albums(owner_id, album_id=None, public=False):
+    """
+    The owner's album views and, given an album, that album's own pages;
+    ``public`` when the change shows in site-wide public listings too.
+    """
+    stamps.touch_user(owner_id, "albums")
+    if album_id:
+        stamps.touch(stamps.stamp_key("album", album_id))
+    if public:
+        stamps.touch(stamps.stamp_key("public_albums"))
+
+
+def _owner_of(album_id):
+    return (
+        Album.objects.filter(pk=album_id).values_list("owner_id", "is_public").first()
+    ) or (None, False)
+
+
+def _album_owner(sender, instance):
+    """(owner_id, is_public) of the album ``instance`` belongs to."""
+    if sender.album.is_cached(instance):
+        return instance.album.owner_id, instance.album.is_public
+    return _owner_of(instance.album_id)
+
+
+def _deleted_with_album(origin):
+    """Whether a row's post_delete is part of deleting its album."""
+    if isinstance(origin, QuerySet):
+        return origin.model is Album
+    return isinstance(origin, Album)
+
+
+def _touch_album_once(album_id):
+    # Removing many rows looks the owner up once, when the transaction commits
+    def touch():
+        owner_id, is_public = _owner_of(album_id)
+        touch_albums(owner_id, album_id, is_public)
+
+    stamps.once_per_transaction(("album", album_id), touch)
+
+
+@receiver(post_save, sender=Album)
+def album_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Unless the save cannot have touched it, a private album may just
+    # have stopped being public
+    was_public = not created and (update_fields is None or "is_public" in update_fields)
+    touch_albums(instance.owner_id, instance.pk, instance.is_public or was_public)
+
+
+@receiver(post_delete, sender=Album)
+def album_deleted(sender, instance, **kwargs):
+    # Stands in for the handlers its cascaded rows skip
+    touch_albums(instance.owner_id, instance.pk, instance.is_public)
+    invalidate_user_track_labels(instance.owner_id)
+
+
+@receiver(post_save, sender=AlbumTrack)
+@receiver(post_save, sender=AlbumRating)
+@receiver(post_save, sender=CloudFolderLink)
+def album_content_changed(sender, instance, **kwargs):
+    owner_id, is_public = _album_owner(sender, instance)
+    touch_albums(owner_id, instance.album_id, is_public)
+
+
+@receiver(post_delete, sender=AlbumTrack)
+@receiver(post_delete, sender=AlbumRating)
+@receiver(post_delete, sender=CloudFolderLink)
+def album_content_removed(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_album(origin):
+        _touch_album_once(instance.album_id)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Names show on their public pages; logins change nothing visible
+    if created or (update_fields is not None and set(update_fields) <= LOGIN_FIELDS):
+        return
+    stamps.touch_user(instance.pk, "social")
+    for album_id, is_public in Album.objects.filter(owner=instance).values_list(
+        "pk", "is_public"
+    ):
+        touch_albums(instance.pk, album_id, is_public)
+
+
+def _bump_updated_at(album_id):
+    Album.objects.filter(pk=album_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=AlbumTrack)
+def album_track_removed(sender, instance, origin=None, **kwargs):
+    # Additions show up through the newest AlbumTrack.created_at; removals
+    # leave no row behind, so they move the album's own timestamp (once per
+    # transaction, however many rows went)
+    if not _deleted_with_album(origin):
+        stamps.once_per_transaction(
+            ("album_updated_at", instance.album_id),
+            partial(_bump_updated_at, instance.album_id),
+        )
+
+
+# ---- Track labels (album.labels) ----
+
+
+@receiver(post_save, sender=AlbumTrack)
+def album_track_label_saved(sender, instance, created, update_fields=None, **kwargs):
+    # New unlabelled rows and saves that skip custom_name (reordering)
+    # leave the owner's labels as they were
+    if (created and not instance.custom_name) or (
+        update_fields is not None and "custom_name" not in update_fields
+    ):
+        return
+    invalidate_user_track_labels(_album_owner(sender, instance)[0])
+
+
+@receiver(post_delete, sender=AlbumTrack)
+def album_track_label_removed(sender, instance, origin=None, **kwargs):
+    if instance.custom_name and not _deleted_with_album(origin):
+        stamps.once_per_transaction(
+            ("album_labels", instance.album_id),
+            lambda: invalidate_user_track_labels(_owner_of(instance.album_id)[0]),
+        )
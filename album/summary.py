@@ -0,0 +1,94 @@
+# album/summary.py
+"""
+Compact per-album summary for the owner's album dashboard.
+
+One query returns every album of a user with its track count, rating
+summary, last-modified time and cloud-link sync state; each figure is a
+correlated subquery, so the joins never multiply rows. Track lists are
+not part of it: the page fetches those per album on demand.
+
+The JSON endpoint answers ``If-Modified-Since`` from the owner's
+"albums" change stamp (core.stamps, touched by album.signals), so a
+dashboard revisit without changes is a 304.
+"""
+from django.db.models import (Avg, Count, DateTimeField, Exists, F, FloatField,
+                              IntegerField, Max, OuterRef, Subquery)
+from django.db.models.functions import Coalesce, Greatest
+
+from cloud_connect.models import CloudFolderLink
+from ratings.models import AlbumRating
+
+from .models import Album, AlbumTrack
+
+UNLINKED, NEVER_SYNCED, STALE, SYNCED = "unlinked", "never", "stale", "synced"
+
+
+def _aggregate(qs, expr, output_field):
+    """Scalar subquery: ``expr`` over ``qs`` rows for the outer album."""
+    return Subquery(
+        qs.filter(album=OuterRef("pk"))
+        .order_by()
+        .values("album")
+        .annotate(v=expr)
+        .values("v")[:1],
+        output_field=output_field,
+    )
+
+
+def summary_queryset(user):
+    """The user's albums, in dashboard order, with summary annotations."""
+    tracks, ratings = AlbumTrack.objects.all(), AlbumRating.objects.all()
+    last_track = _aggregate(tracks, Max("created_at"), DateTimeField())
+    return (
+        Album.objects.filter(owner=user)
+        .annotate(
+            track_count=Coalesce(
+                _aggregate(tracks, Count("id"), IntegerField()), 0
+            ),
+            rating_avg=_aggregate(ratings, Avg("stars"), FloatField()),
+            rating_count=Coalesce(
+                _aggregate(ratings, Count("id"), IntegerField()), 0
+            ),
+            last_modified=Greatest(
+                F("updated_at"), Coalesce(last_track, F("updated_at"))
+            ),
+            last_sync=Subquery(
+                CloudFolderLink.objects.filter(album=OuterRef("pk")).values(
+                    "last_sync"
+                )[:1]
+            ),
+            has_link=Exists(CloudFolderLink.objects.filter(album=OuterRef("pk"))),
+        )
+        .order_by("order", "id")
+    )
+
+
+def sync_state(album) -> str:
+    if not album.has_link:
+        return UNLINKED
+    if album.last_sync is None:
+        return NEVER_SYNCED
+    if album.last_modified > album.last_sync:
+        return STALE
+    return SYNCED
+
+
+def summary_payload(albums) -> list[dict]:
+    return [
+        {
+            "id": a.pk,
+            "name": a.name,
+            "slug": a.slug,
+            "is_public": a.is_public,
+            "is_default": a.is_default,
+            "track_count": a.track_count,
+            "rating_avg": round(a.rating_avg or 0.0, 2),
+            "rating_count": a.rating_count,
+            "last_modified": a.last_modified.isoformat(),
+            "sync": {
+                "state": sync_state(a),
+                "last_sync": a.last_sync.isoformat() if a.last_sync else None,
+            },
+        }
+        for a in albums
+    ]
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from album.labels import user_track_labels
+from album.models import Album, AlbumTrack
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AlbumDeleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.album = Album.objects.create(owner=self.user, name="A")
+        self.rows = [
+            AlbumTrack.objects.create(
+                album=self.album,
+                track=Track.objects.create(owner=self.user, name=f"t{i}"),
+                custom_name=f"label{i}",
+            )
+            for i in range(5)
+        ]
+        self.client.force_login(self.user)
+
+    def test_deleting_an_album_skips_per_row_handlers(self):
+        url = reverse("album:ajax_delete_album", args=[self.album.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(url)
+        self.assertEqual(res.json(), {"ok": True, "id": self.album.pk})
+        self.assertFalse(AlbumTrack.objects.exists())
+        self.assertEqual(user_track_labels(self.user), {})
+
+    def test_bulk_detach_updates_the_album_once(self):
+        user_track_labels(self.user)  # warm the cache
+        before = self.album.updated_at
+        url = reverse("album:album_bulk_detach", args=[self.album.pk])
+        items = [row.pk for row in self.rows]
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(url, {"items[]": items})
+        self.assertEqual(res.json()["removed"], items)
+
+        bumps = [q for q in queries if q["sql"].startswith('UPDATE "album_album"')]
+        self.assertEqual(len(bumps), 1)
+        self.album.refresh_from_db()
+        self.assertGreater(self.album.updated_at, before)
+        self.assertEqual(user_track_labels(self.user), {})
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.labels import user_track_labels
+from album.models import Album, AlbumTrack
+from tracks.cards import track_cards
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UserTrackLabelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        other = User.objects.create_user(username="o", password="pw")
+        self.track = Track.objects.create(owner=other, name="original")
+        self.albums = [
+            Album.objects.create(owner=self.user, name=f"A{i}") for i in range(2)
+        ]
+        self.rows = [
+            AlbumTrack.objects.create(album=album, track=self.track)
+            for album in self.albums
+        ]
+
+    def rename(self, name):
+        row = self.rows[0]
+        url = reverse("album:album_rename_track", args=[row.album_id, row.pk])
+        self.client.post(url, {"name": name})
+
+    def test_map_is_cached(self):
+        self.assertEqual(user_track_labels(self.user), {})
+        AlbumTrack.objects.filter(pk=self.rows[0].pk).update(custom_name="quiet")
+        with self.assertNumQueries(0):
+            self.assertEqual(user_track_labels(self.user), {})
+        self.assertEqual(user_track_labels(AnonymousUser()), {})
+
+    def test_rename_shows_in_player_lists(self):
+        self.client.force_login(self.user)
+        user_track_labels(self.user)  # warm the cache
+        self.rename("mine now")
+        self.assertEqual(user_track_labels(self.user), {self.track.pk: "mine now"})
+        (card,) = track_cards(self.user, [self.track.pk], own_labels=True)
+        self.assertEqual(card.display_name, "mine now")
+
+        # Renaming again goes through the bulk update only
+        self.rename("again")
+        self.assertEqual(user_track_labels(self.user), {self.track.pk: "again"})
+
+    def test_removing_labelled_rows_drops_the_label(self):
+        self.client.force_login(self.user)
+        self.rename("label")
+        self.rows[0].delete()
+        self.assertEqual(user_track_labels(self.user), {self.track.pk: "label"})
+        self.albums[1].delete()  # its rows go with it
+        self.assertEqual(user_track_labels(self.user), {})
+
+    def test_reordering_keeps_the_cache(self):
+        user_track_labels(self.user)
+        row = self.rows[0]
+        row.position += 1000
+        row.save(update_fields=["position"])
+        self.assertIsNotNone(cache.get(f"album:labels:{self.user.pk}"))
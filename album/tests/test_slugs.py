@@ -0,0 +1,55 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from album.models import Album
+
+
+class SlugAllocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u", password="pw")
+
+    def create(self, name):
+        return Album.objects.create(owner=self.user, name=name)
+
+    def test_same_names_get_increasing_suffixes_in_one_query(self):
+        self.create("Chill Out")  # shares the prefix, not the suffix space
+        slugs = [self.create("Chill").slug for _ in range(3)]
+        self.assertEqual(slugs, ["chill", "chill-2", "chill-3"])
+        with self.assertNumQueries(1):
+            self.assertEqual(Album(name="Chill")._make_unique_slug(), "chill-4")
+
+    def test_longer_slugs_sharing_the_prefix_cost_nothing(self):
+        Album.objects.bulk_create(
+            Album(owner=self.user, name=f"My Mix {i}", slug=f"my-mix-{i}", order=i)
+            for i in range(1, 2001)
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(Album(name="My")._make_unique_slug(), "my")
+        self.create("My")
+        with self.assertNumQueries(1):
+            self.assertEqual(Album(name="My")._make_unique_slug(), "my-2")
+
+    def test_lost_race_retries_with_the_next_suffix(self):
+        self.create("Chill")
+        real = Album._make_unique_slug
+        calls = []
+
+        def stale(album):
+            # First pick ignores the row another request just inserted
+            calls.append(1)
+            return "chill" if len(calls) == 1 else real(album)
+
+        with mock.patch.object(Album, "_make_unique_slug", stale):
+            album = self.create("Chill")
+        self.assertEqual(album.slug, "chill-2")
+        self.assertEqual(len(calls), 2)
+
+    def test_benchmark_command_rolls_back(self):
+        out = StringIO()
+        call_command("bench_album_slugs", count=20, stdout=out)
+        self.assertIn("chill-20", out.getvalue())
+        self.assertFalse(Album.objects.filter(name="Chill").exists())
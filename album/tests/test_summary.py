@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from album.summary import summary_queryset
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AlbumSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="owner", password="pw")
+            self.album = Album.objects.create(owner=self.user, name="Mix")
+            for i in range(3):
+                track = Track.objects.create(owner=self.user, name=f"t{i}")
+                AlbumTrack.objects.create(album=self.album, track=track)
+        self.client.force_login(self.user)
+        self.url = reverse("album:album_summary")
+
+    def test_summary_is_one_query(self):
+        Album.objects.create(owner=self.user, name="Empty")
+        with self.assertNumQueries(1):
+            albums = list(summary_queryset(self.user))
+        counts = {a.name: a.track_count for a in albums}
+        self.assertEqual(counts["Mix"], 3)
+        self.assertEqual(counts["Empty"], 0)
+
+    def test_payload_fields(self):
+        rows = self.client.get(self.url).json()["albums"]
+        row = next(r for r in rows if r["id"] == self.album.pk)
+        self.assertEqual(row["track_count"], 3)
+        self.assertEqual(row["rating_count"], 0)
+        self.assertEqual(row["sync"], {"state": "unlinked", "last_sync": None})
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        res = self.client.get(self.url)
+        stamp = res["Last-Modified"]
+        res = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=stamp)
+        self.assertEqual(res.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            track = Track.objects.create(owner=self.user, name="new")
+            AlbumTrack.objects.create(album=self.album, track=track)
+        res = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=stamp)
+        self.assertEqual(res.status_code, 200)
+        counts = {r["id"]: r["track_count"] for r in res.json()["albums"]}
+        self.assertEqual(counts[self.album.pk], 4)
+
+    def test_list_page_defers_track_lists(self):
+        res = self.client.get(reverse("album:album_list"))
+        self.assertContains(res, "js-load-tracks")
+        self.assertContains(res, "data-summary-tracks")
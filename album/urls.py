@@ -9,11 +9,13 @@ app_name = "album"
 urlpatterns = [
     # List & detail
     path("", views.album_list, name="album_list"),
+    path("summary/", views.album_summary, name="album_summary"),
     path("<int:pk>/", views.album_detail, name="album_detail"),
     # Drag & drop / search
     path("search/", views.unified_search, name="unified_search"),
     # Public view
     path("p/<slug:slug>/", views.public_album_detail, name="public_album_detail"),
+    path("<int:pk>/similar/", views.album_similar_tracks, name="album_similar"),
     # AJAX CRUD
     path("api/add/", views.ajax_add_album, name="ajax_add_album"),
     path("<int:pk>/rename/", views.ajax_rename_album, name="ajax_rename_album"),
@@ -49,11 +51,17 @@ urlpatterns = [
         name="toggle_album_visibility",
     ),
     path("ajax/reorder/", views.ajax_reorder_albums, name="ajax_reorder_albums"),
+    path("ajax/move/", views.ajax_move_albums, name="ajax_move_albums"),
     path(
         "<int:pk>/tracks/reorder/",
         views.album_reorder_tracks,
         name="album_reorder_tracks",
     ),
+    path(
+        "<int:pk>/tracks/move/",
+        views.album_move_tracks,
+        name="album_move_tracks",
+    ),
     path(
         "fragment/<int:pk>/tracks/",
         views.album_tracks_fragment,
@@ -5,26 +5,33 @@ import json
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.db.models import (Avg, BooleanField, Case, Count, Exists, F,
-                              IntegerField, Max, OuterRef, Prefetch, Q, Value,
-                              When)
+from django.db.models import Q
 from django.http import (HttpResponseBadRequest, HttpResponseForbidden,
                          JsonResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import NoReverseMatch, reverse
-from django.views.decorators.http import require_POST
-
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import (last_modified, require_GET,
+                                          require_POST)
+
+from core.ordering import OrderedList, apply_order
+from core.pagecache import cache_anonymous_page
+from core.reorder import bump_version, list_key, move_response
+from core.stamps import changed_at, etag_from_stamps, stamp_key
 from plans.utils import can_add_album
-from playlist.models import Playlist, PlaylistItem
 from ratings.utils import annotate_albums
-from save_system.models import SavedTrack
+from save_system.models import SavedAlbum
+from tracks.cards import CardRow, track_cards
 from tracks.forms import TrackForm
-from tracks.models import Favorite, Track
-from tracks.utils import (annotate_in_playlist, annotate_is_in_my_albums,
-                          mark_track_ownership)
+from tracks.models import Track
+from tracks.similar import similar_payload, similar_to
 
+from .labels import invalidate_user_track_labels
 from .models import Album, AlbumTrack
+from .services import attach_track_cards
+from .signals import touch_albums
+from .summary import summary_payload, summary_queryset, sync_state
 
 # ---------- Helpers ----------
 
@@ -64,33 +71,15 @@ def album_tracks_fragment(request, pk):
     ):
         return HttpResponseForbidden("Not allowed.")
 
-    items = (
-        AlbumTrack.objects.filter(album=album)
-        .select_related("track", "track__owner")
-        .annotate(
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-        )
-        .order_by("position", "id")
-    )
-
-    if request.user.is_authenticated:
-        fav_subq = Favorite.objects.filter(
-            owner=request.user, track=OuterRef("track_id")
-        )
-        items = items.annotate(is_favorited=Exists(fav_subq))
-    else:
-        items = items.annotate(is_favorited=Value(False, output_field=BooleanField()))
-
-    # ✅ These ensure _track_card.html has consistent booleans everywhere
-    items = list(items)
-    annotate_is_in_my_albums(items, request.user, attr="track")
-    annotate_in_playlist(items, request.user, attr="track")
-
+    attach_track_cards([album], request.user)
     return render(
         request,
         "album/_album_tracks_fragment.html",
-        {"album": album, "items": items, "is_owner": album.owner_id == request.user.id},
+        {
+            "album": album,
+            "items": album.track_cards,
+            "is_owner": album.owner_id == request.user.id,
+        },
     )
 
 
@@ -99,7 +88,18 @@ def album_tracks_fragment(request, pk):
 # ---------------------- Album functions ---------------------- #
 
 
+def _album_list_stamps(request):
+    """The user's own albums come with the viewer; saved ones are others'."""
+    from save_system.models import SavedAlbum
+
+    saved = SavedAlbum.objects.filter(owner=request.user).values_list(
+        "original_album_id", flat=True
+    )
+    return [stamp_key("track_ratings"), *(stamp_key("album", pk) for pk in saved)]
+
+
 @login_required
+@etag_from_stamps(_album_list_stamps)
 def album_list(request):
     """
     List current user's albums (ordered if field available) + ratings; create on POST.
@@ -138,75 +138,57 @@ def album_list(request):
             messages.success(request, "Album created.")
             return redirect("album:album_list")
 
-    # --- Your albums (order + ratings) ---
-    qs = Album.objects.filter(owner=request.user)
-    if _has_field(Album, "order"):
-        qs = qs.order_by("order", "id")
-    else:
-        qs = qs.order_by("-created_at", "id")
-
-    # Prefetch album tracks with per-track annotations for _track_card.html
-    fav_subq = Favorite.objects.filter(owner=request.user, track=OuterRef("track_id"))
-    items_qs = (
-        AlbumTrack.objects.select_related("track", "track__owner")
-        .annotate(
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-            is_favorited=Exists(fav_subq),
-        )
-        .order_by("position", "id")
-    )
-    qs = qs.prefetch_related(Prefetch("album_tracks", queryset=items_qs))
-
-    # Album-level annotations (avg/count on Album itself)
-    albums = list(annotate_albums(qs))
-
-    # Ensure each Track inside those albums
-    # has consistent flags used by _track_card.html
+    # --- Your albums: one summary query; tracks load per album on demand ---
+    albums = list(summary_queryset(request.user).select_related("owner"))
     for alb in albums:
-        ats = list(getattr(alb, "album_tracks").all())
-        # already has: at.is_favorited, at.track_avg, at.track_count (from items_qs)
-        # add:
-        annotate_is_in_my_albums(
-            ats, request.user, attr="track"
-        )  # sets at.track.is_in_my_albums
-        annotate_in_playlist(
-            ats, request.user, attr="track"
-        )  # sets at.track.in_playlist
+        alb.sync_state = sync_state(alb)
 
     # --- Saved items for tabs (kept intact, but optimized and flagged) ---
     try:
         from save_system.models import SavedAlbum, SavedTrack
 
+        # ?saved=updated narrows both tabs to copies whose original changed
+        only_updated = request.GET.get("saved") == "updated"
+
         saved_albums = (
             SavedAlbum.objects.filter(owner=request.user)
+            .with_updates()
             .select_related("original_album", "original_album__owner")
             .order_by("-saved_at")
         )
-
-        # We want _track_card.html to behave the same for saved tracks
-        fav_track_subq = Favorite.objects.filter(
-            owner=request.user, track=OuterRef("original_track_id")
-        )
-
         saved_tracks = (
             SavedTrack.objects.filter(owner=request.user)
-            .select_related("original_track", "original_track__owner", "album")
-            .annotate(
-                is_favorited=Exists(fav_track_subq)
-            )  # attach fav on SavedTrack row
+            .with_updates()
+            .select_related("album")
             .order_by("-saved_at")
         )
+        if only_updated:
+            saved_albums = saved_albums.filter(is_updated=True)
+            saved_tracks = saved_tracks.filter(is_updated=True)
+
+        # Saved album cards list their tracks: load them with the albums
+        saved_albums = list(saved_albums)
+        attach_track_cards(
+            [s.original_album for s in saved_albums if s.original_album], request.user
+        )
 
-        # annotate flags on the track objects (original_track)
-        # so templates can use them directly
-        tracks_only = [s.original_track for s in saved_tracks if s.original_track]
-        annotate_is_in_my_albums(tracks_only, request.user)  # sets .is_in_my_albums
-        annotate_in_playlist(tracks_only, request.user)  # sets .in_playlist
+        # A saved track's card (s.card) shows the name it was saved under
+        saved_tracks = list(saved_tracks)
+        cards = {
+            card.id: card
+            for card in track_cards(
+                request.user, [s.original_track_id for s in saved_tracks]
+            )
+        }
+        for s in saved_tracks:
+            s.card = cards.get(s.original_track_id)
+            if s.card is not None:
+                s.card.display_name = s.name_snapshot or s.card.name
 
     except Exception:
         saved_albums = []
         saved_tracks = []
+        only_updated = False
 
     return render(
         request,
@@ -215,10 +197,20 @@ def album_list(request):
             "albums": albums,
             "saved_albums": saved_albums,
             "saved_tracks": saved_tracks,
+            "only_updated": only_updated,
         },
     )
 
 
+@login_required
+@require_GET
+@cache_control(private=True, no_cache=True)
+@last_modified(lambda request: changed_at(stamp_key("albums", request.user.id)))
+def album_summary(request):
+    """Compact JSON for the album dashboard (see album.summary)."""
+    return JsonResponse({"albums": summary_payload(summary_queryset(request.user))})
+
+
 def _maybe_reverse(name, *args, **kwargs):
     try:
         return reverse(name, args=args, kwargs=kwargs)
@@ -234,44 +226,10 @@ def unified_search(request):
 
     user = request.user
 
-    # ✓ / ➕ playlist state
-    try:
-        playlist, _ = Playlist.objects.get_or_create(owner=user, name="My Playlist")
-        in_playlist_ids = set(
-            PlaylistItem.objects.filter(playlist=playlist).values_list(
-                "track_id", flat=True
-            )
-        )
-    except Exception:
-        in_playlist_ids = set()
-
-    # favorite subquery for track annotations
-    fav_sub = Favorite.objects.filter(owner=user, track_id=OuterRef("track_id"))
-
-    # ---- ALBUMS: prefetch annotated AlbumTracks -> album.album_tracks_annotated ----
-    at_qs = (
-        AlbumTrack.objects.select_related("track", "track__owner")
-        .annotate(
-            is_favorited=Exists(fav_sub),
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-        )
-        .order_by("position", "id")
-    )
-
-    albums = (
-        Album.objects.filter(owner=user, name__icontains=q)
-        .prefetch_related(
-            Prefetch("album_tracks", queryset=at_qs, to_attr="album_tracks_annotated")
-        )
-        .order_by("name")[:20]
+    albums = attach_track_cards(
+        Album.objects.filter(owner=user, name__icontains=q).order_by("name")[:20], user
     )
 
-    # add in_playlist flag to prefetched tracks
-    for a in albums:
-        for at in getattr(a, "album_tracks_annotated", []):
-            at.track.in_playlist = at.track_id in in_playlist_ids
-
     # render full album cards with URLs passed in (NEVER None — provide fallbacks)
     album_cards = []
     for a in albums:
@@ -321,35 +279,30 @@ def unified_search(request):
     albums_html = "".join(album_cards)
 
     # ---- TRACKS: render _track_card.html for matches inside user's albums ----
-    at_hits = (
-        AlbumTrack.objects.select_related("album", "track", "track__owner")
+    at_hits = {
+        at.id: at
+        for at in AlbumTrack.objects.select_related("album")
         .filter(album__owner=user, track__name__icontains=q)
-        .annotate(
-            is_favorited=Exists(fav_sub),
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-        )
         .order_by("album__name", "position", "id")[:50]
+    }
+    cards = track_cards(
+        user,
+        [CardRow(at.track_id, at.id, at.custom_name or "") for at in at_hits.values()],
     )
 
     tracks_html = "".join(
         render_to_string(
             "tracks/_track_card.html",
             {
-                "track": at.track,
-                "album": at.album,
-                "album_item_id": at.id,
-                "is_owner": (at.album.owner_id == user.id),
-                "is_favorited": bool(at.is_favorited),
-                "in_playlist": (at.track_id in in_playlist_ids),
-                "avg": at.track_avg or 0,
-                "count": at.track_count or 0,
+                "track": card,
+                "album": at_hits[card.item_id].album,
+                "album_item_id": card.item_id,
+                "is_owner": (at_hits[card.item_id].album.owner_id == user.id),
                 "show_checkbox": True,
-                "at": at,
             },
             request=request,
         )
-        for at in at_hits
+        for card in cards
     )
 
     return JsonResponse({"albums_html": albums_html, "tracks_html": tracks_html})
@@ -372,22 +325,7 @@ def ajax_add_album(request):
 
     album = Album(owner=request.user, name=name)
 
-    # Put new album at the end if you have ordering fields
-    if _has_field(Album, "order"):
-        last = (
-            Album.objects.filter(owner=request.user).order_by("-order", "-id").first()
-        )
-        album.order = (last.order + 1) if last and last.order is not None else 0
-    elif _has_field(Album, "position"):
-        last = (
-            Album.objects.filter(owner=request.user)
-            .order_by("-position", "-id")
-            .first()
-        )
-        album.position = (
-            (last.position + 1) if last and last.position is not None else 0
-        )
-
+    # Album.save() appends it to the end of the owner's list (core.ordering)
     album.save()
 
     detail_url = reverse("album:album_detail", args=[album.pk])
@@ -437,6 +375,9 @@ def ajax_delete_album(request, pk):
 
 
 @login_required
+@etag_from_stamps(
+    lambda request, pk: [stamp_key("album", pk), stamp_key("track_ratings")]
+)
 def album_detail(request, pk):
     """
     Show album with tracks.
@@ -461,14 +402,7 @@ def album_detail(request, pk):
             form = TrackForm(request.POST, request.FILES, owner=request.user)
             if form.is_valid():
                 track = form.save()
-                last_pos = (
-                    AlbumTrack.objects.filter(album=album).aggregate(m=Max("position"))[
-                        "m"
-                    ]
-                    or -1
-                )
-                pos = last_pos + 1
-                AlbumTrack.objects.create(album=album, track=track, position=pos)
+                AlbumTrack.objects.create(album=album, track=track)
                 messages.success(request, "Track added to album.")
                 return redirect("album:album_detail", pk=album.pk)
             messages.error(request, "Fix the errors and try again.")
@@ -478,45 +412,8 @@ def album_detail(request, pk):
     else:
         form = TrackForm(owner=request.user) if is_owner else None
 
-    # --- Tracks with annotations ---
-    items_qs = (
-        AlbumTrack.objects.filter(album=album)
-        .select_related("track")
-        .annotate(
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-            is_favorited=Exists(
-                Favorite.objects.filter(
-                    owner=request.user, track_id=OuterRef("track_id")
-                )
-            ),
-        )
-        .order_by("position", "id")
-    )
-
-    # Evaluate once so downstream helpers (and the template include) see the
-    # annotated attributes.
-    items = list(items_qs)
-
-    mark_track_ownership(items, request.user)
-    annotate_is_in_my_albums(items, request.user, attr="track")
-
-    # mark whether each track is already saved in one of the user's albums
-    saved_ids = set()
-    if request.user.is_authenticated:
-        saved_ids = set(
-            SavedTrack.objects.filter(
-                owner=request.user, original_track__in=[it.track for it in items]
-            ).values_list("original_track_id", flat=True)
-        )
-    for it in items:
-        it.track.is_in_my_albums = it.track.id in saved_ids
-
-    # The shared album card partial looks for `album.album_tracks_annotated`
-    # (populated by Prefetch in other views). Mirror that behaviour here so
-    # the track cards receive the annotated AlbumTrack objects with the
-    # rating aggregates, ensuring the star buttons highlight correctly.
-    album.album_tracks_annotated = items
+    # --- Track cards (the album card partial lists album.track_cards) ---
+    items = attach_track_cards([album], request.user)[0].track_cards
 
     # Template choice
     template_name = (
@@ -542,43 +439,55 @@ def album_detail(request, pk):
     return render(request, template_name, context)
 
 
+def _public_album_stamps(request, slug):
+    pk = (
+        Album.objects.filter(slug=slug, is_public=True)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if pk is None:
+        return None  # the view answers 404
+    return [stamp_key("album", pk), stamp_key("track_ratings")]
+
+
+@etag_from_stamps(_public_album_stamps)
+@cache_anonymous_page(_public_album_stamps)
 def public_album_detail(request, slug):
     """Public album detail page with ratings and tracks."""
     album = get_object_or_404(Album, slug=slug, is_public=True)
     album = annotate_albums(Album.objects.filter(pk=album.pk)).first()
 
-    tracks = (
-        AlbumTrack.objects.filter(album=album)
-        .select_related("track")
-        .annotate(
-            track_avg=Avg("track__ratings__stars"),
-            track_count=Count("track__ratings", distinct=True),
-        )
-        .order_by("id")
+    attach_track_cards([album], request.user)
+
+    is_saved = (
+        request.user.is_authenticated
+        and SavedAlbum.objects.filter(owner=request.user, original_album=album).exists()
     )
-    mark_track_ownership(tracks, request.user)
-
-    # ✅ mark saved status for logged-in users
-    saved_ids = set()
-    if request.user.is_authenticated:
-        saved_ids = set(
-            SavedTrack.objects.filter(
-                owner=request.user, original_track__in=[it.track for it in tracks]
-            ).values_list("original_track_id", flat=True)
-        )
-    for it in tracks:
-        it.track.is_in_my_albums = it.track.id in saved_ids
 
     return render(
         request,
         "album/public_album_detail.html",
         {
             "album": album,
-            "tracks": tracks,
+            "items": album.track_cards,
+            "is_saved": is_saved,
         },
     )
 
 
+@require_GET
+def album_similar_tracks(request, pk):
+    """"Listeners also played": neighbours of the album's tracks combined."""
+    album = get_object_or_404(Album, pk=pk)
+    if not album.is_public and album.owner_id != request.user.id:
+        return HttpResponseForbidden("Not allowed.")
+    track_ids = AlbumTrack.objects.filter(album=album).values_list(
+        "track_id", flat=True
+    )
+    pairs = similar_to(list(track_ids), request.user, limit=12)
+    return JsonResponse({"album_id": album.pk, "tracks": similar_payload(pairs)})
+
+
 @login_required
 @require_POST
 def album_add_track(request, pk):
@@ -595,9 +504,7 @@ def album_add_track(request, pk):
         messages.info(request, "Track is already in this album.")
         return redirect("album:album_detail", pk=pk)
 
-    last = AlbumTrack.objects.filter(album=album).order_by("-position").first()
-    pos = (last.position + 1) if last else 0
-    AlbumTrack.objects.create(album=album, track=track, position=pos)
+    AlbumTrack.objects.create(album=album, track=track)
     messages.success(request, "Added to album.")
     return redirect("album:album_detail", pk=pk)
 
@@ -668,10 +575,18 @@ def album_rename_track(request, pk, item_id):
             item.custom_name = new_name
             item.save(update_fields=["custom_name"])
             # …and propagate to all your albums containing the same original track
-            AlbumTrack.objects.filter(
+            renamed = AlbumTrack.objects.filter(
                 album__owner=request.user,
                 track=item.track,
-            ).update(custom_name=new_name)
+            )
+            for album_id, is_public in set(
+                renamed.values_list("album_id", "album__is_public")
+            ):
+                touch_albums(request.user.id, album_id, is_public)
+            renamed.update(custom_name=new_name)
+    if not is_owner:
+        # The update() above bypasses the AlbumTrack signals
+        invalidate_user_track_labels(request.user.id)
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse(
@@ -735,15 +650,8 @@ def album_bulk_detach(request, pk):
     qs = AlbumTrack.objects.filter(album=album, id__in=item_ids)
     to_remove = list(qs.values_list("id", flat=True))
 
-    with transaction.atomic():
-        qs.delete()
-        # re-pack positions to keep list tidy (optional)
-        remaining = list(
-            AlbumTrack.objects.filter(album=album).order_by("position", "id")
-        )
-        for i, at in enumerate(remaining):
-            if at.position != i:
-                AlbumTrack.objects.filter(pk=at.pk).update(position=i)
+    # Sparse keys leave gaps behind on purpose; nothing to re-pack
+    qs.delete()
 
     return JsonResponse({"ok": True, "removed": to_remove, "album_id": album.id})
 
@@ -763,23 +671,30 @@ def ajax_reorder_albums(request):
     if not order:
         return JsonResponse({"ok": True})
 
-    albums = Album.objects.filter(owner=request.user, id__in=order)
-    by_id = {a.id: a for a in albums}
+    with transaction.atomic():
+        apply_order(OrderedList(Album, "order", {"owner": request.user}), order)
+        version = bump_version(list_key("albums", request.user.id))
+        touch_albums(request.user.id)
 
-    pos = 1
-    to_update = []
-    for aid in order:
-        a = by_id.get(aid)
-        if a:
-            a.order = pos
-            to_update.append(a)
-            pos += 1
+    return JsonResponse({"ok": True, "version": version})
 
-    with transaction.atomic():
-        if to_update:
-            Album.objects.bulk_update(to_update, ["order"])
 
-    return JsonResponse({"ok": True})
+@login_required
+@require_POST
+def ajax_move_albums(request):
+    """
+    Move albums in the user's list by delta. Expects JSON:
+    { "version": n, "ops": [{"moved_id", "before_id", "after_id"}, ...] }
+    (see core.reorder).
+    """
+    response = move_response(
+        request,
+        OrderedList(Album, "order", {"owner": request.user}),
+        list_key("albums", request.user.id),
+    )
+    if response.status_code == 200:
+        touch_albums(request.user.id)
+    return response
 
 
 @login_required
@@ -797,37 +712,28 @@ def album_reorder_tracks(request, pk):
     except Exception:
         return JsonResponse({"ok": False, "error": "Bad JSON"}, status=400)
 
-    # Current rows in stable order
-    current_qs = AlbumTrack.objects.filter(album=album).order_by("position", "id")
-    all_ids = list(current_qs.values_list("id", flat=True))
-    if not all_ids:
-        return JsonResponse({"ok": True})
-
-    # Build final ordered list: first the incoming order (validated), then leftovers
-    seen = set()
-    final_ids = []
-    for aid in incoming:
-        if aid in all_ids and aid not in seen:
-            final_ids.append(aid)
-            seen.add(aid)
-    for aid in all_ids:
-        if aid not in seen:
-            final_ids.append(aid)
-
-    # Map each AlbumTrack id -> new position 1..n
-    mapping = {aid: idx + 1 for idx, aid in enumerate(final_ids)}
-
-    # Two-phase, collision-free update:
+    # Only rows that actually moved get a new key; the rest keep theirs
     with transaction.atomic():
-        # Phase 1: bump everything away so UNIQUE(album, position) never collides
-        AlbumTrack.objects.filter(album=album).update(
-            position=F("position") + 1_000_000
-        )
+        apply_order(OrderedList(AlbumTrack, "position", {"album": album}), incoming)
+        version = bump_version(list_key("album_tracks", album.id))
+        touch_albums(request.user.id, album.id, album.is_public)
 
-        # Phase 2: assign the real positions in one go with CASE
-        whens = [When(id=aid, then=Value(pos)) for aid, pos in mapping.items()]
-        AlbumTrack.objects.filter(album=album, id__in=mapping.keys()).update(
-            position=Case(*whens, output_field=IntegerField())
-        )
+    return JsonResponse({"ok": True, "version": version})
 
-    return JsonResponse({"ok": True})
+
+@login_required
+@require_POST
+def album_move_tracks(request, pk):
+    """
+    Move tracks within an album by delta (AlbumTrack IDs). Expects JSON:
+    { "version": n, "ops": [{"moved_id", "before_id", "after_id"}, ...] }
+    """
+    album = get_object_or_404(Album, pk=pk, owner=request.user)
+    response = move_response(
+        request,
+        OrderedList(AlbumTrack, "position", {"album": album}),
+        list_key("album_tracks", album.id),
+    )
+    if response.status_code == 200:
+        touch_albums(request.user.id, album.id, album.is_public)
+    return response
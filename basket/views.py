@@ -3,6 +3,7 @@ from decimal import Decimal
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
 from plans.models import Plan
@@ -16,8 +17,11 @@ def _build_basket_summary(basket: dict):
     items = []
     total = Decimal("0.00")
 
+    plans = Plan.objects.in_bulk([int(plan_id) for plan_id in basket])
     for plan_id, qty in basket.items():
-        plan = get_object_or_404(Plan, id=int(plan_id))
+        plan = plans.get(int(plan_id))
+        if plan is None:
+            raise Http404("No Plan matches the given query.")
         qty = int(qty)
         subtotal = plan.price * qty  # plan.price should be Decimal
         items.append({"plan": plan, "qty": qty, "subtotal": subtotal})
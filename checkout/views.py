@@ -5,7 +5,7 @@ from decimal import Decimal
 import stripe
 from django.conf import settings
 from django.contrib import messages
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views.decorators.http import require_POST
@@ -24,8 +24,11 @@ def _build_basket_summary(session_basket):
     items = []
     total = Decimal("0.00")
 
+    plans = Plan.objects.in_bulk([int(plan_id) for plan_id in session_basket])
     for plan_id, qty in session_basket.items():
-        plan = get_object_or_404(Plan, id=int(plan_id))
+        plan = plans.get(int(plan_id))
+        if plan is None:
+            raise Http404("No Plan matches the given query.")
         qty = int(qty)
         subtotal = plan.price * qty  # plan.price is Decimal
         total += subtotal
@@ -71,15 +74,18 @@ def checkout(request):
 
             order.save()
 
-            # Create OrderItems
-            for plan_id, qty in basket.items():
-                plan = get_object_or_404(Plan, id=int(plan_id))
-                OrderItem.objects.create(
+            # Create OrderItems from the plans already loaded for the summary,
+            # then total once (bulk_create skips the per-item save hooks)
+            OrderItem.objects.bulk_create(
+                OrderItem(
                     order=order,
-                    plan=plan,
-                    quantity=int(qty),
-                    price=plan.price,
+                    plan=item["plan"],
+                    quantity=item["qty"],
+                    price=item["plan"].price,
                 )
+                for item in basket_items
+            )
+            order.update_total()
 
             order.refresh_from_db()
 
@@ -5,10 +5,12 @@ from decimal import Decimal
 
 import stripe
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 
 from plans.models import Plan
+from plans.utils import invalidate_entitlements
 
 from .models import Order, OrderItem
 
@@ -25,6 +27,20 @@ class StripeWH_Handler:
     def handle_payment_intent_payment_failed(self, event):
         return HttpResponse(content=f"Webhook received: {event['type']}", status=200)
 
+    def _invalidate_entitlements(self, intent, order=None):
+        """Make the buyer's new plan visible immediately."""
+        if order is not None and order.user_id:
+            invalidate_entitlements(order.user_id)
+        username = getattr(intent.metadata, "username", None)
+        if username and username != "anonymous":
+            user_id = (
+                get_user_model()
+                .objects.filter(username=username)
+                .values_list("id", flat=True)
+                .first()
+            )
+            invalidate_entitlements(user_id)
+
     def handle_payment_intent_succeeded(self, event):
         intent = event.data.object
         pid = intent.id
@@ -57,6 +73,7 @@ class StripeWH_Handler:
                     order_total=grand_total,
                     stripe_pid=pid,
                 )
+                self._invalidate_entitlements(intent, order)
                 return HttpResponse(
                     content=f"Webhook verified: order already exists (pid={pid})",
                     status=200,
@@ -83,6 +100,7 @@ class StripeWH_Handler:
                     price=plan.price,
                 )
 
+        self._invalidate_entitlements(intent, order)
         return HttpResponse(
             content=f"Webhook created order (pid={pid})",
             status=200,
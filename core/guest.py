@@ -0,0 +1,225 @@
+# core/guest.py
+"""
+Compact storage for anonymous visitors' lists (guest playlist, recents).
+
+Lists used to live in the Django session, so every toggle rewrote the
+whole session row. Now they live in a signed cookie while small; once the
+encoded state outgrows ``GUEST_COOKIE_MAX_BYTES`` it moves to a GuestState
+row and the cookie only carries that row's token. Nothing is written
+unless a list actually changed during the request.
+
+Views use ``request.guest`` (set by GuestStateMiddleware)::
+
+    request.guest.playlist.toggle(track_id)
+    track_id in request.guest.recent      # O(1), via a companion set
+"""
+import secrets
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils.functional import SimpleLazyObject, empty
+
+from .models import GuestState
+
+COOKIE_NAME = "guest_state"
+COOKIE_SALT = "core.guest"
+COOKIE_MAX_AGE = 60 * 60 * 24 * 30  # 30 days
+GUEST_COOKIE_MAX_BYTES = 1500  # spill to the table beyond this
+
+# Keys under which the lists used to be kept in the session (read once)
+LEGACY_SESSION_KEYS = {
+    "playlist": "guest_playlist_ids",
+    "recent": "guest_recent_track_ids",
+}
+
+
+def _clean_ids(values) -> list[int]:
+    out, seen = [], set()
+    for value in values or []:
+        try:
+            tid = int(value)
+        except (TypeError, ValueError):
+            continue
+        if tid > 0 and tid not in seen:
+            out.append(tid)
+            seen.add(tid)
+    return out
+
+
+class GuestList:
+    """Ordered, duplicate-free list of track IDs with O(1) membership."""
+
+    def __init__(self, store: "GuestStore", ids: Iterable[int] = ()):
+        self._store = store
+        self._ids = _clean_ids(ids)
+        self._set = set(self._ids)
+
+    def __contains__(self, track_id) -> bool:
+        return track_id in self._set
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+    def ids(self) -> list[int]:
+        return list(self._ids)
+
+    def _changed(self) -> None:
+        self._set = set(self._ids)
+        self._store.dirty = True
+
+    def add(self, track_id: int) -> bool:
+        """Append; returns False if it was already there."""
+        if track_id in self._set:
+            return False
+        self._ids.append(track_id)
+        self._changed()
+        return True
+
+    def remove(self, track_id: int) -> bool:
+        if track_id not in self._set:
+            return False
+        self._ids = [t for t in self._ids if t != track_id]
+        self._changed()
+        return True
+
+    def toggle(self, track_id: int) -> bool:
+        """Returns True if the track is now in the list."""
+        if self.remove(track_id):
+            return False
+        return self.add(track_id)
+
+    def extend(self, track_ids: Iterable[int]) -> int:
+        """Append unseen IDs; returns how many were added."""
+        new = [t for t in _clean_ids(track_ids) if t not in self._set]
+        if new:
+            self._ids.extend(new)
+            self._changed()
+        return len(new)
+
+    def push_front(self, track_id: int, limit: Optional[int] = None) -> None:
+        """Move/insert to the front, trimming to ``limit`` (recents)."""
+        ids = [track_id] + [t for t in self._ids if t != track_id]
+        if limit is not None:
+            ids = ids[:limit]
+        if ids != self._ids:
+            self._ids = ids
+            self._changed()
+
+    def reorder(self, order: Iterable[int]) -> None:
+        """Given IDs first (in that order), the rest after in their old order."""
+        want = [t for t in _clean_ids(order) if t in self._set]
+        wanted = set(want)
+        ids = want + [t for t in self._ids if t not in wanted]
+        if ids != self._ids:
+            self._ids = ids
+            self._changed()
+
+    def clear(self) -> None:
+        if self._ids:
+            self._ids = []
+            self._changed()
+
+
+class GuestStore:
+    """All guest lists for one request; loaded lazily, saved by the middleware."""
+
+    def __init__(self, request):
+        self.dirty = False
+        self.token: Optional[str] = None
+        self._had_cookie = COOKIE_NAME in request.COOKIES
+        data = self._load(request)
+        self.playlist = GuestList(self, data.get("playlist"))
+        self.recent = GuestList(self, data.get("recent"))
+
+    # -- loading --
+    def _load(self, request) -> dict:
+        raw = request.COOKIES.get(COOKIE_NAME)
+        if raw:
+            try:
+                data = signing.loads(raw, salt=COOKIE_SALT, max_age=COOKIE_MAX_AGE)
+            except signing.BadSignature:
+                data = {}
+            if isinstance(data, dict) and data.get("t"):
+                self.token = str(data["t"])
+                row = GuestState.objects.filter(token=self.token).first()
+                return row.data if row else {}
+            return data if isinstance(data, dict) else {}
+        return self._load_legacy_session(request)
+
+    def _load_legacy_session(self, request) -> dict:
+        # Avoid touching (and creating) a session for visitors who have none
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return {}
+        session = getattr(request, "session", None)
+        if session is None:
+            return {}
+        data = {}
+        for name, key in LEGACY_SESSION_KEYS.items():
+            if key in session:
+                data[name] = session.pop(key)
+                self.dirty = True  # re-save into the new store once
+        return data
+
+    # -- saving --
+    def as_dict(self) -> dict:
+        data = {}
+        if self.playlist:
+            data["playlist"] = self.playlist.ids()
+        if self.recent:
+            data["recent"] = self.recent.ids()
+        return data
+
+    def save(self, response) -> None:
+        data = self.as_dict()
+        if not data:
+            if self.token:
+                GuestState.objects.filter(token=self.token).delete()
+            if self._had_cookie or self.token:
+                response.delete_cookie(COOKIE_NAME)
+            return
+
+        value = signing.dumps(data, salt=COOKIE_SALT, compress=True)
+        if len(value) > GUEST_COOKIE_MAX_BYTES:
+            if not self.token:
+                self.token = secrets.token_urlsafe(24)
+            GuestState.objects.update_or_create(
+                token=self.token, defaults={"data": data}
+            )
+            value = signing.dumps({"t": self.token}, salt=COOKIE_SALT)
+        elif self.token:
+            # Shrunk back under the limit: drop the row, keep it in the cookie
+            GuestState.objects.filter(token=self.token).delete()
+            self.token = None
+
+        response.set_cookie(
+            COOKIE_NAME,
+            value,
+            max_age=COOKIE_MAX_AGE,
+            httponly=True,
+            samesite="Lax",
+            secure=settings.SESSION_COOKIE_SECURE,
+        )
+
+
+class GuestStateMiddleware:
+    """Attach ``request.guest`` and persist it only if a list changed."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.guest = SimpleLazyObject(lambda: GuestStore(request))
+        response = self.get_response(request)
+
+        store = request.guest
+        # Never touched during the request: nothing was loaded or changed
+        if store._wrapped is not empty and store.dirty:
+            store.save(response)
+        return response
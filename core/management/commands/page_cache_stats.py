@@ -0,0 +1,39 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import pagecache
+
+
+class Command(BaseCommand):
+    help = "Report hit ratio and render time saved by the anonymous page cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Zero the counters after reporting."
+        )
+
+    def handle(self, *args, **options):
+        import_module(settings.ROOT_URLCONF)  # registers the cached views
+        total_hits = total_requests = total_saved = 0
+        for page in pagecache.PAGES:
+            s = pagecache.stats(page)
+            requests = s["hits"] + s["misses"]
+            ratio = s["hits"] / requests if requests else 0.0
+            self.stdout.write(
+                f"{page}: {s['hits']}/{requests} hits ({ratio:.1%}), "
+                f"{s['saved_us'] / 1000:.1f} ms saved"
+            )
+            total_hits += s["hits"]
+            total_requests += requests
+            total_saved += s["saved_us"]
+        ratio = total_hits / total_requests if total_requests else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Total: {total_hits}/{total_requests} hits ({ratio:.1%}), "
+                f"{total_saved / 1000:.1f} ms of rendering saved."
+            )
+        )
+        if options["reset"]:
+            pagecache.reset_stats()
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.guest import COOKIE_MAX_AGE
+from core.models import GuestState
+
+
+class Command(BaseCommand):
+    help = "Delete overflow guest lists whose cookie can no longer be valid."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=COOKIE_MAX_AGE // 86400,
+            help="Age (since last change) after which a row is deleted.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted, _ = GuestState.objects.filter(updated_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} guest state row(s)."))
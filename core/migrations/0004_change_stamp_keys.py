@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Stamps move from (user, scope) to a string key so public objects and
+    site-wide state can have one too. Stamps are disposable: a missing one
+    restarts at "now", which only costs each client one full response.
+    """
+
+    dependencies = [
+        ("core", "0003_change_stamps"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="ChangeStamp",
+        ),
+        migrations.CreateModel(
+            name="ChangeStamp",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=80, unique=True)),
+                ("changed_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# ----------------------- core/models.py ----------------------- #
+from django.db import models
+
+
+class ListVersion(models.Model):
+    """
+    Version counter for one user-sortable list (see core.reorder).
+    Bumped on every reorder so a client holding an old order gets a
+    conflict instead of silently overwriting a newer one.
+    """
+
+    key = models.CharField(max_length=80, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} @ v{self.version}"
+
+
+class GuestState(models.Model):
+    """
+    Server-side overflow for an anonymous visitor's lists (see core.guest).
+    Small lists stay in a signed cookie; this row is only used once they
+    outgrow it, keyed by the random token that cookie then carries.
+    """
+
+    token = models.CharField(max_length=64, unique=True)
+    data = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Guest state {self.token[:8]}…"
+
+
+class ChangeStamp(models.Model):
+    """
+    When something behind one group of pages last changed (see
+    core.stamps). Lets views answer conditional GETs with a 304 without
+    recomputing anything.
+    """
+
+    key = models.CharField(max_length=80, unique=True)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} @ {self.changed_at}"
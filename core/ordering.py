@@ -0,0 +1,374 @@
+# core/ordering.py
+"""
+Sparse ordering keys for user-sortable lists (album tracks, playlist items,
+favourites, a user's albums).
+
+Rows are sorted by a signed 64-bit integer key. Keys are handed out with
+large gaps so that moving one row between two neighbours only needs a new
+key for *that* row: the midpoint of its neighbours. When two neighbours
+end up adjacent the list is rebalanced (re-spread evenly), normally in a
+background thread once the gaps start running low.
+
+Appends never query the list: ``next_key()`` is derived from the clock, so
+a new row always sorts after everything that was appended before it.
+"""
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.fields import BigIntegerField
+
+logger = logging.getLogger(__name__)
+
+KEY_GAP = 1024  # minimum distance between keys handed out back to back
+CLOCK_SHIFT = 10  # keys are microseconds * 2**10 (fits a BigInteger until ~2255)
+LOW_WATER_GAP = 4  # schedule a rebalance once a gap drops below this
+_REBALANCE_OFFSET = 4 * 10**18  # parks keys out of the way during a rebalance
+
+_key_lock = threading.Lock()
+_last_key = 0
+
+
+def next_keys(n: int) -> list[int]:
+    """Return ``n`` increasing keys that sort after every key issued so far."""
+    global _last_key
+    if n <= 0:
+        return []
+    with _key_lock:
+        clock = (time.time_ns() // 1000) << CLOCK_SHIFT
+        start = max(_last_key + KEY_GAP, clock)
+        keys = [start + i * KEY_GAP for i in range(n)]
+        _last_key = keys[-1]
+    return keys
+
+
+def next_key() -> int:
+    """Key for appending one row to the end of any list."""
+    return next_keys(1)[0]
+
+
+def front_key() -> int:
+    """Key for prepending one row: newer rows sort before older ones."""
+    return -next_key()
+
+
+def key_between(lo: Optional[int], hi: Optional[int]) -> Optional[int]:
+    """
+    Key strictly between ``lo`` and ``hi`` (either may be None for the list
+    ends). Returns None when the two keys are adjacent and a rebalance is
+    needed first.
+    """
+    if lo is None and hi is None:
+        return next_key()
+    if hi is None:
+        return max(lo + KEY_GAP, next_key())
+    if lo is None:
+        return hi - KEY_GAP
+    if hi - lo < 2:
+        return None
+    return lo + (hi - lo) // 2
+
+
+@dataclass(frozen=True)
+class OrderedList:
+    """
+    One sortable list: ``model`` rows matching ``scope`` ordered by
+    ``key_field`` (ties broken by ``tiebreak``).
+    """
+
+    model: type
+    key_field: str
+    scope: dict = field(default_factory=dict)
+    tiebreak: str = "id"
+
+    def queryset(self):
+        return self.model._default_manager.filter(**self.scope)
+
+    def rows(self) -> list[tuple[int, int]]:
+        """[(id, key), ...] in display order."""
+        return list(
+            self.queryset()
+            .order_by(self.key_field, self.tiebreak)
+            .values_list("id", self.key_field)
+        )
+
+    def set_keys(self, mapping: dict) -> None:
+        """
+        Write ``{id: key}``. Several rows are parked out of range first so a
+        UNIQUE(list, key) constraint never sees a transient duplicate.
+        """
+        if not mapping:
+            return
+        qs = self.queryset()
+        if len(mapping) == 1:
+            [(pk, key)] = mapping.items()
+            qs.filter(pk=pk).update(**{self.key_field: key})
+            return
+        subset = qs.filter(pk__in=list(mapping))
+        subset.update(**{self.key_field: F(self.key_field) + _REBALANCE_OFFSET})
+        whens = [When(pk=pk, then=Value(key)) for pk, key in mapping.items()]
+        subset.update(
+            **{self.key_field: Case(*whens, output_field=BigIntegerField())}
+        )
+
+
+# ---------------------------------------------------------------------------
+# Moves
+# ---------------------------------------------------------------------------
+
+
+class OrderingError(Exception):
+    """The requested move does not fit the list it was applied to."""
+
+
+def _key_after(lst: OrderedList, key: int, exclude: int) -> Optional[int]:
+    """Smallest key in the list greater than ``key`` (ignoring ``exclude``)."""
+    kf = lst.key_field
+    return (
+        lst.queryset()
+        .exclude(pk=exclude)
+        .filter(**{f"{kf}__gt": key})
+        .order_by(kf)
+        .values_list(kf, flat=True)
+        .first()
+    )
+
+
+def _key_before(lst: OrderedList, key: int, exclude: int) -> Optional[int]:
+    """Largest key in the list smaller than ``key`` (ignoring ``exclude``)."""
+    kf = lst.key_field
+    return (
+        lst.queryset()
+        .exclude(pk=exclude)
+        .filter(**{f"{kf}__lt": key})
+        .order_by(f"-{kf}")
+        .values_list(kf, flat=True)
+        .first()
+    )
+
+
+def _is_tied(lst: OrderedList, key: int, exclude: Sequence[int]) -> bool:
+    """Whether another row (not in ``exclude``) shares ``key``."""
+    return (
+        lst.queryset()
+        .exclude(pk__in=exclude)
+        .filter(**{lst.key_field: key})
+        .exists()
+    )
+
+
+def move(
+    lst: OrderedList,
+    moved_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> int:
+    """
+    Move one row so it sits directly before ``before_id`` and/or directly
+    after ``after_id`` (pass one or both). Only the moved row is written,
+    unless the gap is exhausted or the neighbours share a key (rows saved
+    before keys were handed out) and the list has to be rebalanced first.
+    Returns the row's new key.
+    """
+    if moved_id in (before_id, after_id):
+        raise OrderingError("A row cannot be moved next to itself.")
+    for attempt in range(2):
+        ids = {i for i in (moved_id, before_id, after_id) if i is not None}
+        keys = dict(
+            lst.queryset().filter(pk__in=ids).values_list("id", lst.key_field)
+        )
+        if len(keys) != len(ids):
+            raise OrderingError("Unknown row in move.")
+
+        lo = keys.get(after_id) if after_id is not None else None
+        hi = keys.get(before_id) if before_id is not None else None
+
+        # Only one neighbour given: look up the other side. A neighbour
+        # whose key is shared has no room next to it, same as a tie.
+        if after_id is not None and before_id is None:
+            if _is_tied(lst, lo, exclude=[moved_id, after_id]):
+                hi = lo
+            else:
+                hi = _key_after(lst, lo, exclude=moved_id)
+        elif before_id is not None and after_id is None:
+            if _is_tied(lst, hi, exclude=[moved_id, before_id]):
+                lo = hi
+            else:
+                lo = _key_before(lst, hi, exclude=moved_id)
+
+        if lo is not None and hi is not None and lo >= hi:
+            if attempt:
+                raise OrderingError("Neighbours are out of order.")
+            # Tied keys: give every row its own key in display order, retry
+            rebalance(lst)
+            continue
+
+        key = key_between(lo, hi)
+        if key is not None:
+            lst.set_keys({moved_id: key})
+            if (lo is not None and key - lo < LOW_WATER_GAP) or (
+                hi is not None and hi - key < LOW_WATER_GAP
+            ):
+                schedule_rebalance(lst)
+            return key
+
+        # Gap exhausted: spread the list out now, then retry once
+        rebalance(lst)
+    raise OrderingError("Could not find room for the move.")
+
+
+def _lis_indexes(keys: Sequence[int]) -> set[int]:
+    """Indexes of one longest strictly increasing subsequence of ``keys``."""
+    tails: list[int] = []  # smallest tail key for each subsequence length
+    tail_idx: list[int] = []
+    prev = [-1] * len(keys)
+    for i, k in enumerate(keys):
+        pos = bisect.bisect_left(tails, k)
+        if pos == len(tails):
+            tails.append(k)
+            tail_idx.append(i)
+        else:
+            tails[pos] = k
+            tail_idx[pos] = i
+        prev[i] = tail_idx[pos - 1] if pos else -1
+    out = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i != -1:
+        out.add(i)
+        i = prev[i]
+    return out
+
+
+def apply_order(lst: OrderedList, ordered_ids: Sequence[int]) -> int:
+    """
+    Persist a full client-side order with as few writes as possible.
+
+    Unknown IDs are ignored and rows missing from ``ordered_ids`` keep their
+    relative order after the given ones. Rows that already sit in a longest
+    increasing run keep their keys; only the rest get new keys, so dragging
+    one item rewrites one row. Returns the number of rows written.
+    """
+    rows = lst.rows()
+    if not rows:
+        return 0
+    key_of = dict(rows)
+
+    seen = set()
+    final = []
+    for pk in ordered_ids:
+        if pk in key_of and pk not in seen:
+            final.append(pk)
+            seen.add(pk)
+    final.extend(pk for pk, _ in rows if pk not in seen)
+
+    keys = [key_of[pk] for pk in final]
+    keep = _lis_indexes(keys)
+    if len(keep) == len(final):
+        return 0
+
+    # Give each run of displaced rows evenly spaced keys between the kept
+    # (or already re-keyed) neighbours around it.
+    new_keys = {}
+    lo = None
+    i = 0
+    while i < len(final):
+        if i in keep:
+            lo = keys[i]
+            i += 1
+            continue
+        j = i
+        while j < len(final) and j not in keep:
+            j += 1
+        hi = keys[j] if j < len(final) else None
+        run = final[i:j]
+        if hi is None:
+            assigned = next_keys(len(run))
+            if lo is not None and assigned[0] <= lo:
+                assigned = [lo + KEY_GAP * (n + 1) for n in range(len(run))]
+        elif lo is None:
+            assigned = [hi - KEY_GAP * (len(run) - n) for n in range(len(run))]
+        else:
+            step = (hi - lo) // (len(run) + 1)
+            if step < 1:
+                rebalance(lst, order=final)
+                return len(final)
+            assigned = [lo + step * (n + 1) for n in range(len(run))]
+        new_keys.update(zip(run, assigned))
+        lo = assigned[-1]
+        i = j
+
+    with transaction.atomic():
+        lst.set_keys(new_keys)
+    return len(new_keys)
+
+
+# ---------------------------------------------------------------------------
+# Rebalancing
+# ---------------------------------------------------------------------------
+
+
+def rebalance(lst: OrderedList, order: Optional[Sequence[int]] = None) -> None:
+    """
+    Re-spread the keys of a list evenly, keeping its first key where it is
+    (so later appends/prepends still land at the ends). ``order`` optionally
+    gives the display order to write; by default the current one is kept.
+    """
+    with transaction.atomic():
+        rows = lst.rows()
+        if not rows:
+            return
+        current = [pk for pk, _ in rows]
+        if order is not None:
+            live = set(current)
+            ids = [pk for pk in order if pk in live]
+        else:
+            ids = current
+        keys = [k for _, k in rows]
+        lo, hi = min(keys), max(keys)
+        step = max((hi - lo) // max(len(ids) - 1, 1), KEY_GAP)
+        mapping = {pk: lo + step * n for n, pk in enumerate(ids)}
+
+        # Park the old keys far away first so a UNIQUE(list, key) constraint
+        # can never see two rows with the same key mid-update. Rows that
+        # appeared since ``rows()`` was read just get their old key back.
+        kf = lst.key_field
+        lst.queryset().update(**{kf: F(kf) + _REBALANCE_OFFSET})
+        whens = [When(pk=pk, then=Value(key)) for pk, key in mapping.items()]
+        lst.queryset().update(
+            **{
+                kf: Case(
+                    *whens,
+                    default=F(kf) - _REBALANCE_OFFSET,
+                    output_field=BigIntegerField(),
+                )
+            }
+        )
+
+
+def _rebalance_worker(lst: OrderedList) -> None:
+    try:
+        rebalance(lst)
+    except Exception:  # pragma: no cover - logged, next move retries
+        logger.exception("Background rebalance failed for %s", lst)
+    finally:
+        close_old_connections()
+
+
+def schedule_rebalance(lst: OrderedList) -> None:
+    """Rebalance after the current transaction commits, off-thread if enabled."""
+
+    def run():
+        if getattr(settings, "ORDERING_REBALANCE_IN_BACKGROUND", True):
+            threading.Thread(
+                target=_rebalance_worker, args=(lst,), daemon=True
+            ).start()
+        else:
+            rebalance(lst)
+
+    transaction.on_commit(run)
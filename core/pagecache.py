@@ -0,0 +1,135 @@
+# core/pagecache.py
+"""
+Whole-page cache for anonymous visitors.
+
+Public pages render the same HTML for everyone who is not signed in, so
+the first render is stored and replayed. The cache key is the URL plus
+the change stamps the page depends on (core.stamps), so an edit to the
+album, track, rating or profile behind a page moves its key and the next
+visitor gets a fresh render; nothing has to be deleted and no TTL has to
+guess how long content stays valid. Old entries just age out.
+
+Only safe responses are stored: plain 200 HTML that sets no cookies and
+carries no CSRF form token (forms for anonymous visitors would embed one
+visitor's token). If the first render handed out a CSRF cookie (page
+scripts read it), a hit hands out the visitor's own. Visitors with
+pending flash messages or a basket bypass the cache, since those show
+in the page chrome.
+
+Hits, misses and the render time saved are counted in the cache, per
+page; ``manage.py page_cache_stats`` reports them.
+"""
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .snapshots import content_hash
+from .stamps import changed_many
+
+PAGE_CACHE_TTL = 60 * 60 * 24
+STATS_TTL = None  # kept until reset
+
+# Names of the decorated views, for the stats report
+PAGES: list[str] = []
+
+
+def _stat_key(page: str, name: str) -> str:
+    return f"pagecache:stats:{page}:{name}"
+
+
+def _count(page: str, name: str, amount: int = 1) -> None:
+    key = _stat_key(page, name)
+    if not cache.add(key, amount, STATS_TTL):
+        try:
+            cache.incr(key, amount)
+        except ValueError:  # evicted in between
+            cache.set(key, amount, STATS_TTL)
+
+
+def stats(page: str) -> dict:
+    names = ("hits", "misses", "saved_us")
+    values = cache.get_many([_stat_key(page, n) for n in names])
+    return {n: values.get(_stat_key(page, n), 0) for n in names}
+
+
+def reset_stats() -> None:
+    cache.delete_many(
+        [_stat_key(p, n) for p in PAGES for n in ("hits", "misses", "saved_us")]
+    )
+
+
+def _bypass(request) -> bool:
+    return (
+        request.method not in ("GET", "HEAD")
+        or request.user.is_authenticated
+        or bool(len(get_messages(request)))
+        or bool(request.session.get("basket"))
+    )
+
+
+def _storable(response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and getattr(response, "is_rendered", True)
+        and not response.cookies
+        and response.get("Content-Type", "").startswith("text/html")
+        and b"csrfmiddlewaretoken" not in response.content
+    )
+
+
+def cache_anonymous_page(keys_func: Callable[..., Optional[Iterable[str]]]):
+    """
+    Serve anonymous GETs of the view from the page cache. ``keys_func``
+    has the view's signature and returns the stamp keys the page depends
+    on (or None to render uncached, e.g. for a 404).
+    """
+
+    def decorator(view):
+        page = f"{view.__module__}.{view.__name__}"
+        PAGES.append(page)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if _bypass(request):
+                return view(request, *args, **kwargs)
+            started = perf_counter()
+            keys = keys_func(request, *args, **kwargs)
+            if keys is None:
+                return view(request, *args, **kwargs)
+            stamps = changed_many(keys)
+            key = "pagecache:page:" + content_hash(
+                request.get_full_path(),
+                settings.ETAG_SALT,
+                *(f"{k}={stamps[k].timestamp():.0f}" for k in sorted(stamps)),
+            )
+
+            entry = cache.get(key)
+            if entry is not None:
+                content, content_type, uses_csrf, render_us = entry
+                response = HttpResponse(content, content_type=content_type)
+                if uses_csrf:
+                    get_token(request)
+                spent_us = int((perf_counter() - started) * 1e6)
+                _count(page, "hits")
+                _count(page, "saved_us", max(render_us - spent_us, 0))
+                return response
+
+            response = view(request, *args, **kwargs)
+            render_us = int((perf_counter() - started) * 1e6)
+            if _storable(response):
+                uses_csrf = bool(request.META.get("CSRF_COOKIE_NEEDS_UPDATE"))
+                entry = (response.content, response["Content-Type"], uses_csrf)
+                cache.set(key, (*entry, render_us), PAGE_CACHE_TTL)
+            _count(page, "misses")
+            return response
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,185 @@
+# core/profiling.py
+"""
+Opt-in per-request profiling.
+
+ProfilingMiddleware is inert unless ``PROFILING_ENABLED`` is set. It then
+profiles a ``PROFILING_SAMPLE_RATE`` fraction of requests, plus any
+request from a staff user that carries ``X-Profile: 1``. Each profile
+records, per view name:
+
+* wall time and response size;
+* query count, total DB time and the slowest statement;
+* repeated statements (the same SQL shape run more than once in one
+  request, the usual N+1 signature) with their counts;
+* template render time, and each context processor's time and queries,
+  since those run on every page.
+
+Records go to a per-process ring buffer of ``PROFILING_BUFFER_SIZE``
+entries, read by the staff-only ``core:profiles`` endpoint, and to the
+``core.profiling`` logger as one JSON object per line.
+
+Templates are timed by ProfiledTemplates, the template backend named in
+settings; outside a profiled request it only reads a context variable.
+"""
+import json
+import logging
+import random
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils import timezone
+
+from .querycheck import fingerprint
+
+logger = logging.getLogger(__name__)
+
+BUFFER: deque = deque(maxlen=settings.PROFILING_BUFFER_SIZE)
+MAX_DUPLICATES = 5  # repeated statements kept per record
+MAX_SQL = 500  # characters of SQL kept per statement
+
+_current: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class Profile:
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = (0.0, "")
+        self.shapes: Counter = Counter()
+        self.template_time = 0.0
+        self.rendering = False
+        self.processors: dict[str, dict] = {}
+
+    def execute(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            took = perf_counter() - start
+            self.queries += 1
+            self.db_time += took
+            if took > self.slowest[0]:
+                self.slowest = (took, sql)
+            self.shapes[fingerprint(sql)] += 1
+
+    def record(self, request, response) -> dict:
+        match = request.resolver_match
+        duplicates = [
+            {"sql": sql[:MAX_SQL], "count": n}
+            for sql, n in self.shapes.most_common(MAX_DUPLICATES)
+            if n > 1
+        ]
+        return {
+            "at": timezone.now().isoformat(),
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "ms": _ms(perf_counter() - self.started),
+            "bytes": None if response.streaming else len(response.content),
+            "queries": self.queries,
+            "db_ms": _ms(self.db_time),
+            "slowest": {"ms": _ms(self.slowest[0]), "sql": self.slowest[1][:MAX_SQL]},
+            "duplicates": duplicates,
+            "template_ms": _ms(self.template_time),
+            "context_processors": self.processors,
+        }
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _sampled(self, request) -> bool:
+        if request.headers.get("X-Profile") == "1":
+            user = getattr(request, "user", None)
+            if user is not None and user.is_staff:
+                return True
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if not self._sampled(request):
+            return self.get_response(request)
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.execute))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        record = profile.record(request, response)
+        BUFFER.append(record)
+        logger.info(json.dumps(record))
+        return response
+
+
+# ---- Template timing ----
+
+
+def _timed_processor(processor):
+    name = f"{processor.__module__}.{processor.__qualname__}"
+
+    @wraps(processor)
+    def timed(request):
+        profile = _current.get()
+        if profile is None:
+            return processor(request)
+        start, queries = perf_counter(), profile.queries
+        try:
+            return processor(request)
+        finally:
+            stats = profile.processors.setdefault(name, {"ms": 0.0, "queries": 0})
+            stats["ms"] = round(stats["ms"] + _ms(perf_counter() - start), 2)
+            stats["queries"] += profile.queries - queries
+
+    return timed
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None or profile.rendering:
+            # Not profiling, or nested inside a render already being timed
+            return super().render(context, request)
+        profile.rendering = True
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += perf_counter() - start
+            profile.rendering = False
+
+
+class ProfiledTemplates(DjangoTemplates):
+    """DjangoTemplates whose renders and context processors can be timed."""
+
+    def __init__(self, params):
+        super().__init__(params)
+        engine = self.engine
+        # Engine caches this property on the instance; replace the cached value
+        engine.__dict__["template_context_processors"] = tuple(
+            _timed_processor(p) for p in engine.template_context_processors
+        )
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name).template, self)
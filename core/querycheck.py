@@ -0,0 +1,130 @@
+# core/querycheck.py
+"""
+Duplicate-query guard: fail fast on N+1 patterns.
+
+While a guard is active every statement is reduced to a fingerprint (its
+SQL with literals and IN lists normalised; Django already passes
+parameters as placeholders). When one fingerprint runs more than
+``limit`` times the guard raises DuplicateQueryError naming the statement
+and the project code that issued it, so the failing test points at the
+loop rather than at a query count.
+
+DuplicateQueryMiddleware guards each request when
+``DUPLICATE_QUERY_LIMIT`` is set; core.testing.GuardedTestRunner sets it
+for the test suite. Known, accepted repeats are allowlisted either in
+``DUPLICATE_QUERY_ALLOWLIST`` (regexes searched in "<location> <sql>")
+or around the code with ``allow_duplicate_queries()``. Savepoint
+statements never count.
+"""
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+_allowed: ContextVar[bool] = ContextVar("duplicate_queries_allowed", default=False)
+
+_IN_LIST = re.compile(r"\((?:%s, )+%s\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SAVEPOINT = re.compile(r"^\s*(?:RELEASE |ROLLBACK TO )?SAVEPOINT\b", re.I)
+_THIS_DIR = Path(__file__).resolve().parent
+
+
+def fingerprint(sql: str) -> str:
+    """Statement shape: literals become ``?`` and IN lists fold to one."""
+    return _IN_LIST.sub("(%s, ...)", _LITERAL.sub("?", sql))
+
+
+def caller() -> str:
+    """
+    ``path:line in function`` of the innermost project frame, followed by
+    the template line when the query was issued while rendering one.
+    """
+    base = Path(settings.BASE_DIR).resolve()
+    template = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        node = frame.f_locals.get("self")
+        if template is None and isinstance(node, Node) and hasattr(node, "token"):
+            name = node.origin.template_name or node.origin.name
+            template = f"{name}:{node.token.lineno}"
+        path = Path(frame.f_code.co_filename).resolve()
+        if (
+            path.is_relative_to(base)
+            and "site-packages" not in path.parts
+            and path.parent != _THIS_DIR
+        ):
+            location = (
+                f"{path.relative_to(base)}:{frame.f_lineno} in {frame.f_code.co_name}"
+            )
+            return f"{location} (template {template})" if template else location
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class DuplicateQueryError(AssertionError):
+    def __init__(self, sql: str, count: int, location: str):
+        super().__init__(
+            f"Query ran {count} times in one request (N+1?), last from "
+            f"{location}:\n    {sql}\nBatch it, or allowlist it "
+            f"(DUPLICATE_QUERY_ALLOWLIST / allow_duplicate_queries())."
+        )
+        self.sql, self.count, self.location = sql, count, location
+
+
+@contextmanager
+def allow_duplicate_queries():
+    """Statements issued inside this block are not counted."""
+    token = _allowed.set(True)
+    try:
+        yield
+    finally:
+        _allowed.reset(token)
+
+
+class DuplicateQueryGuard:
+    """Context manager raising once any fingerprint runs more than ``limit`` times."""
+
+    def __init__(self, limit: int, allowlist=None):
+        self.limit = limit
+        if allowlist is None:
+            allowlist = getattr(settings, "DUPLICATE_QUERY_ALLOWLIST", ())
+        self.allowlist = [re.compile(p) for p in allowlist]
+        self.counts: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _allowed.get() and not _SAVEPOINT.match(sql):
+            shape = fingerprint(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] > self.limit:
+                location = caller()
+                subject = f"{location} {shape}"
+                if not any(p.search(subject) for p in self.allowlist):
+                    raise DuplicateQueryError(shape, self.counts[shape], location)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc):
+        return self._stack.__exit__(*exc)
+
+
+class DuplicateQueryMiddleware:
+    def __init__(self, get_response):
+        if settings.DUPLICATE_QUERY_LIMIT is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with DuplicateQueryGuard(settings.DUPLICATE_QUERY_LIMIT):
+            return self.get_response(request)
@@ -0,0 +1,155 @@
+# core/reorder.py
+"""
+Move-delta reordering with optimistic concurrency.
+
+Instead of posting the whole list after a drag, the client sends the move
+itself::
+
+    {"version": 7, "ops": [{"moved_id": 12, "before_id": 9, "after_id": 4}]}
+
+(a single op may also be sent at the top level). ``before_id`` is the row
+the moved one now sits before, ``after_id`` the row it now sits after;
+either may be null at the ends of the list. Each op rewrites one row, and
+the list version is bumped once per request. A stale ``version`` gets a
+409 with the current one so the client can reload instead of clobbering
+a change made in another tab.
+"""
+import json
+from typing import Callable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+
+from .models import ListVersion
+from .ordering import OrderedList, OrderingError, move
+
+MAX_OPS = 50  # one drag is one op; this only bounds batched clients
+
+LIST_KEYS = {
+    "albums": "user:{}:albums",
+    "album_tracks": "album:{}:tracks",
+    "playlist": "playlist:{}",
+    "favorites": "user:{}:favorites",
+}
+
+
+class VersionConflict(Exception):
+    """The client's list version is older than the stored one."""
+
+    def __init__(self, current: int):
+        super().__init__(f"List changed (now at version {current}).")
+        self.current = current
+
+
+def list_key(kind: str, pk) -> str:
+    return LIST_KEYS[kind].format(pk)
+
+
+def current_version(key: str) -> int:
+    return (
+        ListVersion.objects.filter(key=key).values_list("version", flat=True).first()
+        or 0
+    )
+
+
+def bump_version(key: str, expected: Optional[int] = None) -> int:
+    """
+    Increment the version of ``key`` and return the new value. With
+    ``expected`` the increment only happens if the stored version still
+    matches (a single conditional UPDATE); otherwise VersionConflict.
+    """
+    qs = ListVersion.objects.filter(key=key)
+    if expected is not None:
+        qs = qs.filter(version=expected)
+    if qs.update(version=F("version") + 1):
+        return expected + 1 if expected is not None else current_version(key)
+
+    if expected in (None, 0):
+        # First reorder of this list: no row yet
+        try:
+            with transaction.atomic():
+                ListVersion.objects.create(key=key, version=1)
+            return 1
+        except IntegrityError:
+            if expected is None:
+                return bump_version(key)
+    raise VersionConflict(current_version(key))
+
+
+def parse_moves(request) -> tuple[Optional[int], list[dict]]:
+    """Return (version, ops) from a JSON body; raises ValueError when malformed."""
+    payload = json.loads(request.body or "{}")
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object.")
+    raw_ops = payload.get("ops")
+    if raw_ops is None:
+        raw_ops = [payload]
+    if not isinstance(raw_ops, list) or not 0 < len(raw_ops) <= MAX_OPS:
+        raise ValueError(f"Send between 1 and {MAX_OPS} moves.")
+
+    def _id(value):
+        return None if value in (None, "") else int(value)
+
+    ops = []
+    for op in raw_ops:
+        moved = _id(op.get("moved_id"))
+        before, after = _id(op.get("before_id")), _id(op.get("after_id"))
+        if moved is None or (before is None and after is None):
+            raise ValueError("Each move needs moved_id and a neighbour.")
+        ops.append({"moved_id": moved, "before_id": before, "after_id": after})
+
+    version = payload.get("version")
+    return (None if version is None else int(version)), ops
+
+
+def apply_moves(
+    lst: OrderedList, key: str, version: Optional[int], ops: list[dict]
+) -> int:
+    """Apply ``ops`` atomically and return the new list version."""
+    with transaction.atomic():
+        new_version = bump_version(key, expected=version)
+        for op in ops:
+            move(lst, op["moved_id"], op["before_id"], op["after_id"])
+    return new_version
+
+
+def move_response(
+    request,
+    lst: OrderedList,
+    key: str,
+    translate: Optional[Callable[[list[int]], dict]] = None,
+) -> JsonResponse:
+    """
+    Shared body of the ``*_move`` views. ``translate`` optionally maps the
+    IDs the client knows (e.g. track IDs) to the row IDs of ``lst``.
+    """
+    try:
+        version, ops = parse_moves(request)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"ok": False, "error": "Bad JSON"}, status=400)
+
+    if translate is not None:
+        ids = {v for op in ops for v in op.values() if v is not None}
+        mapping = translate(list(ids))
+        ops = [
+            {
+                name: mapping.get(v, -1) if v is not None else None
+                for name, v in op.items()
+            }
+            for op in ops
+        ]
+
+    try:
+        new_version = apply_moves(lst, key, version, ops)
+    except VersionConflict as exc:
+        return JsonResponse(
+            {"ok": False, "error": "conflict", "version": exc.current}, status=409
+        )
+    except OrderingError:
+        # Rows vanished or the client's view of the list is stale
+        return JsonResponse(
+            {"ok": False, "error": "conflict", "version": current_version(key)},
+            status=409,
+        )
+    return JsonResponse({"ok": True, "version": new_version})
@@ -0,0 +1,25 @@
+# core/snapshots.py
+"""
+Content hashes for "has the original changed since I saved it?" checks.
+
+Albums and tracks keep a hash of their user-visible metadata in a column,
+refreshed on save. Saved copies store the hash of what they captured, so
+spotting updates is a column comparison the database can do in a join
+(see save_system.models) rather than a per-row load of the original.
+"""
+import hashlib
+
+HASH_LENGTH = 40
+
+
+def content_hash(*parts) -> str:
+    """Stable SHA-1 of ``parts`` (None counts as empty)."""
+    joined = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def with_hash_field(update_fields, watched, hash_field: str = "content_hash"):
+    """``update_fields`` plus ``hash_field`` when a watched field is saved."""
+    if update_fields is None or not set(update_fields) & set(watched):
+        return update_fields
+    return {*update_fields, hash_field}
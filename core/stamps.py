@@ -0,0 +1,206 @@
+# core/stamps.py
+"""
+Change stamps for conditional GETs.
+
+A stamp is the time something behind a group of pages last changed,
+stored under a string key (see ``STAMP_KEYS``). Write paths call
+``touch(key)``, usually from a signal; read views are wrapped in
+``etag_from_stamps`` (or pass ``changed_at`` to Django's
+``last_modified``) so a client revisiting with ``If-None-Match`` /
+``If-Modified-Since`` gets a 304 before the view body runs. Stamps live
+in ChangeStamp and are cached, so checking one is normally a cache hit.
+
+HTTP dates have one-second resolution, so stamps are kept to whole
+seconds and always move forward by at least one second: two changes in
+the same second would otherwise look like one to a client that fetched
+between them. Touches are coalesced per transaction, so deleting an
+album with a hundred tracks moves each stamp once.
+
+Stamps are written after the transaction commits. A request that lands
+in between sees the new rows under the old stamp, which only means its
+client fetches the page once more; it never gets a 304 for stale data.
+"""
+import weakref
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import ChangeStamp
+from .snapshots import content_hash
+
+CACHE_TTL = 60 * 60 * 24
+
+STAMP_KEYS = {
+    "albums": "user:{}:albums",  # albums they own and what is in them
+    "tracks": "user:{}:tracks",  # tracks they own
+    "library": "user:{}:library",  # favourites, playlists, saved items, plays
+    "social": "user:{}:social",  # profile, follows either way, suggestions
+    "album": "album:{}",  # one album as anyone sees it
+    "public_albums": "albums:public",  # site-wide listings of public albums
+    "track_ratings": "tracks:ratings",  # averages are shown on every track card
+}
+
+# What the navbar and context processors show the signed-in user
+VIEWER_KINDS = ("albums", "tracks", "library", "social")
+
+
+def stamp_key(kind: str, pk=None) -> str:
+    return STAMP_KEYS[kind].format(pk)
+
+
+def _cache_key(key: str) -> str:
+    return f"stamp:{key}"
+
+
+def _now() -> datetime:
+    return timezone.now().replace(microsecond=0)
+
+
+class _Once:
+    """An on_commit callback that leaves the pending map when it runs."""
+
+    __slots__ = ("key", "func", "pending", "__weakref__")
+
+    def __init__(self, key, func, pending):
+        self.key, self.func, self.pending = key, func, pending
+
+    def __call__(self):
+        if self.pending.get(self.key) is self:
+            del self.pending[self.key]
+        self.func()
+
+
+def once_per_transaction(key, func: Callable[[], None]) -> None:
+    """
+    Run ``func`` after the current transaction commits, unless something
+    is already queued under ``key`` for it (outside a transaction: now).
+
+    Queued callbacks are kept in a per-connection map that only holds them
+    weakly: Django drops the callbacks of a rolled-back transaction or
+    savepoint, and the map forgets them with it.
+    """
+    connection = transaction.get_connection()
+    pending = connection.__dict__.setdefault(
+        "_pending_once", weakref.WeakValueDictionary()
+    )
+    if key in pending:
+        return
+    callback = pending[key] = _Once(key, func, pending)
+    transaction.on_commit(callback)
+
+
+def touch(key: str) -> None:
+    """
+    Record that whatever ``key`` covers changed. The write happens once
+    per transaction, after it commits, however many rows changed in it.
+    """
+    once_per_transaction(("stamp", key), partial(_write, key))
+
+
+def touch_user(user_id: Optional[int], *kinds: str) -> None:
+    """``touch`` the per-user stamps ``kinds`` of ``user_id``, if there is one."""
+    if user_id:
+        for kind in kinds:
+            touch(stamp_key(kind, user_id))
+
+
+def _write(key: str) -> None:
+    previous = _stored(key)
+    stamp = _now()
+    if previous is not None:
+        stamp = max(stamp, previous + timedelta(seconds=1))
+    rows = ChangeStamp.objects.filter(key=key)
+    if not rows.update(changed_at=stamp):
+        try:
+            with transaction.atomic():
+                ChangeStamp.objects.create(key=key, changed_at=stamp)
+        except IntegrityError:
+            # Created concurrently
+            rows.update(changed_at=stamp)
+    cache.set(_cache_key(key), stamp, CACHE_TTL)
+
+
+def _stored(key: str) -> Optional[datetime]:
+    stamp = cache.get(_cache_key(key))
+    if stamp is None:
+        stamp = (
+            ChangeStamp.objects.filter(key=key)
+            .values_list("changed_at", flat=True)
+            .first()
+        )
+    return stamp
+
+
+def changed_many(keys: Iterable[str]) -> dict[str, datetime]:
+    """Stamps of ``keys``; ones never seen start now."""
+    keys = list(dict.fromkeys(keys))
+    cached = cache.get_many([_cache_key(k) for k in keys])
+    stamps = {k: cached[_cache_key(k)] for k in keys if _cache_key(k) in cached}
+    missing = [k for k in keys if k not in stamps]
+    if missing:
+        stamps.update(
+            ChangeStamp.objects.filter(key__in=missing).values_list(
+                "key", "changed_at"
+            )
+        )
+        new = [k for k in missing if k not in stamps]
+        if new:
+            now = _now()
+            ChangeStamp.objects.bulk_create(
+                [ChangeStamp(key=k, changed_at=now) for k in new],
+                ignore_conflicts=True,
+            )
+            stamps.update(dict.fromkeys(new, now))
+        cache.set_many({_cache_key(k): stamps[k] for k in missing}, CACHE_TTL)
+    return stamps
+
+
+def changed_at(key: str) -> datetime:
+    """Last change of ``key``; starts now if never seen."""
+    return changed_many([key])[key]
+
+
+def etag_from_stamps(keys_func: Callable[..., Optional[Iterable[str]]]):
+    """
+    Answer ``If-None-Match`` from change stamps. ``keys_func(request,
+    *args, **kwargs)`` returns the stamp keys the page depends on (or
+    None to skip). The ETag also covers everything the page varies on
+    outside the database: the viewer, the URL, the CSRF token and the
+    session basket. Pages with pending flash messages are never matched,
+    since a 304 would not show them.
+    """
+
+    def etag(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+            return None
+        keys = keys_func(request, *args, **kwargs)
+        if keys is None:
+            return None
+        keys = list(keys)
+        user_id = request.user.pk
+        if user_id:
+            keys += [stamp_key(kind, user_id) for kind in VIEWER_KINDS]
+        stamps = changed_many(keys)
+        return content_hash(
+            user_id,
+            request.get_full_path(),
+            request.META.get("CSRF_COOKIE", ""),
+            sorted(request.session.get("basket", {}).items()),
+            settings.ETAG_SALT,
+            *(f"{k}={stamps[k].timestamp():.0f}" for k in sorted(stamps)),
+        )
+
+    def decorator(view):
+        return cache_control(private=True, no_cache=True)(
+            condition(etag_func=etag)(view)
+        )
+
+    return decorator
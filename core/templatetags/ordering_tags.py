@@ -0,0 +1,16 @@
+"""Template helpers for sortable lists."""
+
+from django import template
+
+from core.reorder import current_version, list_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def list_version(kind: str, pk) -> int:
+    """Current version of a sortable list, for ``data-list-version``.
+
+    ``kind`` is one of the keys of ``core.reorder.LIST_KEYS``.
+    """
+    return current_version(list_key(kind, pk))
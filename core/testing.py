@@ -0,0 +1,22 @@
+# core/testing.py
+"""Test runner that fails any request running the same query N+1 times."""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class GuardedTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner with core.querycheck's duplicate-query guard switched on
+    for every request the test client makes (unless the environment
+    already set ``DUPLICATE_QUERY_LIMIT``).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._saved_limit = settings.DUPLICATE_QUERY_LIMIT
+        if settings.DUPLICATE_QUERY_LIMIT is None:
+            settings.DUPLICATE_QUERY_LIMIT = settings.DUPLICATE_QUERY_TEST_LIMIT
+
+    def teardown_test_environment(self, **kwargs):
+        settings.DUPLICATE_QUERY_LIMIT = self._saved_limit
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,63 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import guest
+from core.models import GuestState
+from playlist.models import PlaylistItem
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GuestStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="o", password="pw")
+        self.tracks = [
+            Track.objects.create(owner=self.owner, name=f"t{i}") for i in range(3)
+        ]
+
+    def toggle(self, track):
+        return self.client.post(reverse("playlist:toggle", args=[track.id])).json()
+
+    def test_toggle_uses_cookie_not_session(self):
+        self.assertTrue(self.toggle(self.tracks[0])["in_playlist"])
+        self.assertIn(guest.COOKIE_NAME, self.client.cookies)
+        self.assertNotIn("sessionid", self.client.cookies)
+
+        self.toggle(self.tracks[1])
+        self.assertFalse(self.toggle(self.tracks[0])["in_playlist"])
+        res = self.client.get(reverse("playlist:json"))
+        self.assertEqual([t["id"] for t in res.json()["tracks"]], [])  # no src
+        self.assertEqual(self.toggle(self.tracks[2])["count"], 2)
+
+    def test_large_lists_spill_to_table(self):
+        guest.GUEST_COOKIE_MAX_BYTES, old = 64, guest.GUEST_COOKIE_MAX_BYTES
+        try:
+            self.client.post(
+                reverse("playlist:bulk_add"),
+                json.dumps({"track_ids": [t.id for t in self.tracks]}),
+                content_type="application/json",
+            )
+        finally:
+            guest.GUEST_COOKIE_MAX_BYTES = old
+        self.assertEqual(GuestState.objects.count(), 1)
+        self.assertEqual(
+            GuestState.objects.get().data["playlist"], [t.id for t in self.tracks]
+        )
+
+    def test_login_merges_guest_playlist(self):
+        for t in self.tracks:
+            self.toggle(t)
+        user = User.objects.create_user(username="g", password="pw")
+        self.client.post(reverse("account_login"), {"login": "g", "password": "pw"})
+
+        items = PlaylistItem.objects.filter(playlist__owner=user)
+        self.assertEqual(
+            list(items.values_list("track_id", flat=True)),
+            [t.id for t in self.tracks],
+        )
+        self.assertEqual(self.client.cookies[guest.COOKIE_NAME].value, "")
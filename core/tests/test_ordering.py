@@ -0,0 +1,98 @@
+import json
+from datetime import timedelta
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from album.models import AlbumTrack
+from core.ordering import (KEY_GAP, OrderedList, apply_order, key_between,
+                           move, rebalance)
+from tracks.models import Favorite, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ORDERING_REBALANCE_IN_BACKGROUND=False)
+class OrderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.album = self.user.albums.get(is_default=True)
+        self.items = [
+            AlbumTrack.objects.create(
+                album=self.album,
+                track=Track.objects.create(owner=self.user, name=f"t{i}"),
+            )
+            for i in range(5)
+        ]
+        self.lst = OrderedList(AlbumTrack, "position", {"album": self.album})
+
+    def ids(self):
+        return [pk for pk, _ in self.lst.rows()]
+
+    def test_appends_keep_insertion_order(self):
+        self.assertEqual(self.ids(), [it.id for it in self.items])
+
+    def test_key_between(self):
+        self.assertEqual(key_between(0, 10), 5)
+        self.assertIsNone(key_between(4, 5))
+        self.assertLess(key_between(None, 10), 10)
+        self.assertGreater(key_between(10, None), 10)
+
+    def test_drag_rewrites_one_row(self):
+        a, b, c, d, e = [it.id for it in self.items]
+        with CaptureQueriesContext(connection) as ctx:
+            written = apply_order(self.lst, [a, d, b, c, e])
+        self.assertEqual(written, 1)
+        self.assertEqual(self.ids(), [a, d, b, c, e])
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+
+    def test_move_rebalances_when_gap_is_exhausted(self):
+        a, b, c, d, e = [it.id for it in self.items]
+        self.lst.set_keys({a: 1, b: 2, c: 3, d: 4, e: 5})
+        move(self.lst, e, before_id=b, after_id=a)
+        self.assertEqual(self.ids(), [a, e, b, c, d])
+
+    def test_rebalance_keeps_order(self):
+        before = self.ids()
+        rebalance(self.lst)
+        self.assertEqual(self.ids(), before)
+
+    def test_migration_splits_ties_in_display_order(self):
+        other = User.objects.create_user(username="o", password="pw")
+        favs = [
+            Favorite.objects.create(owner=owner, track=item.track)
+            for owner in (self.user, other)
+            for item in self.items[:3]
+        ]
+        for n, fav in enumerate(favs):
+            Favorite.objects.filter(pk=fav.pk).update(
+                position=0, created_at=timezone.now() + timedelta(seconds=n)
+            )
+        migration = import_module("tracks.migrations.0004_sparse_order_keys")
+        migration.spread_by_rank(
+            Favorite, "position", "owner", ["position", "-created_at"]
+        )
+
+        for owner in (self.user, other):
+            rows = Favorite.objects.filter(owner=owner).values_list("id", "position")
+            # Newest first, as the tied rows were shown
+            expected = [f.id for f in reversed(favs) if f.owner_id == owner.id]
+            self.assertEqual([pk for pk, _ in rows], expected)
+            self.assertEqual([k for _, k in rows], [0, KEY_GAP, 2 * KEY_GAP])
+
+    def test_reorder_endpoint(self):
+        self.client.force_login(self.user)
+        order = [it.id for it in reversed(self.items)]
+        res = self.client.post(
+            reverse("album:album_reorder_tracks", args=[self.album.pk]),
+            json.dumps({"order": order}),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.ids(), order)
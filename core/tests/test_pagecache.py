@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from core import pagecache
+from profile_page.models import UserProfile
+from ratings.models import TrackRating
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner = User.objects.create_user(username="owner", password="pw")
+            UserProfile.objects.get_or_create(user=self.owner)
+            self.album = Album.objects.create(
+                owner=self.owner, name="Mix", is_public=True
+            )
+            self.track = Track.objects.create(owner=self.owner, name="Song")
+            AlbumTrack.objects.create(album=self.album, track=self.track)
+        self.url = reverse("album:public_album_detail", args=[self.album.slug])
+
+    def hits(self, page="album.views.public_album_detail"):
+        return pagecache.stats(page)["hits"]
+
+    def test_second_visit_is_a_hit_with_the_same_cookies(self):
+        first = self.client.get(self.url)
+        self.client.cookies.clear()
+        second = self.client.get(self.url)
+        self.assertEqual(self.hits(), 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(set(first.cookies), set(second.cookies))
+
+    def test_edits_move_the_key(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.album.name = "Mix (deluxe)"
+            self.album.save(update_fields=["name"])
+        self.assertContains(self.client.get(self.url), "Mix (deluxe)")
+        self.assertEqual(self.hits(), 0)
+
+        home = reverse("home")
+        self.client.get(home)
+        with self.captureOnCommitCallbacks(execute=True):
+            TrackRating.objects.create(user=self.owner, track=self.track, stars=5)
+        self.client.get(home)
+        self.assertEqual(self.hits("home_page.views.index"), 0)
+
+    def test_signed_in_visitors_bypass(self):
+        self.client.force_login(self.owner)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(
+            pagecache.stats("album.views.public_album_detail"),
+            {"hits": 0, "misses": 0, "saved_us": 0},
+        )
+
+    def test_stats_command(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        out = StringIO()
+        call_command("page_cache_stats", "--reset", stdout=out)
+        self.assertIn(
+            "album.views.public_album_detail: 1/2 hits (50.0%)", out.getvalue()
+        )
+        self.assertEqual(self.hits(), 0)
@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from core import profiling
+from tracks.models import Track
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False, PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0
+)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        profiling.BUFFER.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        album = Album.objects.create(owner=self.user, name="Mix", is_public=True)
+        for i in range(3):
+            track = Track.objects.create(owner=self.user, name=f"t{i}")
+            AlbumTrack.objects.create(album=album, track=track)
+
+    def test_record_covers_queries_templates_and_processors(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("track_list"))
+        record = profiling.BUFFER[-1]
+        self.assertEqual(record["view"], "track_list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["bytes"], 0)
+        self.assertGreater(record["template_ms"], 0)
+        # Which statement is slowest is down to timing; one is always recorded
+        self.assertTrue(record["slowest"]["sql"])
+        stats = record["context_processors"]["tracks.context_processors.ui_track_state"]
+        self.assertGreaterEqual(stats["queries"], 3)
+
+    def test_repeated_statements_are_flagged(self):
+        profile = profiling.Profile()
+        with connection.execute_wrapper(profile.execute):
+            for track in Track.objects.all():
+                Track.objects.filter(pk=track.pk).exists()  # one per row
+        self.assertEqual(profile.shapes.most_common(1)[0][1], 3)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_sampling_and_staff_override(self):
+        self.client.get(reverse("home"))
+        self.assertEqual(len(profiling.BUFFER), 0)
+        self.client.get(reverse("home"), HTTP_X_PROFILE="1")
+        self.assertEqual(len(profiling.BUFFER), 0)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.client.get(reverse("home"), HTTP_X_PROFILE="1")
+        self.assertEqual(len(profiling.BUFFER), 1)
+
+    def test_report_is_staff_only(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("track_list"))
+        url = reverse("core:profiles")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        data = self.client.get(url, {"view": "track_list"}).json()
+        self.assertEqual(data["views"]["track_list"]["requests"], 1)
+        self.assertEqual([r["view"] for r in data["recent"]], ["track_list"])
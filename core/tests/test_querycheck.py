@@ -0,0 +1,93 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from core.querycheck import (DuplicateQueryError, DuplicateQueryGuard,
+                             allow_duplicate_queries, fingerprint)
+from plans.models import Plan
+from ratings.models import TrackRating
+from save_system.models import SavedAlbum
+from tracks.models import Track
+
+
+class GuardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u", password="pw")
+        for i in range(3):
+            Track.objects.create(owner=self.user, name=f"t{i}")
+
+    def _per_row(self):
+        for track in Track.objects.all():
+            Track.objects.filter(pk=track.pk).exists()
+
+    def test_fingerprint_normalises_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT 1 FROM t WHERE a = 'x' AND b IN (%s, %s, %s)"),
+            fingerprint("SELECT 7 FROM t WHERE a = 'y' AND b IN (%s, %s)"),
+        )
+
+    def test_repeats_over_the_limit_raise_with_location(self):
+        with self.assertRaises(DuplicateQueryError) as raised:
+            with DuplicateQueryGuard(limit=2, allowlist=[]):
+                self._per_row()
+        self.assertEqual(raised.exception.count, 3)
+        self.assertIn("test_querycheck.py", raised.exception.location)
+        self.assertIn("in _per_row", raised.exception.location)
+
+        with DuplicateQueryGuard(limit=3, allowlist=[]):
+            self._per_row()
+
+    def test_allowlist_and_allow_block(self):
+        with DuplicateQueryGuard(limit=2, allowlist=[r"in _per_row "]):
+            self._per_row()
+        with DuplicateQueryGuard(limit=2, allowlist=[]):
+            with allow_duplicate_queries():
+                self._per_row()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, DUPLICATE_QUERY_LIMIT=2)
+class PagesWithoutNPlusOneTests(TestCase):
+    """Pages that used to query once per row, with enough rows to trip."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.viewer = User.objects.create_user(username="viewer", password="pw")
+        for a in range(3):
+            album = Album.objects.create(owner=self.owner, name=f"a{a}", is_public=True)
+            for t in range(3):
+                track = Track.objects.create(owner=self.owner, name=f"a{a}t{t}")
+                AlbumTrack.objects.create(album=album, track=track)
+                TrackRating.objects.create(user=self.owner, track=track, stars=4)
+            SavedAlbum.objects.create(
+                owner=self.viewer, original_album=album, name_snapshot=album.name
+            )
+
+    def test_public_profile(self):
+        response = self.client.get(reverse("profile:public_profile", args=["owner"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-user-rating="4"')
+
+    def test_album_list_saved_albums(self):
+        self.client.force_login(self.viewer)
+        response = self.client.get(reverse("album:album_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "a2t2")
+
+    def test_basket(self):
+        session = self.client.session
+        session["basket"] = {
+            str(Plan.objects.create(name=f"p{i}", price=5).pk): 1 for i in range(3)
+        }
+        session.save()
+        response = self.client.get(reverse("view_basket"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["basket_total"], 15)
+
+    def test_basket_with_unknown_plan_is_404(self):
+        session = self.client.session
+        session["basket"] = {"999": 1}
+        session.save()
+        self.assertEqual(self.client.get(reverse("view_basket")).status_code, 404)
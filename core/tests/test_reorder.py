@@ -0,0 +1,133 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from album.models import Album, AlbumTrack
+from tracks.models import Favorite, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ORDERING_REBALANCE_IN_BACKGROUND=False)
+class MoveDeltaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.client.force_login(self.user)
+        self.album = self.user.albums.get(is_default=True)
+        self.ids = [
+            AlbumTrack.objects.create(
+                album=self.album,
+                track=Track.objects.create(owner=self.user, name=f"t{i}"),
+            ).id
+            for i in range(4)
+        ]
+        self.url = reverse("album:album_move_tracks", args=[self.album.pk])
+
+    def post(self, payload):
+        return self.client.post(
+            self.url, json.dumps(payload), content_type="application/json"
+        )
+
+    def order(self):
+        return list(
+            AlbumTrack.objects.filter(album=self.album).values_list("id", flat=True)
+        )
+
+    def test_single_move_bumps_version(self):
+        a, b, c, d = self.ids
+        res = self.post({"version": 0, "moved_id": d, "before_id": b, "after_id": a})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["version"], 1)
+        self.assertEqual(self.order(), [a, d, b, c])
+
+    def test_batched_moves(self):
+        a, b, c, d = self.ids
+        res = self.post(
+            {
+                "version": 0,
+                "ops": [
+                    {"moved_id": a, "before_id": None, "after_id": d},
+                    {"moved_id": c, "before_id": b, "after_id": None},
+                ],
+            }
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.order(), [c, b, d, a])
+
+    def test_stale_version_conflicts(self):
+        a, b, c, d = self.ids
+        self.post({"version": 0, "moved_id": d, "before_id": a})
+        res = self.post({"version": 0, "moved_id": c, "before_id": a})
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.json()["version"], 1)
+        self.assertEqual(self.order(), [d, a, b, c])
+
+    def test_unknown_row_conflicts(self):
+        res = self.post({"version": 0, "moved_id": 999999, "before_id": self.ids[0]})
+        self.assertEqual(res.status_code, 409)
+
+    def test_list_exposes_move_url_and_version(self):
+        self.post({"version": 0, "moved_id": self.ids[3], "before_id": self.ids[0]})
+        res = self.client.get(reverse("album:album_detail", args=[self.album.pk]))
+        self.assertContains(res, f'data-move-url="{self.url}"')
+        self.assertContains(res, 'data-list-version="1"')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ORDERING_REBALANCE_IN_BACKGROUND=False)
+class TiedKeyMoveTests(TestCase):
+    """Rows saved before keys were handed out all share position/order 0."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.client.force_login(self.user)
+
+    def post(self, url, payload):
+        return self.client.post(
+            url, json.dumps(payload), content_type="application/json"
+        )
+
+    def test_favourite_between_tied_neighbours(self):
+        favs = [
+            Favorite.objects.create(
+                owner=self.user, track=Track.objects.create(owner=self.user, name=n)
+            )
+            for n in "abcd"
+        ]
+        Favorite.objects.filter(owner=self.user).update(position=0)
+        for i, fav in enumerate(favs):  # newest first: d, c, b, a
+            Favorite.objects.filter(pk=fav.pk).update(
+                created_at=timezone.now() + timedelta(seconds=i)
+            )
+        a, b, c, d = (f.track_id for f in favs)
+
+        url = reverse("favorites_move")
+        res = self.post(
+            url, {"version": 0, "moved_id": a, "before_id": c, "after_id": d}
+        )
+        self.assertEqual(res.status_code, 200)
+        res = self.post(url, {"version": 1, "moved_id": b, "after_id": d})
+        self.assertEqual(res.status_code, 200)
+        order = Favorite.objects.filter(owner=self.user).values_list(
+            "track_id", flat=True
+        )
+        self.assertEqual(list(order), [d, b, a, c])
+
+    def test_album_between_tied_neighbours(self):
+        for name in "xyz":
+            Album.objects.create(owner=self.user, name=name)
+        Album.objects.filter(owner=self.user).update(order=0)
+        ids = list(Album.objects.filter(owner=self.user).values_list("id", flat=True))
+        first, *_, last = ids
+
+        res = self.post(
+            reverse("album:ajax_move_albums"),
+            {"version": 0, "moved_id": last, "before_id": ids[1], "after_id": first},
+        )
+        self.assertEqual(res.status_code, 200)
+        order = Album.objects.filter(owner=self.user).values_list("id", flat=True)
+        self.assertEqual(list(order), [first, last, *ids[1:-1]])
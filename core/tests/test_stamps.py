@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from core.stamps import changed_at, stamp_key, touch
+from follow_system.models import Follow
+from profile_page.models import UserProfile
+from tracks.models import Listen, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner = User.objects.create_user(username="owner", password="pw")
+            self.fan = User.objects.create_user(username="fan", password="pw")
+            self.album = Album.objects.create(
+                owner=self.owner, name="Mix", is_public=True
+            )
+            self.track = Track.objects.create(owner=self.owner, name="Song")
+            AlbumTrack.objects.create(album=self.album, track=self.track)
+            for user in (self.owner, self.fan):
+                UserProfile.objects.get_or_create(user=user)
+
+    def revalidate(self, url):
+        """(status of a repeat GET with the first ETag, that ETag)."""
+        self.client.get(url)  # the first visit hands out the CSRF cookie
+        etag = self.client.get(url)["ETag"]
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, etag
+
+    def test_unchanged_pages_are_not_modified(self):
+        self.client.force_login(self.fan)
+        for url in (
+            reverse("track_list"),
+            reverse("album:album_list"),
+            reverse("album:public_album_detail", args=[self.album.slug]),
+            reverse("profile:public_profile", args=["owner"]),
+            reverse("playlist:json"),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(url)[0], 304)
+
+    def test_viewer_change_invalidates_their_pages(self):
+        self.client.force_login(self.fan)
+        url = reverse("track_list")
+        _, etag = self.revalidate(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("toggle_favorite", args=[self.track.pk]))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_track_rename_reaches_public_album(self):
+        url = reverse("album:public_album_detail", args=[self.album.slug])
+        _, etag = self.revalidate(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track.name = "Song (remaster)"
+            self.track.save(update_fields=["name"])
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+
+    def test_track_rename_reaches_recent_plays(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Listen.objects.create(user=self.fan, track=self.track)
+        before = changed_at(stamp_key("library", self.fan.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track.name = "Song (remaster)"
+            self.track.save(update_fields=["name"])
+        self.assertGreater(changed_at(stamp_key("library", self.fan.pk)), before)
+
+    def test_follow_changes_profile_but_plays_do_not(self):
+        url = reverse("profile:public_profile", args=["owner"])
+        _, etag = self.revalidate(url)
+        before = changed_at(stamp_key("tracks", self.owner.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track.play_count += 1
+            self.track.save(update_fields=["play_count", "last_played_at"])
+        self.assertEqual(changed_at(stamp_key("tracks", self.owner.pk)), before)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.fan, following=self.owner)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TouchCoalescingTests(TestCase):
+    def test_one_write_per_key_per_transaction(self):
+        with mock.patch("core.stamps._write") as write:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(3):
+                    touch("a")
+                    touch("b")
+        self.assertEqual(sorted(c.args[0] for c in write.call_args_list), ["a", "b"])
+
+    def test_rolled_back_touch_is_forgotten(self):
+        with mock.patch("core.stamps._write") as write:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        touch("a")
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                touch("a")
+        write.assert_called_once_with("a")
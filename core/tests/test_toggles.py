@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from album.models import Album
+from core import toggles
+from follow_system.models import Follow
+from playlist.models import PlaylistItem
+from profile_page.models import UserProfile
+from save_system.models import SavedAlbum
+from tracks.models import Favorite, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ToggleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.other = User.objects.create_user(username="o", password="pw")
+        self.track = Track.objects.create(owner=self.other, name="t")
+        self.client.force_login(self.user)
+
+    def test_toggle_deletes_then_inserts_in_two_statements(self):
+        lookup = {"owner": self.user, "track": self.track}
+        with CaptureQueriesContext(connection) as ctx:
+            on = toggles.toggle(Favorite, lookup, defaults={"position": 5})
+        writes = [q for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual((on.active, on.changed), (True, True))
+        self.assertEqual(Favorite.objects.get().pk, on.pk)
+        self.assertEqual(Favorite.objects.get().position, 5)
+
+        off = toggles.toggle(Favorite, lookup)
+        self.assertEqual((off.active, off.changed), (False, True))
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_double_add_is_not_an_error(self):
+        lookup = {"follower": self.user, "following": self.other}
+        first = toggles.add(Follow, lookup)
+        again = toggles.add(Follow, lookup)
+        self.assertTrue(first.changed)
+        self.assertFalse(again.changed)
+        self.assertEqual(again.pk, first.pk)
+        # post_save ran once, so the counter was bumped once
+        self.assertEqual(UserProfile.objects.get(user=self.other).followers_count, 1)
+
+    def test_endpoints(self):
+        res = self.client.post(reverse("toggle_favorite", args=[self.track.pk]))
+        self.assertTrue(res.json()["favorited"])
+
+        res = self.client.post(reverse("playlist:toggle", args=[self.track.pk])).json()
+        self.assertEqual((res["in_playlist"], res["count"]), (True, 1))
+        self.assertEqual(PlaylistItem.objects.get().pk, res["item_id"])
+        res = self.client.post(reverse("playlist:toggle", args=[self.track.pk])).json()
+        self.assertEqual((res["in_playlist"], res["count"]), (False, 0))
+
+        res = self.client.post(reverse("follow:toggle", args=["o"])).json()
+        self.assertEqual((res["is_following"], res["followers"]), (True, 1))
+        res = self.client.post(reverse("follow:toggle", args=["o"])).json()
+        self.assertEqual((res["is_following"], res["followers"]), (False, 0))
+
+        album = Album.objects.create(owner=self.other, name="A", is_public=True)
+        url = reverse("save_system:toggle_save_album", args=[album.pk])
+        self.assertTrue(self.client.post(url).json()["saved"])
+        saved = SavedAlbum.objects.with_updates().get()
+        self.assertFalse(saved.is_updated)
+        self.assertFalse(self.client.post(url).json()["saved"])
+        self.assertFalse(SavedAlbum.objects.exists())
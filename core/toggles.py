@@ -0,0 +1,162 @@
+# core/toggles.py
+"""
+Race-free on/off membership rows (favourites, playlist items, follows,
+saved albums).
+
+A toggle is one ``DELETE ... RETURNING``: if it removed a row the toggle
+turned the thing off, otherwise an ``INSERT ... ON CONFLICT DO NOTHING``
+turns it on. Both run in one short transaction, so a double click never
+raises IntegrityError and costs two statements instead of a read, a write
+and a re-read. Databases without RETURNING (SQLite < 3.35) select the
+primary keys first in the same transaction.
+
+The SQL bypasses ``Model.save``/``delete``, so callers pass any values
+``save()`` would have filled in (sort keys) as ``defaults``. ``post_save``
+and ``post_delete`` are still sent, so counters and cache invalidation
+hooked to them keep working. Only use this for leaf rows: nothing may
+cascade from the deleted row.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from django.db import connections, router, transaction
+from django.db.models import Model, QuerySet
+from django.db.models.constants import OnConflict
+from django.db.models.fields import AutoFieldMixin
+from django.db.models.signals import post_delete, post_save
+
+Count = Union[QuerySet, Callable[[], int], None]
+
+
+@dataclass(frozen=True)
+class Toggle:
+    active: bool  # the row exists after the call
+    changed: bool  # this call inserted or deleted it
+    pk: Optional[int] = None  # the row's ID while active
+    count: Optional[int] = None  # ``count`` evaluated in the same transaction
+
+
+def _count(count: Count) -> Optional[int]:
+    if count is None:
+        return None
+    return count.count() if isinstance(count, QuerySet) else count()
+
+
+def _delete(model, lookup: dict, using: str, signals: bool) -> list[int]:
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table, pk = qn(model._meta.db_table), qn(model._meta.pk.column)
+    subquery, params = (
+        model._default_manager.using(using)
+        .filter(**lookup)
+        .values("pk")
+        .query.sql_with_params()
+    )
+    with connection.cursor() as cursor:
+        if connection.features.can_return_columns_from_insert:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {pk} IN ({subquery}) RETURNING {pk}",
+                params,
+            )
+            pks = [row[0] for row in cursor.fetchall()]
+        else:
+            cursor.execute(subquery, params)
+            pks = [row[0] for row in cursor.fetchall()]
+            if pks:
+                marks = ", ".join(["%s"] * len(pks))
+                cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({marks})", pks)
+    if signals:
+        for removed in pks:
+            obj = model(pk=removed, **lookup)
+            post_delete.send(model, instance=obj, using=using, origin=obj)
+    return pks
+
+
+def _insert(model, lookup: dict, defaults: dict, using: str, signals: bool):
+    """(pk, created) for the row matching ``lookup``, inserting it if absent."""
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    obj = model(**lookup, **defaults)
+    fields = [
+        f for f in model._meta.concrete_fields if not isinstance(f, AutoFieldMixin)
+    ]
+    values = [f.get_db_prep_save(f.pre_save(obj, True), connection) for f in fields]
+    sql = "{} {} ({}) VALUES ({}) {}".format(
+        connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        qn(model._meta.db_table),
+        ", ".join(qn(f.column) for f in fields),
+        ", ".join(["%s"] * len(fields)),
+        connection.ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None),
+    ).rstrip()
+    returning = connection.features.can_return_columns_from_insert
+    if returning:
+        sql += f" RETURNING {qn(model._meta.pk.column)}"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+        row = cursor.fetchone() if returning else None
+        created = row is not None if returning else cursor.rowcount == 1
+
+    if row is not None:
+        pk = row[0]
+    else:
+        pk = (
+            model._default_manager.using(using)
+            .filter(**lookup)
+            .values_list("pk", flat=True)
+            .first()
+        )
+    if created and signals:
+        obj.pk = pk
+        obj._state.adding = False
+        obj._state.db = using
+        post_save.send(
+            model,
+            instance=obj,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=using,
+        )
+    return pk, created
+
+
+def toggle(
+    model: type[Model],
+    lookup: dict,
+    *,
+    defaults: Optional[dict] = None,
+    count: Count = None,
+    signals: bool = True,
+) -> Toggle:
+    """Delete the row matching ``lookup`` if there is one, else insert it."""
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        if _delete(model, lookup, using, signals):
+            return Toggle(active=False, changed=True, count=_count(count))
+        pk, created = _insert(model, lookup, defaults or {}, using, signals)
+        return Toggle(active=True, changed=created, pk=pk, count=_count(count))
+
+
+def add(
+    model: type[Model],
+    lookup: dict,
+    *,
+    defaults: Optional[dict] = None,
+    count: Count = None,
+    signals: bool = True,
+) -> Toggle:
+    """Insert the row matching ``lookup`` unless it already exists."""
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        pk, created = _insert(model, lookup, defaults or {}, using, signals)
+        return Toggle(active=True, changed=created, pk=pk, count=_count(count))
+
+
+def remove(
+    model: type[Model], lookup: dict, *, count: Count = None, signals: bool = True
+) -> Toggle:
+    """Delete the row matching ``lookup`` if it exists."""
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        removed = _delete(model, lookup, using, signals)
+        return Toggle(active=False, changed=bool(removed), count=_count(count))
@@ -0,0 +1,57 @@
+# core/views.py
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import profiling
+
+REPORT_LIMIT = 50
+
+
+def _summary(records) -> dict:
+    """Per-view totals over the buffered records."""
+    views = {}
+    for r in records:
+        v = views.setdefault(
+            r["view"] or r["path"],
+            {
+                "requests": 0,
+                "ms": 0.0,
+                "max_ms": 0.0,
+                "queries": 0,
+                "max_queries": 0,
+                "with_duplicates": 0,
+            },
+        )
+        v["requests"] += 1
+        v["ms"] += r["ms"]
+        v["max_ms"] = max(v["max_ms"], r["ms"])
+        v["queries"] += r["queries"]
+        v["max_queries"] = max(v["max_queries"], r["queries"])
+        v["with_duplicates"] += bool(r["duplicates"])
+    for v in views.values():
+        v["avg_ms"] = round(v.pop("ms") / v["requests"], 2)
+        v["avg_queries"] = round(v.pop("queries") / v["requests"], 1)
+    return dict(sorted(views.items(), key=lambda kv: -kv[1]["avg_ms"]))
+
+
+@staff_member_required
+@require_GET
+def profiles(request):
+    """
+    Request profiles buffered by this process (core.profiling): per-view
+    totals, slowest first, and the newest records (``?view=`` filters).
+    """
+    records = list(profiling.BUFFER)
+    view = request.GET.get("view")
+    if view:
+        records = [r for r in records if r["view"] == view]
+    return JsonResponse(
+        {
+            "enabled": settings.PROFILING_ENABLED,
+            "sample_rate": settings.PROFILING_SAMPLE_RATE,
+            "views": _summary(records),
+            "recent": records[::-1][:REPORT_LIMIT],
+        }
+    )
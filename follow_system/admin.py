@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Follow
+from .models import Activity, Follow, FollowSuggestion
 
 
 @admin.register(Follow)
@@ -8,3 +8,18 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ("follower", "following", "created_at")
     search_fields = ("follower__username", "following__username")
     list_filter = ("created_at",)
+
+
+@admin.register(Activity)
+class ActivityAdmin(admin.ModelAdmin):
+    list_display = ("actor", "verb", "album", "track", "fanned_out", "created_at")
+    list_filter = ("verb", "fanned_out")
+    search_fields = ("actor__username",)
+    raw_id_fields = ("album", "track")
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ("user", "suggested", "score", "mutual_count", "reason")
+    list_filter = ("reason",)
+    search_fields = ("user__username", "suggested__username")
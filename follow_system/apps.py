@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FollowSystemConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "follow_system"
+
+    def ready(self):
+        import follow_system.signals  # noqa: F401  activity feed fan-out
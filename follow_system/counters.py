@@ -0,0 +1,104 @@
+# follow_system/counters.py
+"""
+Follower/following counts, denormalised onto UserProfile.
+
+Follow signals bump the counters with F() expressions, so concurrent
+follows never lose an update and reading a count is a single row fetch.
+``repair_follow_counts`` recomputes them from the Follow table.
+"""
+from typing import Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from profile_page.models import UserProfile
+
+from .models import Follow
+
+
+def _counted(user_id: int) -> dict:
+    return {
+        "followers_count": Follow.objects.filter(following_id=user_id).count(),
+        "following_count": Follow.objects.filter(follower_id=user_id).count(),
+    }
+
+
+def _ensure_profile(user_id: int) -> None:
+    """Create a missing profile with counts taken from the Follow table."""
+    try:
+        with transaction.atomic():
+            UserProfile.objects.create(user_id=user_id, **_counted(user_id))
+    except IntegrityError:
+        pass  # created concurrently; its counts already include this change
+
+
+def bump(user_id: int, field: str, delta: int) -> None:
+    updated = UserProfile.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+    # No profile yet (they are not created for every user). Only create one
+    # on increments: decrements also run while a user is being deleted.
+    if not updated and delta > 0:
+        _ensure_profile(user_id)
+
+
+def follow_added(follow: Follow) -> None:
+    bump(follow.following_id, "followers_count", 1)
+    bump(follow.follower_id, "following_count", 1)
+
+
+def follow_removed(follow: Follow) -> None:
+    bump(follow.following_id, "followers_count", -1)
+    bump(follow.follower_id, "following_count", -1)
+
+
+def counts_for(user) -> dict:
+    """{"followers": n, "following": n} for ``user`` (one query)."""
+    row = (
+        UserProfile.objects.filter(user=user)
+        .values_list("followers_count", "following_count")
+        .first()
+    )
+    if row is None:
+        _ensure_profile(user.pk)
+        counted = _counted(user.pk)
+        row = (counted["followers_count"], counted["following_count"])
+    return {"followers": row[0], "following": row[1]}
+
+
+def repair(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute counters from Follow in one UPDATE per field. Returns the
+    number of profiles whose counts were wrong.
+    """
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=list(user_ids))
+
+    def counted(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef("user_id")})
+                .order_by()
+                .values(field)
+                .annotate(n=Count("id"))
+                .values("n")[:1]
+            ),
+            Value(0),
+        )
+
+    followers, following = counted("following_id"), counted("follower_id")
+    wrong = (
+        profiles.annotate(real_followers=followers, real_following=following)
+        .exclude(
+            followers_count=F("real_followers"), following_count=F("real_following")
+        )
+        .values_list("pk", flat=True)
+    )
+    pks = list(wrong)
+    if pks:
+        UserProfile.objects.filter(pk__in=pks).update(
+            followers_count=followers, following_count=following
+        )
+    return len(pks)
@@ -0,0 +1,122 @@
+# follow_system/feed.py
+"""
+Activity feed for the follow graph.
+
+Publishing writes one Activity and, after commit, one TimelineEntry per
+follower (fan-out on write), so reading a feed is a single indexed range
+scan. Actors with more than FEED_FANOUT_MAX_FOLLOWERS followers are not
+fanned out: their activities are merged in when a follower reads (fan-out
+on read), which keeps the cost of one publish bounded however large the
+Follow table grows. The check reads the denormalised follower counter
+(follow_system.counters) rather than counting Follow rows. Feeds are
+keyset-paginated on the activity ID.
+"""
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .counters import counts_for
+from .models import Activity, Follow, TimelineEntry
+
+FANOUT_BATCH = 1000
+BACKFILL = 20  # recent activities copied in when you follow someone
+PAGE_SIZE = 30
+
+
+def fanout_limit() -> int:
+    return getattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 1000)
+
+
+def follower_count(user) -> int:
+    return counts_for(user)["followers"]
+
+
+def publish(actor, verb: str, *, album=None, track=None, stars=None) -> Activity:
+    """Record an activity and queue its fan-out for after the commit."""
+    activity = Activity.objects.create(
+        actor=actor,
+        verb=verb,
+        album=album,
+        track=track,
+        stars=stars,
+        fanned_out=follower_count(actor) <= fanout_limit(),
+    )
+    if activity.fanned_out:
+        transaction.on_commit(lambda: fan_out(activity.pk, actor.pk))
+    return activity
+
+
+def fan_out(activity_id: int, actor_id: int) -> int:
+    """Write the activity into every follower's timeline, in batches."""
+    followers = (
+        Follow.objects.filter(following_id=actor_id)
+        .order_by("id")
+        .values_list("id", "follower_id")
+    )
+    written = 0
+    last = 0
+    while True:
+        batch = list(followers.filter(id__gt=last)[:FANOUT_BATCH])
+        if not batch:
+            return written
+        last = batch[-1][0]
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner_id=f, activity_id=activity_id) for _, f in batch],
+            ignore_conflicts=True,
+        )
+        written += len(batch)
+
+
+def backfill(follower_id: int, followee_id: int) -> None:
+    """Copy a newly followed user's recent activities into the timeline."""
+    recent = (
+        Activity.objects.filter(actor_id=followee_id, fanned_out=True)
+        .order_by("-id")
+        .values_list("id", flat=True)[:BACKFILL]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=follower_id, activity_id=a) for a in recent],
+        ignore_conflicts=True,
+    )
+
+
+def drop(follower_id: int, followee_id: int) -> None:
+    """Remove an unfollowed user's activities from the timeline."""
+    TimelineEntry.objects.filter(
+        owner_id=follower_id, activity__actor_id=followee_id
+    ).delete()
+
+
+def timeline(
+    user, before: Optional[int] = None, limit: int = PAGE_SIZE
+) -> tuple[list[Activity], Optional[int]]:
+    """
+    One page of ``user``'s feed, newest first, starting below activity ID
+    ``before``. Returns (activities, cursor for the next page or None).
+    """
+    pushed = TimelineEntry.objects.filter(owner=user)
+    pulled = Activity.objects.filter(
+        fanned_out=False,
+        actor__in=Follow.objects.filter(follower=user).values("following"),
+    )
+    if before is not None:
+        pushed = pushed.filter(activity_id__lt=before)
+        pulled = pulled.filter(id__lt=before)
+
+    ids = set(
+        pushed.order_by("-activity_id").values_list("activity_id", flat=True)[:limit]
+    )
+    ids.update(pulled.order_by("-id").values_list("id", flat=True)[:limit])
+    page = sorted(ids, reverse=True)[:limit]
+
+    activities = list(
+        Activity.objects.filter(id__in=page)
+        # Albums made private since stay out of the feed
+        .filter(Q(album__isnull=True) | Q(album__is_public=True))
+        .select_related("actor", "album", "track")
+        .order_by("-id")
+    )
+    cursor = page[-1] if len(page) == limit else None
+    return activities, cursor
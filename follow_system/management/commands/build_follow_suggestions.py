@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from follow_system.suggestions import ACTIVE_DAYS, build_follow_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild FollowSuggestion rows (friends of friends, followers not "
+        "followed back, owners of saved/rated albums). Run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=ACTIVE_DAYS,
+            help="Only users who logged in within this many days.",
+        )
+        parser.add_argument("--user", type=int, help="Only rebuild this user id.")
+
+    def handle(self, *args, **options):
+        users = [options["user"]] if options["user"] else None
+        done = build_follow_suggestions(users, days=options["days"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Suggestions rebuilt for {done} user(s).")
+        )
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from follow_system.counters import repair
+from profile_page.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute UserProfile.followers_count/following_count from the "
+        "Follow table, creating missing profiles first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only repair this user id.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(userprofile__isnull=True)
+        if options["user"]:
+            users = users.filter(pk=options["user"])
+        missing = [UserProfile(user_id=pk) for pk in users.values_list("pk", flat=True)]
+        UserProfile.objects.bulk_create(missing, ignore_conflicts=True)
+
+        fixed = repair([options["user"]] if options["user"] else None)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(missing)} profile(s); fixed counts on {fixed}."
+            )
+        )
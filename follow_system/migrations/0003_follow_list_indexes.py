@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("follow_system", "0002_activity_feed"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="follow",
+            name="follow_syst_followe_17e731_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="follow",
+            name="follow_syst_followi_b7f43b_idx",
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["follower", "-id"], name="follow_syst_followe_27f928_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["following", "-id"], name="follow_syst_followi_c90f39_idx"
+            ),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 
 class Follow(models.Model):
@@ -28,14 +28,25 @@ class Follow(models.Model):
             )
         ]
         indexes = [
-            models.Index(fields=["follower"]),
-            models.Index(fields=["following"]),
+            # Also serve keyset-paginated follower/following lists
+            models.Index(fields=["follower", "-id"]),
+            models.Index(fields=["following", "-id"]),
         ]
         ordering = ["-created_at"]
 
     def __str__(self):
         return f"{self.follower} → {self.following}"
 
+    def save(self, *args, **kwargs):
+        # Profile counters are bumped in post_save (see follow_system.counters);
+        # keep them in the same transaction as the row itself
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     @staticmethod
     def is_following(user, other):
         if not user or not other:
@@ -43,3 +54,110 @@ class Follow(models.Model):
         if user.pk == other.pk:
             return False
         return Follow.objects.filter(follower=user, following=other).exists()
+
+
+class Activity(models.Model):
+    """
+    Something a user did that their followers see in the feed.
+    Written once per event; followers get TimelineEntry rows pointing here
+    unless the actor has too many followers (see follow_system.feed).
+    """
+
+    ALBUM_PUBLISHED = "album_published"
+    TRACK_ADDED = "track_added"
+    ALBUM_RATED = "album_rated"
+    TRACK_RATED = "track_rated"
+    VERBS = [
+        (ALBUM_PUBLISHED, "published an album"),
+        (TRACK_ADDED, "added a track to"),
+        (ALBUM_RATED, "rated an album"),
+        (TRACK_RATED, "rated a track"),
+    ]
+
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="activities"
+    )
+    verb = models.CharField(max_length=20, choices=VERBS)
+    album = models.ForeignKey(
+        "album.Album", on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    track = models.ForeignKey(
+        "tracks.Track",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    stars = models.PositiveSmallIntegerField(null=True, blank=True)
+    # False for actors above FEED_FANOUT_MAX_FOLLOWERS: read-time merge only
+    fanned_out = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["actor", "-id"]),
+            models.Index(
+                fields=["actor", "-id"],
+                condition=models.Q(fanned_out=False),
+                name="activity_pull_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.actor} {self.get_verb_display()} #{self.pk}"
+
+
+class TimelineEntry(models.Model):
+    """One activity in one follower's precomputed timeline."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="timeline"
+    )
+    activity = models.ForeignKey(
+        Activity, on_delete=models.CASCADE, related_name="entries"
+    )
+
+    class Meta:
+        unique_together = (("owner", "activity"),)
+        indexes = [models.Index(fields=["owner", "-activity"])]
+
+    def __str__(self):
+        return f"{self.owner} ⇐ {self.activity_id}"
+
+
+class FollowSuggestion(models.Model):
+    """
+    A precomputed "people you may know" entry, rebuilt nightly by
+    ``build_follow_suggestions`` (see follow_system.suggestions).
+    """
+
+    MUTUAL = "mutual"
+    FOLLOWS_YOU = "follows_you"
+    TASTE = "taste"
+    REASONS = [
+        (MUTUAL, "Followed by people you follow"),
+        (FOLLOWS_YOU, "Follows you"),
+        (TASTE, "Makes music you save and rate"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+    )
+    suggested = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+    reason = models.CharField(max_length=12, choices=REASONS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (("user", "suggested"),)
+        indexes = [models.Index(fields=["user", "-score"])]
+        ordering = ["-score"]
+
+    def __str__(self):
+        return f"{self.user} ? {self.suggested} ({self.score:.2f})"
@@ -0,0 +1,101 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from album.models import Album, AlbumTrack
+from core import stamps
+from profile_page.models import UserProfile
+from ratings.models import AlbumRating, TrackRating
+
+from . import counters, feed
+from .models import Activity, Follow
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.follow_added(instance)
+        feed.backfill(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.follow_removed(instance)
+    feed.drop(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Album)
+def album_published(sender, instance, created, update_fields=None, **kwargs):
+    if not instance.is_public:
+        return
+    if not created and update_fields is not None and "is_public" not in update_fields:
+        return
+    # Going private and public again does not announce the album twice
+    if Activity.objects.filter(album=instance, verb=Activity.ALBUM_PUBLISHED).exists():
+        return
+    feed.publish(instance.owner, Activity.ALBUM_PUBLISHED, album=instance)
+
+
+@receiver(post_save, sender=AlbumTrack)
+def track_added(sender, instance, created, **kwargs):
+    if not created:
+        return
+    album = instance.album
+    if album.is_public:
+        feed.publish(
+            album.owner, Activity.TRACK_ADDED, album=album, track=instance.track
+        )
+
+
+@receiver(post_save, sender=AlbumRating)
+def album_rated(sender, instance, created, **kwargs):
+    if not instance.album.is_public:
+        return
+    if created:
+        feed.publish(
+            instance.user,
+            Activity.ALBUM_RATED,
+            album=instance.album,
+            stars=instance.stars,
+        )
+    else:
+        Activity.objects.filter(
+            actor_id=instance.user_id,
+            verb=Activity.ALBUM_RATED,
+            album_id=instance.album_id,
+        ).update(stars=instance.stars)
+
+
+@receiver(post_save, sender=TrackRating)
+def track_rated(sender, instance, created, **kwargs):
+    if created:
+        # Only tracks others can actually open (on some public album)
+        if AlbumTrack.objects.filter(
+            track_id=instance.track_id, album__is_public=True
+        ).exists():
+            feed.publish(
+                instance.user,
+                Activity.TRACK_RATED,
+                track=instance.track,
+                stars=instance.stars,
+            )
+    else:
+        Activity.objects.filter(
+            actor_id=instance.user_id,
+            verb=Activity.TRACK_RATED,
+            track_id=instance.track_id,
+        ).update(stars=instance.stars)
+
+
+# ---- Change stamps (core.stamps) ----
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    stamps.touch_user(instance.follower_id, "social")
+    stamps.touch_user(instance.following_id, "social")
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    stamps.touch_user(instance.user_id, "social")
@@ -0,0 +1,197 @@
+# follow_system/suggestions.py
+"""
+"People you may know", precomputed nightly.
+
+Candidates for a user come from three places:
+
+* friends of friends — people followed by the people they follow, scored
+  by how many of those follows overlap (the mutual count);
+* people who follow them and are not followed back;
+* owners of public albums they saved or rated (taste affinity).
+
+The whole Follow table is streamed once, in keyset-paginated chunks, into
+NumPy CSR arrays (one row per follower), so each user's two-hop walk is a
+gather plus ``np.unique`` rather than a query. The top ``TOP_N`` per
+active user are written to FollowSuggestion; pages only do an indexed
+read of that table.
+"""
+from datetime import timedelta
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from core import stamps
+from ratings.models import AlbumRating
+from save_system.models import SavedAlbum
+from tracks.similar import Csr
+
+from .models import Follow, FollowSuggestion
+
+TOP_N = 20
+CHUNK_SIZE = 20_000
+ACTIVE_DAYS = 30
+USER_BATCH = 500
+
+MUTUAL_WEIGHT = 1.0  # per followed user who also follows the candidate
+FOLLOWS_YOU_WEIGHT = 2.0
+TASTE_WEIGHT = 0.5  # per album of theirs saved or rated
+
+_REASONS = (
+    FollowSuggestion.MUTUAL,
+    FollowSuggestion.FOLLOWS_YOU,
+    FollowSuggestion.TASTE,
+)
+
+
+def _stream(qs, a: str, b: str) -> Iterator[np.ndarray]:
+    """(a, b) pairs of ``qs`` as int64 arrays of shape (n, 2), by pk chunks."""
+    qs = qs.order_by("pk").values_list("pk", a, b)
+    last = None
+    while True:
+        page = qs.filter(pk__gt=last) if last is not None else qs
+        chunk = list(page[:CHUNK_SIZE])
+        if not chunk:
+            return
+        last = chunk[-1][0]
+        yield np.array([r[1:] for r in chunk], dtype=np.int64)
+
+
+def _pairs(sources) -> np.ndarray:
+    arrays = [arr for qs, a, b in sources for arr in _stream(qs, a, b)]
+    if not arrays:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.concatenate(arrays)
+
+
+class Graph:
+    """Follow edges both ways plus user -> album-owner affinity, as CSR."""
+
+    def __init__(self, follows: np.ndarray, taste: np.ndarray):
+        n = int(max(follows.max(initial=0), taste.max(initial=0))) + 1
+        ones = np.ones(len(follows))
+        self.n = n
+        self.out = Csr.build(follows[:, 0], follows[:, 1], ones, n)
+        self.inc = Csr.build(follows[:, 1], follows[:, 0], ones, n)
+        self.taste = Csr.build(taste[:, 0], taste[:, 1], np.ones(len(taste)), n)
+
+    @classmethod
+    def load(cls) -> "Graph":
+        follows = _pairs([(Follow.objects.all(), "follower_id", "following_id")])
+        taste = _pairs(
+            [
+                (
+                    SavedAlbum.objects.filter(original_album__is_public=True),
+                    "owner_id",
+                    "original_album__owner_id",
+                ),
+                (
+                    AlbumRating.objects.filter(album__is_public=True),
+                    "user_id",
+                    "album__owner_id",
+                ),
+            ]
+        )
+        return cls(follows, taste)
+
+    def _row(self, csr: Csr, user_id: int) -> np.ndarray:
+        if user_id >= self.n:
+            return np.zeros(0, dtype=np.int64)
+        return csr.row(user_id)[0]
+
+    def suggest(self, user_id: int, limit: int = TOP_N):
+        """[(suggested_id, score, mutual_count, reason)], best first."""
+        followed = self._row(self.out, user_id)
+        two_hop = self.out.gather(followed)[0] if len(followed) else followed
+        sources = (
+            two_hop,
+            self._row(self.inc, user_id),
+            self._row(self.taste, user_id),
+        )
+        ids = np.concatenate(sources)
+        if not len(ids):
+            return []
+        cands, inverse = np.unique(ids, return_inverse=True)
+        # One column per source: how much each contributed to a candidate
+        parts = np.zeros((len(cands), len(sources)))
+        start = 0
+        for col, (src, weight) in enumerate(
+            zip(sources, (MUTUAL_WEIGHT, FOLLOWS_YOU_WEIGHT, TASTE_WEIGHT))
+        ):
+            end = start + len(src)
+            np.add.at(parts[:, col], inverse[start:end], weight)
+            start = end
+
+        keep = (cands != user_id) & ~np.isin(cands, followed)
+        cands, parts = cands[keep], parts[keep]
+        scores = parts.sum(axis=1)
+        top = np.lexsort((cands, -scores))[:limit]
+        return [
+            (
+                int(cands[i]),
+                float(scores[i]),
+                int(round(parts[i, 0] / MUTUAL_WEIGHT)),
+                _REASONS[int(parts[i].argmax())],
+            )
+            for i in top
+        ]
+
+
+def active_user_ids(days: int = ACTIVE_DAYS) -> list[int]:
+    since = timezone.now() - timedelta(days=days)
+    return list(
+        get_user_model()
+        .objects.filter(is_active=True, last_login__gte=since)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def build_follow_suggestions(
+    user_ids: Optional[Iterable[int]] = None, *, days: int = ACTIVE_DAYS
+) -> int:
+    """
+    Recompute suggestions for ``user_ids`` (default: users who logged in
+    within ``days``). Returns the number of users written.
+    """
+    graph = Graph.load()
+    user_ids = list(user_ids) if user_ids is not None else active_user_ids(days)
+    for i in range(0, len(user_ids), USER_BATCH):
+        batch = user_ids[i : i + USER_BATCH]
+        rows = [
+            FollowSuggestion(
+                user_id=uid,
+                suggested_id=sid,
+                score=score,
+                mutual_count=mutual,
+                reason=reason,
+            )
+            for uid in batch
+            for sid, score, mutual, reason in graph.suggest(uid)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+            for uid in batch:
+                stamps.touch_user(uid, "social")
+    return len(user_ids)
+
+
+def suggestions_for(user, limit: int = 5, exclude: Iterable[int] = ()):
+    """
+    The user's stored suggestions, best first, minus anyone they followed
+    since the last build.
+    """
+    if not user.is_authenticated:
+        return []
+    return list(
+        FollowSuggestion.objects.filter(user=user)
+        .exclude(
+            suggested__in=Follow.objects.filter(follower=user).values("following")
+        )
+        .exclude(suggested_id__in=list(exclude))
+        .select_related("suggested")
+        .order_by("-score", "suggested_id")[:limit]
+    )
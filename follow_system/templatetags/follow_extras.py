@@ -0,0 +1,30 @@
+"""Template helpers for follow buttons in user lists."""
+
+from django import template
+
+from follow_system.utils import follow_states
+from follow_system.utils import is_following as _is_following
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def prime_follow_state(context, users) -> str:
+    """Resolve the viewer's follow state for a whole list in one query.
+
+    Use before a loop that calls ``is_following`` per user::
+
+        {% prime_follow_state users %}
+        {% for u in users %}{% is_following u as followed %}...{% endfor %}
+    """
+    request = context.get("request")
+    if request is not None:
+        follow_states(request, users)
+    return ""
+
+
+@register.simple_tag(takes_context=True)
+def is_following(context, user) -> bool:
+    """Whether the viewer follows ``user`` (cached per request)."""
+    request = context.get("request")
+    return _is_following(request, user) if request is not None else False
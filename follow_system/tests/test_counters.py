@@ -0,0 +1,56 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from follow_system import views
+from follow_system.models import Follow
+from profile_page.models import UserProfile
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.star = User.objects.create_user(username="star", password="pw")
+        self.fan = User.objects.create_user(username="fan", password="pw")
+        self.client.force_login(self.fan)
+
+    def profile(self, user):
+        return UserProfile.objects.get(user=user)
+
+    def test_toggle_keeps_counters_in_step(self):
+        res = self.client.post(reverse("follow:toggle", args=["star"])).json()
+        self.assertEqual(res["followers"], 1)
+        self.assertEqual(self.profile(self.star).followers_count, 1)
+        self.assertEqual(self.profile(self.fan).following_count, 1)
+
+        res = self.client.post(reverse("follow:toggle", args=["star"])).json()
+        self.assertEqual(res["followers"], 0)
+        self.assertEqual(self.profile(self.star).followers_count, 0)
+
+    def test_repair_command_fixes_drift(self):
+        Follow.objects.create(follower=self.fan, following=self.star)
+        UserProfile.objects.filter(user=self.star).update(followers_count=42)
+        call_command("repair_follow_counts", stdout=StringIO())
+        self.assertEqual(self.profile(self.star).followers_count, 1)
+
+    def test_followers_list_is_keyset_paginated(self):
+        for i in range(5):
+            u = User.objects.create_user(username=f"u{i}", password="pw")
+            Follow.objects.create(follower=u, following=self.star)
+        old, views.LIST_PAGE_SIZE = views.LIST_PAGE_SIZE, 3
+        try:
+            url = reverse("follow:followers", args=["star"])
+            res = self.client.get(url)
+            first = [u.username for u in res.context["followers"]]
+            res = self.client.get(url, {"before": res.context["next_before"]})
+            rest = [u.username for u in res.context["followers"]]
+        finally:
+            views.LIST_PAGE_SIZE = old
+        self.assertEqual(first, ["u4", "u3", "u2"])
+        self.assertEqual(rest, ["u1", "u0"])
+        self.assertIsNone(res.context["next_before"])
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from follow_system.feed import timeline
+from follow_system.models import Activity, Follow, TimelineEntry
+from profile_page.models import UserProfile
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_MAX_FOLLOWERS=2)
+class ActivityFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artist = User.objects.create_user(username="artist", password="pw")
+        self.fan = User.objects.create_user(username="fan", password="pw")
+        Follow.objects.create(follower=self.fan, following=self.artist)
+
+    def publish_album(self, owner, name="A"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Album.objects.create(owner=owner, name=name, is_public=True)
+
+    def test_publish_fans_out_to_followers(self):
+        album = self.publish_album(self.artist)
+        track = Track.objects.create(owner=self.artist, name="t")
+        with self.captureOnCommitCallbacks(execute=True):
+            AlbumTrack.objects.create(album=album, track=track)
+
+        activities, cursor = timeline(self.fan)
+        self.assertEqual(
+            [a.verb for a in activities],
+            [Activity.TRACK_ADDED, Activity.ALBUM_PUBLISHED],
+        )
+        self.assertIsNone(cursor)
+        self.assertEqual(TimelineEntry.objects.filter(owner=self.fan).count(), 2)
+
+    def test_popular_actors_are_merged_at_read_time(self):
+        for i in range(2):
+            other = User.objects.create_user(username=f"f{i}", password="pw")
+            Follow.objects.create(follower=other, following=self.artist)
+        self.publish_album(self.artist)
+
+        self.assertFalse(Activity.objects.get().fanned_out)
+        self.assertFalse(TimelineEntry.objects.exists())
+        activities, _ = timeline(self.fan)
+        self.assertEqual(len(activities), 1)
+
+    def test_publish_reads_the_follower_counter(self):
+        UserProfile.objects.filter(user=self.artist).update(followers_count=3)
+        self.publish_album(self.artist)
+        self.assertFalse(Activity.objects.get().fanned_out)
+
+    def test_keyset_pages_and_unfollow(self):
+        for i in range(5):
+            self.publish_album(self.artist, name=f"A{i}")
+        first, cursor = timeline(self.fan, limit=3)
+        rest, end = timeline(self.fan, before=cursor, limit=3)
+        self.assertEqual(len(first) + len(rest), 5)
+        self.assertIsNone(end)
+        self.assertGreater(first[-1].id, rest[0].id)
+
+        Follow.objects.filter(follower=self.fan).delete()
+        self.assertEqual(timeline(self.fan)[0], [])
+
+    def test_following_backfills_and_page_renders(self):
+        self.publish_album(self.artist)
+        late = User.objects.create_user(username="late", password="pw")
+        Follow.objects.create(follower=late, following=self.artist)
+        self.client.force_login(late)
+        res = self.client.get(reverse("follow:feed"))
+        self.assertContains(res, "published")
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album
+from follow_system.models import Follow
+from follow_system.utils import follow_states, is_following
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username="viewer", password="pw")
+        self.others = [
+            User.objects.create_user(username=f"band{i}", password="pw")
+            for i in range(4)
+        ]
+        Follow.objects.create(follower=self.viewer, following=self.others[1])
+        Follow.objects.create(follower=self.viewer, following=self.others[3])
+
+    def test_one_query_per_batch_then_cached(self):
+        request = RequestFactory().get("/")
+        request.user = self.viewer
+        with self.assertNumQueries(1):
+            states = follow_states(request, self.others)
+        self.assertEqual(
+            [states[u.pk] for u in self.others], [False, True, False, True]
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(is_following(request, self.others[1]))
+
+    def test_search_renders_follow_buttons(self):
+        for u in self.others:
+            Album.objects.create(owner=u, name="A", is_public=True)
+        self.client.force_login(self.viewer)
+        res = self.client.get(reverse("search"), {"q": "band", "t": "users"})
+        self.assertContains(res, "Unfollow", count=2)
+        self.assertContains(res, "data-follow-toggle", count=4)
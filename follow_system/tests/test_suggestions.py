@@ -0,0 +1,82 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from album.models import Album
+from follow_system import suggestions
+from follow_system.models import Follow, FollowSuggestion
+from ratings.models import AlbumRating
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.me, self.a, self.b, self.x, self.y, self.fan, self.artist = [
+            User.objects.create_user(username=n, password="pw")
+            for n in ("me", "a", "b", "x", "y", "fan", "artist")
+        ]
+        User.objects.filter(pk=self.me.pk).update(last_login=timezone.now())
+        for mine in (self.a, self.b):
+            Follow.objects.create(follower=self.me, following=mine)
+        # x is followed by both people I follow, y by one
+        Follow.objects.create(follower=self.a, following=self.x)
+        Follow.objects.create(follower=self.b, following=self.x)
+        Follow.objects.create(follower=self.b, following=self.y)
+        Follow.objects.create(follower=self.a, following=self.b)
+        Follow.objects.create(follower=self.fan, following=self.me)
+        album = Album.objects.create(owner=self.artist, name="A", is_public=True)
+        AlbumRating.objects.create(user=self.me, album=album, stars=5)
+
+    def stored(self, user):
+        return list(
+            FollowSuggestion.objects.filter(user=user)
+            .order_by("-score", "suggested_id")
+            .values_list("suggested__username", "mutual_count", "reason")
+        )
+
+    def test_command_ranks_by_overlap_and_skips_followed(self):
+        call_command("build_follow_suggestions", stdout=StringIO())
+        self.assertEqual(
+            self.stored(self.me),
+            [
+                ("x", 2, FollowSuggestion.MUTUAL),
+                ("fan", 0, FollowSuggestion.FOLLOWS_YOU),
+                ("y", 1, FollowSuggestion.MUTUAL),
+                ("artist", 0, FollowSuggestion.TASTE),
+            ],
+        )
+        # Only active users get rows
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.a).exists())
+
+    def test_inactive_users_are_skipped_and_rebuild_replaces_rows(self):
+        User.objects.filter(pk=self.me.pk).update(
+            last_login=timezone.now() - timedelta(days=60)
+        )
+        self.assertEqual(suggestions.build_follow_suggestions(), 0)
+
+        suggestions.build_follow_suggestions([self.me.pk])
+        Follow.objects.create(follower=self.me, following=self.x)
+        suggestions.build_follow_suggestions([self.me.pk])
+        self.assertNotIn("x", [s[0] for s in self.stored(self.me)])
+
+    def test_pages_read_stored_suggestions(self):
+        suggestions.build_follow_suggestions([self.me.pk])
+        # Followed after the build: hidden without waiting for the next run
+        Follow.objects.create(follower=self.me, following=self.y)
+        self.client.force_login(self.me)
+
+        res = self.client.get(reverse("profile:profile"))
+        names = [s.suggested.username for s in res.context["suggestions"]]
+        self.assertEqual(names, ["x", "fan", "artist"])
+
+        res = self.client.get(reverse("profile:public_profile", args=["x"]))
+        names = [s.suggested.username for s in res.context["suggestions"]]
+        self.assertEqual(names, ["fan", "artist"])
+        self.assertContains(res, "People you may know")
@@ -5,6 +5,7 @@ from . import views
 app_name = "follow"
 
 urlpatterns = [
+    path("feed/", views.activity_feed, name="feed"),
     path("u/<str:username>/toggle/", views.toggle_follow, name="toggle"),
     path("u/<str:username>/follow/", views.follow_user, name="follow"),
     path("u/<str:username>/unfollow/", views.unfollow_user, name="unfollow"),
@@ -0,0 +1,52 @@
+# follow_system/utils.py
+"""
+Batch follow-state lookups.
+
+Lists of users (search results, follower lists, profiles) ask "does the
+viewer follow this user?" once per row. ``follow_states`` answers that for
+a whole list in one query and remembers the answers on the request, so
+later lookups for the same users (e.g. from the ``is_following`` tag) are
+free.
+"""
+from typing import Iterable
+
+from .models import Follow
+
+_CACHE_ATTR = "_follow_states"
+
+
+def _user_id(u) -> int:
+    return u if isinstance(u, int) else u.pk
+
+
+def follow_states(request, users: Iterable) -> dict[int, bool]:
+    """
+    {user_id: viewer follows them} for ``users`` (User objects or IDs),
+    using at most one query per call and none for IDs seen before.
+    """
+    ids = {_user_id(u) for u in users if u is not None}
+    viewer = getattr(request, "user", None)
+    if not ids:
+        return {}
+    if viewer is None or not viewer.is_authenticated:
+        return dict.fromkeys(ids, False)
+
+    cache = getattr(request, _CACHE_ATTR, None)
+    if cache is None:
+        cache = {}
+        setattr(request, _CACHE_ATTR, cache)
+
+    missing = ids - cache.keys()
+    if missing:
+        followed = set(
+            Follow.objects.filter(
+                follower=viewer, following_id__in=missing
+            ).values_list("following_id", flat=True)
+        )
+        for uid in missing:
+            cache[uid] = uid in followed
+    return {uid: cache[uid] for uid in ids}
+
+
+def is_following(request, user) -> bool:
+    return follow_states(request, [user]).get(_user_id(user), False)
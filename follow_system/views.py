@@ -4,16 +4,43 @@ from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_POST
 
+from core import toggles
+
+from .counters import counts_for
+from .feed import timeline
 from .models import Follow
+from .utils import follow_states
 
 User = get_user_model()
 
 
+LIST_PAGE_SIZE = 50
+
+
 def _counts_for(user):
-    return {
-        "followers": Follow.objects.filter(following=user).count(),
-        "following": Follow.objects.filter(follower=user).count(),
-    }
+    return counts_for(user)
+
+
+def _follow_page(request, rows, attr):
+    """
+    One keyset page (newest first) of Follow ``rows``; returns the users on
+    the other end and the cursor for the next page (or None).
+    """
+    try:
+        rows = rows.filter(id__lt=int(request.GET["before"]))
+    except (KeyError, ValueError):
+        pass
+    page = list(
+        rows.select_related(f"{attr}__userprofile")
+        .order_by("-id")
+        .only("id", f"{attr}__username", f"{attr}__userprofile__profile_image")[
+            : LIST_PAGE_SIZE + 1
+        ]
+    )
+    cursor = page[LIST_PAGE_SIZE - 1].id if len(page) > LIST_PAGE_SIZE else None
+    users = [getattr(f, attr) for f in page[:LIST_PAGE_SIZE]]
+    follow_states(request, users)  # one query for every follow button
+    return users, cursor
 
 
 @login_required
@@ -25,15 +52,9 @@ def toggle_follow(request, username):
             {"ok": False, "error": "You cannot follow yourself."}, status=400
         )
 
-    rel, created = Follow.objects.get_or_create(follower=request.user, following=target)
-    if not created:
-        # already following -> unfollow
-        rel.delete()
-        state = "unfollowed"
-        is_following = False
-    else:
-        state = "followed"
-        is_following = True
+    res = toggles.toggle(Follow, {"follower": request.user, "following": target})
+    is_following = res.active
+    state = "followed" if is_following else "unfollowed"
 
     counts = _counts_for(target)
     return JsonResponse(
@@ -49,10 +70,10 @@ def follow_user(request, username):
         return JsonResponse(
             {"ok": False, "error": "You cannot follow yourself."}, status=400
         )
-    _, created = Follow.objects.get_or_create(follower=request.user, following=target)
+    res = toggles.add(Follow, {"follower": request.user, "following": target})
     counts = _counts_for(target)
     return JsonResponse(
-        {"ok": True, "created": created, "is_following": True, **counts}
+        {"ok": True, "created": res.changed, "is_following": True, **counts}
     )
 
 
@@ -64,27 +85,46 @@ def unfollow_user(request, username):
         return JsonResponse(
             {"ok": False, "error": "You cannot unfollow yourself."}, status=400
         )
-    Follow.objects.filter(follower=request.user, following=target).delete()
+    toggles.remove(Follow, {"follower": request.user, "following": target})
     counts = _counts_for(target)
     return JsonResponse({"ok": True, "is_following": False, **counts})
 
 
-# (Optional) public lists
+# (Optional) public lists, keyset-paginated (?before=<follow id>)
 def followers_list(request, username):
     target = get_object_or_404(User, username=username)
-    qs = User.objects.filter(following_relations__following=target).order_by("username")
+    users, cursor = _follow_page(
+        request, Follow.objects.filter(following=target), "follower"
+    )
     return render(
         request,
         "follow_system/followers_list.html",
-        {"view_user": target, "followers": qs},
+        {"view_user": target, "followers": users, "next_before": cursor},
     )
 
 
 def following_list(request, username):
     target = get_object_or_404(User, username=username)
-    qs = User.objects.filter(follower_relations__follower=target).order_by("username")
+    users, cursor = _follow_page(
+        request, Follow.objects.filter(follower=target), "following"
+    )
     return render(
         request,
         "follow_system/following_list.html",
-        {"view_user": target, "following": qs},
+        {"view_user": target, "following": users, "next_before": cursor},
+    )
+
+
+@login_required
+def activity_feed(request):
+    """What the people you follow have published, newest first."""
+    try:
+        before = int(request.GET["before"])
+    except (KeyError, ValueError):
+        before = None
+    activities, cursor = timeline(request.user, before=before)
+    return render(
+        request,
+        "follow_system/feed.html",
+        {"activities": activities, "next_before": cursor},
     )
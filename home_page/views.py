@@ -1,17 +1,19 @@
 # //--------------------------- home_page/views.py ---------------------------//
 from django.contrib.auth import get_user_model
-from django.db.models import (Avg, BooleanField, Count, Exists,
-                              ExpressionWrapper, F, FloatField, OuterRef,
-                              Prefetch, Q, Value)
+from django.db.models import (Count, Exists, ExpressionWrapper, F, FloatField,
+                              OuterRef, Q)
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 
 from album.models import Album, AlbumTrack
-from playlist.models import Playlist, PlaylistItem
+from album.services import attach_track_cards
+from core.pagecache import cache_anonymous_page
+from core.stamps import stamp_key
+from follow_system.utils import follow_states
 from ratings.utils import annotate_albums, annotate_tracks
-from tracks.models import Favorite, Track
-from tracks.utils import annotate_is_in_my_albums
+from tracks.cards import track_cards
+from tracks.models import Track
 
 SEARCH_LIMIT = 50
 
@@ -20,6 +22,9 @@ def _is_ajax(request) -> bool:
     return request.headers.get("x-requested-with") == "XMLHttpRequest"
 
 
+@cache_anonymous_page(
+    lambda request: [stamp_key("public_albums"), stamp_key("track_ratings")]
+)
 def index(request):
     """
     Homepage: hero + latest public albums + top 10 albums & tracks by weighted score.
@@ -32,7 +37,7 @@ def index(request):
         .order_by("-created_at")[:10]
     )
     # NOTE: If you ever render track lists inside `_album_card.html` for this grid too,
-    # you can hydrate `public_albums` exactly like `albums_top` (same Prefetch block).
+    # pass `public_albums` through attach_track_cards like `albums_top`.
 
     # ---------------- Top 10 Albums (weighted: avg * count) ---------------- #
     albums_top_qs = (
@@ -47,59 +52,8 @@ def index(request):
         .order_by("-rating_score", "-rating_count", "-rating_avg", "-created_at")[:10]
     )
 
-    # Prefetch album_tracks with the per-track flags needed by _track_card.html
-    # - at.is_favorited (Exists subquery against tracks.Favorite)
-    # - at.track_avg / at.track_count (per-track rating aggregates)
-    if request.user.is_authenticated:
-        fav_subq = Favorite.objects.filter(
-            owner=request.user, track=OuterRef("track_id")
-        )
-        items_qs = (
-            AlbumTrack.objects.select_related("track", "track__owner")
-            .annotate(
-                is_favorited=Exists(fav_subq),
-                track_avg=Avg("track__ratings__stars"),
-                track_count=Count("track__ratings", distinct=True),
-            )
-            .order_by("position", "id")
-        )
-    else:
-        items_qs = (
-            AlbumTrack.objects.select_related("track", "track__owner")
-            .annotate(
-                is_favorited=Value(False, output_field=BooleanField()),
-                track_avg=Avg("track__ratings__stars"),
-                track_count=Count("track__ratings", distinct=True),
-            )
-            .order_by("position", "id")
-        )
-
-    albums_top_qs = albums_top_qs.prefetch_related(
-        Prefetch("album_tracks", queryset=items_qs)
-    )
-
-    # Evaluate so we can attach per-user flags like playlist and "in my albums"
-    albums_top = list(albums_top_qs)
-
-    # Build playlist membership set once (✓/➕ state)
-    in_playlist_ids = set()
-    if request.user.is_authenticated:
-        pl = Playlist.objects.filter(owner=request.user, name="My Playlist").first()
-        if pl:
-            in_playlist_ids = set(
-                PlaylistItem.objects.filter(playlist=pl).values_list(
-                    "track_id", flat=True
-                )
-            )
-
-    # Attach:
-    #  - at.track.in_playlist   (for ✓/➕ button)
-    #  - at.track.is_in_my_albums (🗃 vs 💾) via your helper
-    for alb in albums_top:
-        ats = list(alb.album_tracks.all())
-        annotate_is_in_my_albums(ats, request.user, attr="track")
-        for at in ats:
-            at.track.in_playlist = at.track.id in in_playlist_ids
+    # Each album card lists its tracks (album.track_cards)
+    albums_top = attach_track_cards(albums_top_qs, request.user)
 
     # ---------------- Top 10 Tracks (must belong to a public album) ---------------- #
     in_public_album = AlbumTrack.objects.filter(
@@ -118,32 +72,14 @@ def index(request):
         .order_by("-rating_score", "-rating_count", "-rating_avg", "-created_at")[:10]
     )
 
-    # Evaluate so we can attach per-user flags
-    tracks_top = list(tracks_top_qs)
-
-    # ------- Favourites flag for current user
-    # (sets .is_favorited on each track) -------
-    if request.user.is_authenticated and tracks_top:
-        fav_ids = set(
-            Favorite.objects.filter(
-                owner=request.user, track_id__in=[t.id for t in tracks_top]
-            ).values_list("track_id", flat=True)
-        )
-        for t in tracks_top:
-            t.is_favorited = t.id in fav_ids
-    else:
-        for t in tracks_top:
-            t.is_favorited = False
-
-    # ------- 💾/🗃️ flag (is_in_my_albums) via your existing helper -------
-    annotate_is_in_my_albums(tracks_top, request.user)
+    tracks_top = track_cards(request.user, tracks_top_qs.values_list("id", flat=True))
 
     return render(
         request,
         "home_page/index.html",
         {
             "public_albums": public_albums,
-            "albums_top": albums_top,  # hydrated albums with track-level flags
+            "albums_top": albums_top,
             "tracks_top": tracks_top,
         },
     )
@@ -183,13 +119,14 @@ def search(request):
             total += len(albums)
 
         if scope in ("all", "tracks"):
-            tracks_qs = annotate_tracks(
+            track_ids = (
                 Track.objects.filter(track_albums__album__is_public=True)
-                .select_related("owner")
                 .filter(Q(name__icontains=q) | Q(source_url__icontains=q))
                 .distinct()
-            ).order_by("-created_at")[:SEARCH_LIMIT]
-            tracks = list(tracks_qs)
+                .order_by("-created_at")
+                .values_list("id", flat=True)[:SEARCH_LIMIT]
+            )
+            tracks = track_cards(request.user, track_ids)
             total += len(tracks)
 
         if scope in ("all", "users"):
@@ -209,6 +146,7 @@ def search(request):
                 .order_by("-public_album_count", "username")[:SEARCH_LIMIT]
             )
             users = list(users_qs)
+            follow_states(request, users)  # batch lookup for the follow buttons
             total += len(users)
 
     context = {
@@ -221,22 +159,15 @@ def search(request):
     }
 
     if _is_ajax(request):
+        # The partials only read request.user: hand them the request instead
+        # of rendering with it, which would rerun every context processor
+        # once per partial
+        partial_context = {**context, "request": request}
         html = {
-            "albums": render_to_string(
-                "home_page/partials/_search_albums.html", context, request=request
-            ),
-            "tracks": render_to_string(
-                "home_page/partials/_search_tracks.html", context, request=request
-            ),
-            "users": render_to_string(
-                "home_page/partials/_search_users.html", context, request=request
-            ),
-            "summary": render_to_string(
-                "home_page/partials/_search_summary.html", context, request=request
-            ),
-            "empty": render_to_string(
-                "home_page/partials/_search_empty.html", context, request=request
-            ),
+            name: render_to_string(
+                f"home_page/partials/_search_{name}.html", partial_context
+            )
+            for name in ("albums", "tracks", "users", "summary", "empty")
         }
         return JsonResponse({"q": q, "scope": scope, "total": total, "html": html})
 
@@ -68,6 +68,7 @@ INSTALLED_APPS = [
     "cloudinary_storage",
     "cloudinary",
     # Local apps
+    "core",
     "tracks",
     "album.apps.AlbumConfig",
     "plans",
@@ -125,6 +126,9 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.profiling.ProfilingMiddleware",  # inert unless PROFILING_ENABLED
+    "core.querycheck.DuplicateQueryMiddleware",  # inert unless DUPLICATE_QUERY_LIMIT
+    "core.guest.GuestStateMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -134,7 +138,8 @@ ROOT_URLCONF = "music_project.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates that core.profiling can time
+        "BACKEND": "core.profiling.ProfiledTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -151,6 +156,8 @@ TEMPLATES = [
             ],
             "libraries": {
                 "rating_extras": "ratings.templatetags.rating_extras",
+                "ordering_tags": "core.templatetags.ordering_tags",
+                "follow_extras": "follow_system.templatetags.follow_extras",
             },
         },
     },
@@ -158,6 +165,39 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "music_project.wsgi.application"
 
+# --------------------------------------------------------------------------------------
+# Cache
+# --------------------------------------------------------------------------------------
+# Per-process memory cache locally; set CACHE_URL (e.g. redis://...) in production
+# so every gunicorn worker sees the same entries and invalidations.
+CACHES = {"default": env.cache_url("CACHE_URL", default="locmemcache://")}
+
+# Ordering keys (core.ordering): rebalance crowded lists off the request thread
+ORDERING_REBALANCE_IN_BACKGROUND = True
+
+# Activity feed (follow_system.feed): users with more followers than this are
+# merged into feeds at read time instead of being copied into each timeline
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+
+# Conditional GETs (core.stamps): change per release so clients drop pages
+# rendered by the previous templates
+ETAG_SALT = env("ETAG_SALT", default="")
+
+# Request profiling (core.profiling): off by default; when on, profile this
+# fraction of requests (staff can force one with an "X-Profile: 1" header)
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=False)
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.05)
+PROFILING_BUFFER_SIZE = 200
+
+# Duplicate-query guard (core.querycheck): fail a request whose same SQL shape
+# runs more than this many times (N+1). Off in production; the test runner
+# (core.testing.GuardedTestRunner) turns it on at DUPLICATE_QUERY_TEST_LIMIT.
+# Accepted repeats: regexes searched in "<file:line in function> <sql>".
+DUPLICATE_QUERY_LIMIT = env.int("DUPLICATE_QUERY_LIMIT", default=None)
+DUPLICATE_QUERY_TEST_LIMIT = 2
+DUPLICATE_QUERY_ALLOWLIST = []
+TEST_RUNNER = "core.testing.GuardedTestRunner"
+
 # --------------------------------------------------------------------------------------
 # Password validation
 # --------------------------------------------------------------------------------------
@@ -206,6 +246,13 @@ STORAGES = {
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Chunked uploads: chunks are spooled here until finalize, then handed to storage
+CHUNKED_UPLOAD_ROOT = env(
+    "CHUNKED_UPLOAD_ROOT", default=str(BASE_DIR / "tmp" / "chunked_uploads")
+)
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB per chunk
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24  # unfinished uploads older than this are purged
+
 # --------------------------------------------------------------------------------------
 # Stripe (keep your logic; read from env)
 # --------------------------------------------------------------------------------------
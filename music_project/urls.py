@@ -26,4 +26,6 @@ urlpatterns = [
     # Third-party
     path("accounts/", include("allauth.urls")),  # login / signup / logout
     path("cloud/", include("cloud_connect.urls", namespace="cloud")),  # Google configs
+    # Staff-only diagnostics
+    path("ops/", include(("core.urls", "core"), namespace="core")),
 ]
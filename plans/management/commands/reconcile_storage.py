@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from plans.models import StorageUsage
+from tracks.models import Track
+
+
+def _remote_size(track):
+    """Ask the storage backend for the real file size (one API call)."""
+    try:
+        return track.pk, int(track.audio_file.size or 0)
+    except Exception:
+        return track.pk, None
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Track.audio_size from storage and rebuild each user's "
+        "StorageUsage.bytes_used counter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only reconcile this user id.")
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Concurrent storage lookups per batch.",
+        )
+
+    def handle(self, *args, **options):
+        qs = Track.objects.exclude(audio_file="").exclude(audio_file__isnull=True)
+        if options["user"]:
+            qs = qs.filter(owner_id=options["user"])
+        qs = qs.only("id", "owner_id", "audio_file", "audio_size").order_by("id")
+
+        batch_size = max(1, options["batch_size"])
+        changed = failed = 0
+        last_id = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            while True:
+                batch = list(qs.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                by_id = {t.pk: t for t in batch}
+                to_update = []
+                for pk, size in pool.map(_remote_size, batch):
+                    if size is None:
+                        failed += 1
+                        continue
+                    t = by_id[pk]
+                    if t.audio_size != size:
+                        t.audio_size = size
+                        to_update.append(t)
+                if to_update:
+                    # bulk_update skips signals on purpose: the counters are
+                    # rebuilt from scratch below
+                    Track.objects.bulk_update(to_update, ["audio_size"])
+                    changed += len(to_update)
+
+        users = Track.objects.all()
+        if options["user"]:
+            users = users.filter(owner_id=options["user"])
+        totals = users.values("owner_id").annotate(total=Sum("audio_size"))
+
+        now = timezone.now()
+        with transaction.atomic():
+            seen = []
+            for row in totals:
+                StorageUsage.objects.update_or_create(
+                    user_id=row["owner_id"],
+                    defaults={"bytes_used": row["total"] or 0, "reconciled_at": now},
+                )
+                seen.append(row["owner_id"])
+            stale = StorageUsage.objects.exclude(user_id__in=seen)
+            if options["user"]:
+                stale = stale.filter(user_id=options["user"])
+            stale.update(bytes_used=0, reconciled_at=now)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled storage: {changed} track size(s) corrected, "
+                f"{failed} lookup(s) failed, {len(seen)} user(s) updated."
+            )
+        )
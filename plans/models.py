@@ -31,3 +31,16 @@ class UserSubscription(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.plan.name if self.plan else 'No Plan'}"
+
+
+class StorageUsage(models.Model):
+    """Running total of uploaded audio bytes per user (one row per user)."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="storage_usage"
+    )
+    bytes_used = models.BigIntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.bytes_used} bytes"
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
 from django.dispatch import receiver
 
+from checkout.models import Order, OrderItem
+from tracks.models import Track
+
 from .models import Plan
+from .utils import adjust_storage_used, invalidate_entitlements
 
 
 @receiver(post_migrate)
@@ -48,3 +53,72 @@ def create_default_plans(sender, **kwargs):
             description="Get 10GB cloud storage for your music data.",
             period="4-Years",
         )
+
+
+# ---------------- Storage accounting ---------------- #
+
+
+def _incoming_size(track) -> int:
+    """
+    Size of the file about to be stored, without asking the storage.
+    Callers that push a file to storage before saving the row must set
+    ``audio_size`` themselves (see tracks.views.upload_finalize).
+    """
+    f = track.audio_file
+    if not f:
+        return 0
+    if not getattr(f, "_committed", True):
+        # Fresh upload: the size is known locally
+        return int(f.size or 0)
+    return track.audio_size
+
+
+@receiver(pre_save, sender=Track)
+def track_storage_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Work out how many bytes this save adds/removes from the owner's quota."""
+    instance._storage_delta = 0
+    if raw or (update_fields is not None and "audio_file" not in update_fields):
+        return
+
+    old = 0
+    if not instance._state.adding and instance.pk:
+        old = (
+            Track.objects.filter(pk=instance.pk)
+            .values_list("audio_size", flat=True)
+            .first()
+            or 0
+        )
+    new = _incoming_size(instance)
+    instance.audio_size = new
+    instance._storage_delta = new - old
+
+
+@receiver(post_save, sender=Track)
+def track_storage_post_save(sender, instance, **kwargs):
+    delta = getattr(instance, "_storage_delta", 0)
+    if delta:
+        adjust_storage_used(instance.owner_id, delta)
+    instance._storage_delta = 0
+
+
+@receiver(post_delete, sender=Track)
+def track_storage_post_delete(sender, instance, **kwargs):
+    if instance.audio_size:
+        adjust_storage_used(instance.owner_id, -instance.audio_size)
+
+
+# ---------------- Entitlements cache ---------------- #
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_changed(sender, instance, **kwargs):
+    invalidate_entitlements(instance.user_id)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    order = Order.objects.filter(pk=instance.order_id).only("user_id").first()
+    if order:
+        invalidate_entitlements(order.user_id)
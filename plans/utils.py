@@ -1,9 +1,15 @@
 # plans/utils.py
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from django.core.cache import cache
+from django.db.models import F
 
 from checkout.models import OrderItem
 from tracks.models import Track
 
+from .models import StorageUsage
+
 
 @dataclass
 class Entitlements:
@@ -11,33 +17,80 @@ class Entitlements:
     unlimited_albums: bool = False  # we treat this as "unlimited albums"
     premium: bool = False
     storage_gb: int = 0
+    # Precomputed for plan_list: latest non-storage plan bought (hidden there)
+    last_plan_id: Optional[int] = None
 
 
 FREE_MAX_TRACKS_PER_ALBUM = 10
 FREE_MAX_ALBUMS = 3  # Default Album only
 
+ENTITLEMENTS_CACHE_TIMEOUT = 5 * 60  # safety net; signals invalidate on change
+STORAGE_PLAN_PERIOD = "4-Years"
 
-def get_entitlements(user) -> Entitlements:
+
+def _entitlements_key(user_id) -> str:
+    return f"plans:entitlements:{user_id}"
+
+
+def _compute_entitlements(user) -> Entitlements:
     ent = Entitlements()
-    if not user.is_authenticated:
-        return ent
 
-    # Read from purchased OrderItems
-    items = OrderItem.objects.filter(order__user=user).select_related("plan")
+    # Read from purchased OrderItems (latest order first)
+    items = (
+        OrderItem.objects.filter(order__user=user)
+        .select_related("plan")
+        .order_by("-order__date", "-id")
+    )
     for it in items:
         p = it.plan
         if getattr(p, "is_unlimited_tracks", False):
             ent.unlimited_tracks = True
         if getattr(p, "is_unlimited_albums", False):
             ent.unlimited_albums = True
-        if getattr(p, "is_premium", False):
+        if getattr(p, "is_premium", False) or (
+            getattr(p, "is_unlimited_tracks", False)
+            and getattr(p, "is_unlimited_albums", False)
+        ):
             ent.premium = True
         if getattr(p, "storage_gb", 0):
             ent.storage_gb += int(p.storage_gb or 0)
+        if ent.last_plan_id is None and p.period != STORAGE_PLAN_PERIOD:
+            ent.last_plan_id = p.id
+
+    return ent
+
+
+def get_entitlements(user) -> Entitlements:
+    """
+    Resolve what the user has paid for. Results are memoised on the user
+    object for the rest of the request and in the cache framework across
+    requests; plans.signals drops the cache entry when orders change.
+    """
+    if not user.is_authenticated:
+        return Entitlements()
+
+    memo = getattr(user, "_entitlements", None)
+    if memo is not None:
+        return memo
+
+    key = _entitlements_key(user.pk)
+    data = cache.get(key)
+    if data is not None:
+        ent = Entitlements(**data)
+    else:
+        ent = _compute_entitlements(user)
+        cache.set(key, asdict(ent), ENTITLEMENTS_CACHE_TIMEOUT)
 
+    user._entitlements = ent
     return ent
 
 
+def invalidate_entitlements(user_id) -> None:
+    """Forget cached entitlements after a purchase/refund for ``user_id``."""
+    if user_id:
+        cache.delete(_entitlements_key(user_id))
+
+
 def can_add_album(user):
     """Free: 3 album max; Unlimited Albums or Premium: unlimited."""
     ent = get_entitlements(user)
@@ -73,6 +126,34 @@ def user_has_storage_plan(user) -> bool:
     return get_entitlements(user).storage_gb > 0
 
 
+def get_storage_used(user) -> int:
+    """Bytes of uploaded audio the user currently holds (single-row read)."""
+    return (
+        StorageUsage.objects.filter(user_id=user.pk)
+        .values_list("bytes_used", flat=True)
+        .first()
+        or 0
+    )
+
+
+def adjust_storage_used(user_id, delta: int) -> None:
+    """Atomically add ``delta`` bytes to the user's running total."""
+    if not delta:
+        return
+    updated = StorageUsage.objects.filter(user_id=user_id).update(
+        bytes_used=F("bytes_used") + delta
+    )
+    if not updated:
+        _, created = StorageUsage.objects.get_or_create(
+            user_id=user_id, defaults={"bytes_used": max(0, delta)}
+        )
+        if not created:
+            # Lost a creation race; apply the delta to the winner's row
+            StorageUsage.objects.filter(user_id=user_id).update(
+                bytes_used=F("bytes_used") + delta
+            )
+
+
 def can_upload_file(user, file_size_bytes: int):
     """
     Allow uploads only if storage_gb > 0 and within quota (sum of audio_file sizes).
@@ -81,14 +162,7 @@ def can_upload_file(user, file_size_bytes: int):
     if ent.storage_gb <= 0:
         return False, "No storage plan. Buy storage to upload audio files."
 
-    # Compute used bytes across uploaded files
-    used = 0
-    for t in Track.objects.filter(owner=user).exclude(audio_file=""):
-        try:
-            if t.audio_file and hasattr(t.audio_file, "size"):
-                used += t.audio_file.size
-        except Exception:
-            pass
+    used = get_storage_used(user)
     quota = ent.storage_gb * (1024**3)
     if used + int(file_size_bytes or 0) > quota:
         gb_used = used / (1024**3)
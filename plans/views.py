@@ -2,44 +2,35 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
-from checkout.models import OrderItem
-
 from .models import Plan, UserSubscription
+from .utils import get_entitlements
 
 
 def plan_list(request):
     plans = Plan.objects.all()
 
     if request.user.is_authenticated:
-        # Find the most recent purchased OrderItem (non 4-Years)
-        last_purchase = (
-            OrderItem.objects.filter(order__user=request.user)
-            .exclude(plan__period="4-Years")
-            .order_by("-order__date")  # latest order first
-            .first()
-        )
+        ent = get_entitlements(request.user)  # cached; no OrderItem queries
 
-        if last_purchase:
+        if ent.last_plan_id:
             # Hide only the last purchased non-storage plan
-            plans = plans.exclude(id=last_purchase.plan.id)
+            plans = plans.exclude(id=ent.last_plan_id)
 
         # If Premium is bought OR in basket → hide unlimited tracks/Albums
-        basket = request.session.get("basket", {})
-        premium_bought = OrderItem.objects.filter(
-            order__user=request.user,
-            plan__is_unlimited_tracks=True,
-            plan__is_unlimited_albums=True,
-        ).exists()
-        premium_in_basket = any(
+        basket_ids = [
+            int(pid)
+            for pid in request.session.get("basket", {}).keys()
+            if str(pid).isdigit()
+        ]
+        premium_in_basket = bool(basket_ids) and (
             Plan.objects.filter(
-                id=int(pid),
+                id__in=basket_ids,
                 is_unlimited_tracks=True,
                 is_unlimited_albums=True,
             ).exists()
-            for pid in basket.keys()
         )
 
-        if premium_bought or premium_in_basket:
+        if ent.premium or premium_in_basket:
             plans = plans.exclude(is_unlimited_tracks=True, is_unlimited_albums=False)
             plans = plans.exclude(is_unlimited_albums=True, is_unlimited_tracks=False)
 
@@ -1,12 +1,12 @@
 from django.contrib import admin
 
-from .models import Playlist, PlaylistItem
+from .models import PlaybackQueue, Playlist, PlaylistItem
 
 
 @admin.register(Playlist)
 class PlaylistAdmin(admin.ModelAdmin):
-    list_display = ("id", "owner", "name", "created_at")
-    list_filter = ("owner",)
+    list_display = ("id", "owner", "name", "is_active", "created_at")
+    list_filter = ("owner", "is_active")
     search_fields = ("name", "owner__username")
 
 
@@ -15,3 +15,9 @@ class PlaylistItemAdmin(admin.ModelAdmin):
     list_display = ("id", "playlist", "track", "position", "added_at")
     list_filter = ("playlist",)
     search_fields = ("track__name",)
+
+
+@admin.register(PlaybackQueue)
+class PlaybackQueueAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "playlist", "cursor", "shuffle", "updated_at")
+    search_fields = ("user__username",)
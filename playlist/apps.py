@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PlaylistConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "playlist"
+
+    def ready(self):
+        import playlist.signals  # noqa: F401  keeps membership caches fresh
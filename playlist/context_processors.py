@@ -1,22 +1,14 @@
 # playlist/context_processors.py
-from playlist.models import Playlist, PlaylistItem
+from playlist.utils import active_playlist_track_ids
 
 
 def playlist_membership(request):
     """
     Make the current user's playlist membership available on every page.
     Returns {'in_playlist_ids': [<track_id>, ...]} or an empty list.
+    Served from the per-playlist cache, so this costs no query when warm.
     """
-    ids = []
     user = getattr(request, "user", None)
     if not user or not user.is_authenticated:
-        return {"in_playlist_ids": ids}
-
-    pl = Playlist.objects.filter(owner=user, name="My Playlist").first()
-    if not pl:
-        return {"in_playlist_ids": ids}
-
-    ids = list(
-        PlaylistItem.objects.filter(playlist=pl).values_list("track_id", flat=True)
-    )
-    return {"in_playlist_ids": ids}
+        return {"in_playlist_ids": []}
+    return {"in_playlist_ids": sorted(active_playlist_track_ids(user))}
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def activate_default_playlists(apps, schema_editor):
+    """Every user's existing "My Playlist" (else their oldest) becomes active."""
+    Playlist = apps.get_model("playlist", "Playlist")
+    chosen = {}
+    for pk, owner_id, name in Playlist.objects.order_by("created_at", "id").values_list(
+        "id", "owner_id", "name"
+    ):
+        if name == "My Playlist" or owner_id not in chosen:
+            chosen[owner_id] = pk
+    Playlist.objects.filter(pk__in=chosen.values()).update(is_active=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("playlist", "0002_sparse_order_keys"),
+        ("tracks", "0004_sparse_order_keys"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaybackQueue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("track_ids", models.JSONField(blank=True, default=list)),
+                ("cursor", models.PositiveIntegerField(default=0)),
+                ("shuffle", models.BooleanField(default=False)),
+                ("position", models.FloatField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name="playlist",
+            options={"ordering": ["created_at", "id"]},
+        ),
+        migrations.AddField(
+            model_name="playlist",
+            name="is_active",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="playlistitem",
+            index=models.Index(
+                fields=["playlist", "position"], name="playlist_pl_playlis_a2632c_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="playlist",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_active", True)),
+                fields=("owner",),
+                name="uniq_active_playlist_per_owner",
+            ),
+        ),
+        migrations.AddField(
+            model_name="playbackqueue",
+            name="playlist",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="playlist.playlist",
+            ),
+        ),
+        migrations.AddField(
+            model_name="playbackqueue",
+            name="user",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="playback_queue",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(activate_default_playlists, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
+from core.ordering import next_key
 from tracks.models import Track
 
 
@@ -9,11 +11,21 @@ class Playlist(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="playlists"
     )
     name = models.CharField(max_length=120, default="My Playlist")
+    # The playlist the ✓/➕ buttons and the player work on (see playlist.utils)
+    is_active = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("owner", "name")
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner"],
+                condition=Q(is_active=True),
+                name="uniq_active_playlist_per_owner",
+            )
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.owner})"
@@ -24,12 +36,43 @@ class PlaylistItem(models.Model):
         Playlist, on_delete=models.CASCADE, related_name="items"
     )
     track = models.ForeignKey(Track, on_delete=models.CASCADE)
-    position = models.PositiveIntegerField(default=0, db_index=True)
+    position = models.BigIntegerField(default=0, db_index=True)
     added_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("playlist", "track")
         ordering = ["position", "id"]
+        indexes = [models.Index(fields=["playlist", "position"])]
+
+    def save(self, *args, **kwargs):
+        # New items go to the end unless the caller picked a key
+        if self._state.adding and self.position == 0:
+            self.position = next_key()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.playlist} → {self.track} @ {self.position}"
+
+
+class PlaybackQueue(models.Model):
+    """
+    Server-side "now playing" state, so the player can resume where the
+    user left off on another page or device.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="playback_queue",
+    )
+    playlist = models.ForeignKey(
+        Playlist, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    track_ids = models.JSONField(default=list, blank=True)  # play order
+    cursor = models.PositiveIntegerField(default=0)  # index into track_ids
+    shuffle = models.BooleanField(default=False)
+    position = models.FloatField(default=0)  # seconds into the current track
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Queue for {self.user} ({len(self.track_ids)} tracks)"
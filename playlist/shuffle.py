@@ -0,0 +1,246 @@
+# playlist/shuffle.py
+"""
+Server-side queue generation: plain shuffle and "smart" shuffle.
+
+A seed (a playlist, an album, the user's favourites, their whole
+collection, or an explicit list of IDs) is turned into a play order of
+track IDs. Everything after the candidate queries works on flat NumPy
+arrays, so a few tens of thousands of candidates take milliseconds:
+
+* weighted order: Efraimidis-Spirakis sampling without replacement, i.e.
+  sort by ``-log(u) / w`` with ``u ~ U(0, 1)``. With equal weights this
+  is a uniform shuffle.
+* spread: tracks of the same album, then of the same artist (uploader),
+  are pushed apart in the queue instead of clumping together, while
+  each group's best-ranked track keeps its weighted place.
+
+Only IDs are returned; callers look up what they need to play them.
+"""
+from datetime import timedelta
+from typing import Optional, Sequence
+
+import numpy as np
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from album.models import Album, AlbumTrack
+from ratings.models import TrackRating
+from tracks.models import Listen, Track
+
+from .models import Playlist
+
+SEED_KINDS = ("playlist", "album", "favorites", "collection", "ids")
+MODES = ("shuffle", "smart")
+MAX_CANDIDATES = 50_000
+RECENT_DAYS = 14  # Listen history that counts against a track
+MIN_WEIGHT = 0.05  # every candidate keeps some chance of an early slot
+SPREAD_PASSES = 2
+
+
+class SeedError(Exception):
+    """The seed does not exist or the user may not shuffle it."""
+
+
+# -------------------------- Candidates --------------------------
+
+
+def candidate_queryset(user, kind: str, pk=None, track_ids: Sequence[int] = ()):
+    """Tracks a seed expands to (unordered). Raises SeedError/Http404."""
+    if kind == "playlist":
+        pl = get_object_or_404(Playlist, pk=pk, owner=user)
+        return Track.objects.filter(playlistitem__playlist=pl)
+    if kind == "album":
+        album = get_object_or_404(Album, pk=pk)
+        if not album.is_public and album.owner_id != user.id:
+            raise SeedError("This album is private.")
+        return Track.objects.filter(track_albums__album=album)
+    if kind == "favorites":
+        return Track.objects.filter(favorite_user__owner=user)
+    if kind == "collection":
+        return Track.objects.filter(owner=user)
+    if kind == "ids":
+        return Track.objects.filter(id__in=list(track_ids)[:MAX_CANDIDATES])
+    raise SeedError(f"Unknown seed {kind!r}.")
+
+
+def _index_of(ids: np.ndarray, keys: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Positions of ``keys`` in the sorted ``ids`` array, and a found-mask."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if not len(ids) or not len(keys):
+        return np.zeros(0, dtype=np.intp), np.zeros(len(keys), dtype=bool)
+    pos = np.searchsorted(ids, keys)
+    pos = np.minimum(pos, len(ids) - 1)
+    found = ids[pos] == keys
+    return pos[found], found
+
+
+def load_features(user, qs) -> dict:
+    """
+    One row per candidate as parallel arrays, sorted by track ID:
+    ids, artist, album, play_count, last_played (epoch seconds, 0 = never),
+    stars (user's own rating, 0 = unrated), recent (user's listens lately).
+    """
+    rows = list(
+        qs.order_by("id")
+        .distinct()
+        .values_list("id", "owner_id", "play_count", "last_played_at")[:MAX_CANDIDATES]
+    )
+    n = len(rows)
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    f = {
+        "ids": ids,
+        "artist": np.fromiter((r[1] for r in rows), dtype=np.int64, count=n),
+        "play_count": np.fromiter((r[2] for r in rows), dtype=np.float64, count=n),
+        "last_played": np.fromiter(
+            (r[3].timestamp() if r[3] else 0.0 for r in rows),
+            dtype=np.float64,
+            count=n,
+        ),
+        "album": np.full(n, -1, dtype=np.int64),
+        "stars": np.zeros(n, dtype=np.float64),
+        "recent": np.zeros(n, dtype=np.float64),
+    }
+    if not n:
+        return f
+
+    candidate_ids = qs.values("id")
+    # A track in several albums is grouped with the first one we see
+    album_rows = AlbumTrack.objects.filter(track_id__in=candidate_ids).values_list(
+        "track_id", "album_id"
+    )
+    if album_rows:
+        tids, aids = np.array(list(album_rows), dtype=np.int64).T
+        pos, found = _index_of(ids, tids)
+        f["album"][pos[::-1]] = aids[found][::-1]
+
+    if user.is_authenticated:
+        rated = TrackRating.objects.filter(
+            user=user, track_id__in=candidate_ids
+        ).values_list("track_id", "stars")
+        if rated:
+            tids, stars = np.array(list(rated), dtype=np.int64).T
+            pos, found = _index_of(ids, tids)
+            f["stars"][pos] = stars[found]
+
+        since = timezone.now() - timedelta(days=RECENT_DAYS)
+        listened = (
+            Listen.objects.filter(
+                user=user, played_at__gte=since, track_id__in=candidate_ids
+            )
+            .values("track_id")
+            .annotate(n=Count("id"), last=Max("played_at"))
+            .values_list("track_id", "n", "last")
+        )
+        if listened:
+            tids, counts, lasts = zip(*listened)
+            pos, found = _index_of(ids, tids)
+            f["recent"][pos] = np.asarray(counts, dtype=np.float64)[found]
+            lasts = np.array([t.timestamp() for t in lasts])[found]
+            f["last_played"][pos] = np.maximum(f["last_played"][pos], lasts)
+    return f
+
+
+# -------------------------- Ordering --------------------------
+
+
+def smart_weights(f: dict, now: Optional[float] = None) -> np.ndarray:
+    """
+    Sampling weight per candidate: favour well-rated and often-played
+    tracks, hold back what was played recently.
+    """
+    if now is None:
+        now = timezone.now().timestamp()
+    stars = np.where(f["stars"] > 0, f["stars"], 3.0)  # unrated counts as 3★
+    rating = (stars / 3.0) ** 2
+    familiarity = 1.0 + 0.25 * np.log1p(f["play_count"])
+    hours = np.where(f["last_played"] > 0, (now - f["last_played"]) / 3600.0, np.inf)
+    freshness = 1.0 - np.exp(-np.maximum(hours, 0.0) / 24.0)
+    repetition = 1.0 / (1.0 + f["recent"])
+    w = rating * familiarity * freshness * repetition
+    return np.maximum(w, MIN_WEIGHT)
+
+
+def weighted_order(weights: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Indexes in Efraimidis-Spirakis order (weighted, without replacement)."""
+    u = rng.random(len(weights))
+    keys = -np.log1p(-u) / weights  # Exp(w) arrival times: small comes first
+    return np.argsort(keys, kind="stable")
+
+
+def spread(order: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """
+    Re-space ``order`` so members of a group are spread through it,
+    keeping their relative order. A group's first member keeps its place
+    in the weighted order; each later one is pushed back to at least
+    ``n // k`` slots (k = group size) after the one before it:
+    slot = max(position, previous slot + gap), a running maximum per
+    group. Sorting by slot closes up the holes this leaves, so a second
+    pass evens out what the first bunched together. Negative group IDs
+    are not grouped.
+    """
+    n = len(order)
+    if n < 3:
+        return order
+    g = groups[order]
+    loose = g < 0
+    # Ungrouped tracks become their own singleton groups
+    g = np.where(loose, -(np.arange(n, dtype=np.int64) + 1), g)
+    _, gidx, sizes = np.unique(g, return_inverse=True, return_counts=True)
+
+    # Per member, in group-sorted order: j * gap for the j-th of its group,
+    # and a per-group base that keeps the running maximum inside the group
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    member = np.arange(n) - np.repeat(starts, sizes)
+    step = member * np.repeat(np.maximum(n // sizes, 1), sizes)
+    base = np.repeat(np.arange(len(sizes), dtype=np.int64) * (2 * n + 1), sizes)
+    for _ in range(SPREAD_PASSES):
+        by_group = np.argsort(gidx, kind="stable")
+        # slot_j = max over i <= j of (position_i + (j - i) * gap)
+        slot = np.empty(n, dtype=np.int64)
+        slot[by_group] = np.maximum.accumulate(by_group - step + base) - base + step
+        moved = np.argsort(slot, kind="stable")
+        order, gidx = order[moved], gidx[moved]
+    return order
+
+
+def generate_queue(
+    user,
+    kind: str,
+    pk=None,
+    *,
+    mode: str = "smart",
+    track_ids: Sequence[int] = (),
+    limit: Optional[int] = None,
+    first: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> list[int]:
+    """
+    Play order (track IDs) for a seed. ``mode`` is "shuffle" (uniform) or
+    "smart" (weighted by ratings, plays and listening history); both spread
+    albums and artists out. ``first`` pins one track to the front (the one
+    already playing) and ``seed`` makes the result reproducible.
+    """
+    if mode not in MODES:
+        raise SeedError(f"Unknown mode {mode!r}.")
+    qs = candidate_queryset(user, kind, pk, track_ids)
+    f = load_features(user, qs)
+    ids = f["ids"]
+    if not len(ids):
+        return []
+
+    rng = np.random.default_rng(seed)
+    if mode == "smart":
+        weights = smart_weights(f)
+    else:
+        weights = np.ones(len(ids))
+    order = weighted_order(weights, rng)
+    order = spread(order, f["album"])
+    order = spread(order, f["artist"])
+
+    out = ids[order]
+    if first is not None:
+        out = np.concatenate(([first], out[out != first])) if first in ids else out
+    if limit is not None:
+        out = out[:limit]
+    return out.tolist()
@@ -0,0 +1,48 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import stamps
+
+from .models import Playlist, PlaylistItem
+from .utils import (invalidate_active_playlist, invalidate_playlist_members,
+                    merge_guest_playlist)
+
+
+def _playlist_owner(item):
+    if PlaylistItem.playlist.is_cached(item):
+        return item.playlist.owner_id
+    return (
+        Playlist.objects.filter(pk=item.playlist_id)
+        .values_list("owner_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=PlaylistItem)
+@receiver(post_delete, sender=PlaylistItem)
+def playlist_item_changed(sender, instance, **kwargs):
+    invalidate_playlist_members(instance.playlist_id)
+    stamps.touch_user(_playlist_owner(instance), "library")
+
+
+@receiver(post_save, sender=Playlist)
+def playlist_saved(sender, instance, created, **kwargs):
+    # A first playlist (or one saved as active) changes which one is active
+    if created or instance.is_active:
+        invalidate_active_playlist(instance.owner_id)
+    stamps.touch_user(instance.owner_id, "library")
+
+
+@receiver(post_delete, sender=Playlist)
+def playlist_deleted(sender, instance, **kwargs):
+    invalidate_playlist_members(instance.pk)
+    invalidate_active_playlist(instance.owner_id)
+    stamps.touch_user(instance.owner_id, "library")
+
+
+@receiver(user_logged_in)
+def merge_guest_playlist_on_login(sender, request, user, **kwargs):
+    guest = getattr(request, "guest", None) if request is not None else None
+    if guest is not None and guest.playlist:
+        merge_guest_playlist(user, guest.playlist)
@@ -0,0 +1,100 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from playlist.models import PlaybackQueue, Playlist, PlaylistItem
+from playlist.utils import active_playlist_track_ids, get_active_playlist_id
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MultiPlaylistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.client.force_login(self.user)
+        self.tracks = [
+            Track.objects.create(
+                owner=self.user, name=f"t{i}", source_url=f"https://x.io/{i}.mp3"
+            )
+            for i in range(3)
+        ]
+
+    def post_json(self, name, payload=None, args=None):
+        return self.client.post(
+            reverse(name, args=args),
+            json.dumps(payload or {}),
+            content_type="application/json",
+        )
+
+    def test_read_pages_do_not_create_a_playlist(self):
+        self.client.get(reverse("track_list"))
+        self.client.get(reverse("playlist:json"))
+        self.assertFalse(Playlist.objects.filter(owner=self.user).exists())
+
+    def test_toggle_targets_active_playlist(self):
+        t = self.tracks[0]
+        self.client.post(reverse("playlist:toggle", args=[t.id]))
+        default = Playlist.objects.get(owner=self.user, is_active=True)
+        self.assertEqual(active_playlist_track_ids(self.user), {t.id})
+
+        res = self.post_json("playlist:playlist_create", {"name": "Gym"})
+        self.assertEqual(res.status_code, 201)
+        gym_id = res.json()["playlist"]["id"]
+        self.client.post(reverse("playlist:toggle", args=[self.tracks[1].id]))
+
+        self.assertEqual(
+            set(
+                PlaylistItem.objects.filter(playlist_id=gym_id).values_list(
+                    "track_id", flat=True
+                )
+            ),
+            {self.tracks[1].id},
+        )
+        res = self.post_json("playlist:playlist_activate", args=[default.id])
+        self.assertEqual(res.json()["in_ids"], [t.id])
+
+    def test_membership_is_served_from_cache(self):
+        self.client.post(reverse("playlist:toggle", args=[self.tracks[0].id]))
+        user = User.objects.get(pk=self.user.pk)
+        active_playlist_track_ids(user)  # warm
+        with self.assertNumQueries(0):
+            self.assertEqual(active_playlist_track_ids(user), {self.tracks[0].id})
+
+    def test_bulk_add_refreshes_membership(self):
+        self.client.post(reverse("playlist:toggle", args=[self.tracks[0].id]))
+        active_playlist_track_ids(self.user)  # warm
+        ids = [t.id for t in self.tracks]
+        self.post_json("playlist:bulk_add", {"track_ids": ids})
+        fresh = User.objects.get(pk=self.user.pk)
+        self.assertEqual(active_playlist_track_ids(fresh), set(ids))
+
+    def test_deleting_active_playlist_activates_another(self):
+        first = self.post_json("playlist:playlist_create", {"name": "A"}).json()
+        second = self.post_json("playlist:playlist_create", {"name": "B"}).json()
+        self.post_json("playlist:playlist_delete", args=[second["playlist"]["id"]])
+        fresh = User.objects.get(pk=self.user.pk)
+        self.assertEqual(get_active_playlist_id(fresh), first["playlist"]["id"])
+
+    def test_queue_round_trip(self):
+        ids = [t.id for t in self.tracks]
+        res = self.post_json(
+            "playlist:queue",
+            {"track_ids": ids, "cursor": 2, "shuffle": True, "position": 42.5},
+        )
+        self.assertEqual(res.status_code, 200)
+        self.tracks[0].delete()  # dropped from the queue on resume
+
+        data = self.client.get(reverse("playlist:queue")).json()
+        self.assertEqual([t["id"] for t in data["tracks"]], ids[1:])
+        self.assertEqual(data["cursor"], 1)  # still points at the same track
+        self.assertTrue(data["shuffle"])
+        self.assertEqual(data["position"], 42.5)
+
+        self.post_json("playlist:queue", {"cursor": 0, "position": 0})
+        queue = PlaybackQueue.objects.get(user=self.user)
+        self.assertEqual(queue.track_ids, ids)
+        self.assertEqual(queue.cursor, 0)
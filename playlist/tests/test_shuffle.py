@@ -0,0 +1,99 @@
+import json
+import time
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from playlist.shuffle import (MAX_CANDIDATES, generate_queue, spread,
+                              weighted_order)
+from ratings.models import TrackRating
+from tracks.models import Listen, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ShuffleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.client.force_login(self.user)
+        self.tracks = [
+            Track.objects.create(owner=self.user, name=f"t{i}") for i in range(12)
+        ]
+        self.ids = [t.id for t in self.tracks]
+
+    def test_shuffle_is_a_permutation(self):
+        order = generate_queue(self.user, "collection", mode="shuffle", seed=1)
+        self.assertEqual(sorted(order), sorted(self.ids))
+        self.assertNotEqual(
+            order, generate_queue(self.user, "collection", mode="shuffle", seed=2)
+        )
+
+    def test_smart_prefers_rated_and_holds_back_recent(self):
+        loved, heard = self.tracks[0], self.tracks[1]
+        TrackRating.objects.create(user=self.user, track=loved, stars=5)
+        for _ in range(3):
+            Listen.objects.create(user=self.user, track=heard)
+
+        firsts = [
+            generate_queue(self.user, "collection", seed=s).index(loved.id)
+            for s in range(30)
+        ]
+        lasts = [
+            generate_queue(self.user, "collection", seed=s).index(heard.id)
+            for s in range(30)
+        ]
+        self.assertLess(np.mean(firsts), np.mean(lasts))
+
+    def test_spread_separates_groups(self):
+        order = np.arange(10)
+        groups = np.array([1] * 5 + [2] * 5)
+        out = spread(order, groups)
+        runs = np.sum(groups[out][1:] == groups[out][:-1])
+        self.assertLessEqual(runs, 2)
+        self.assertEqual(list(out[groups[out] == 1]), [0, 1, 2, 3, 4])
+
+    def test_spread_keeps_a_dominant_track_in_front(self):
+        groups = np.repeat([1, 2, 3], 10)
+        weights = np.ones(30)
+        weights[17] = 1000.0
+        slots = [
+            list(spread(weighted_order(weights, np.random.default_rng(s)), groups))
+            .index(17)
+            for s in range(20)
+        ]
+        self.assertLessEqual(max(slots), 1)
+
+    def test_spread_is_fast_at_full_size(self):
+        rng = np.random.default_rng(0)
+        n = MAX_CANDIDATES
+        order = weighted_order(rng.random(n) + 0.1, rng)
+        albums, artists = rng.integers(0, 5000, n), rng.integers(0, 500, n)
+        started = time.perf_counter()
+        out = spread(spread(order, albums), artists)
+        self.assertLess(time.perf_counter() - started, 0.2)
+        self.assertEqual(np.sort(out).tolist(), list(range(n)))
+
+    def test_private_album_of_someone_else_is_refused(self):
+        other = User.objects.create_user(username="o", password="pw")
+        album = Album.objects.create(owner=other, name="Secret")
+        AlbumTrack.objects.create(album=album, track=self.tracks[0])
+        res = self.client.post(
+            reverse("playlist:queue_generate"),
+            json.dumps({"seed": "album", "id": album.id}),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 400)
+
+    def test_endpoint_returns_ids_with_first_pinned(self):
+        res = self.client.post(
+            reverse("playlist:queue_generate"),
+            json.dumps({"seed": "ids", "track_ids": self.ids, "first": self.ids[5]}),
+            content_type="application/json",
+        )
+        order = res.json()["track_ids"]
+        self.assertEqual(order[0], self.ids[5])
+        self.assertEqual(sorted(order), sorted(self.ids))
@@ -10,4 +10,18 @@ urlpatterns = [
     path("clear/", views.playlist_clear, name="clear"),
     path("bulk-add/", views.bulk_add_to_playlist, name="bulk_add"),
     path("reorder/", views.reorder, name="reorder"),
+    path("move/", views.move, name="move"),
+    # Multiple playlists
+    path("playlists/", views.playlist_list, name="playlist_list"),
+    path("playlists/create/", views.playlist_create, name="playlist_create"),
+    path("playlists/<int:pk>/rename/", views.playlist_rename, name="playlist_rename"),
+    path("playlists/<int:pk>/delete/", views.playlist_delete, name="playlist_delete"),
+    path(
+        "playlists/<int:pk>/activate/",
+        views.playlist_activate,
+        name="playlist_activate",
+    ),
+    # Server-side "now playing" queue
+    path("queue/", views.queue_state, name="queue"),
+    path("queue/generate/", views.queue_generate, name="queue_generate"),
 ]
@@ -0,0 +1,151 @@
+# playlist/utils.py
+"""
+Active-playlist resolution and cached membership sets.
+
+Users can own several playlists; one of them is flagged ``is_active`` and
+is what the ✓/➕ buttons, the player and the playlist tab work on. Its ID
+is cached per user (and memoised on the request's user object), and the
+set of track IDs in each playlist is cached per playlist, so read-only
+pages never look a playlist up by name or write to create one.
+"""
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core import stamps
+from core.ordering import next_keys
+from tracks.models import Track
+
+from .models import Playlist, PlaylistItem
+
+DEFAULT_PLAYLIST_NAME = "My Playlist"
+PLAYLIST_CACHE_TIMEOUT = 60 * 60  # signals invalidate on change
+_NO_PLAYLIST = 0  # cached when the user has no playlist yet
+
+
+def _active_key(user_id) -> str:
+    return f"playlist:active:{user_id}"
+
+
+def _members_key(playlist_id) -> str:
+    return f"playlist:members:{playlist_id}"
+
+
+def get_active_playlist_id(user) -> Optional[int]:
+    """ID of the user's active playlist, or None if they have none yet."""
+    if not getattr(user, "is_authenticated", False):
+        return None
+    memo = getattr(user, "_active_playlist_id", None)
+    if memo is not None:
+        return memo or None
+
+    key = _active_key(user.id)
+    pid = cache.get(key)
+    if pid is None:
+        pid = (
+            Playlist.objects.filter(owner=user)
+            .order_by("-is_active", "created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        ) or _NO_PLAYLIST
+        cache.set(key, pid, PLAYLIST_CACHE_TIMEOUT)
+    user._active_playlist_id = pid
+    return pid or None
+
+
+def get_active_playlist(user, *, create: bool = True) -> Optional[Playlist]:
+    """
+    The user's active Playlist. Write paths pass ``create=True`` (default)
+    so a first-time user gets a default playlist; read paths pass False.
+    """
+    pid = get_active_playlist_id(user)
+    if pid:
+        playlist = Playlist.objects.filter(pk=pid, owner=user).first()
+        if playlist:
+            return playlist
+        invalidate_active_playlist(user)  # stale cache: deleted elsewhere
+        pid = get_active_playlist_id(user)
+        if pid:
+            return Playlist.objects.filter(pk=pid, owner=user).first()
+    if not create:
+        return None
+
+    with transaction.atomic():
+        playlist, _ = Playlist.objects.get_or_create(
+            owner=user, name=DEFAULT_PLAYLIST_NAME
+        )
+    set_active_playlist(user, playlist)
+    return playlist
+
+
+def set_active_playlist(user, playlist: Playlist) -> None:
+    with transaction.atomic():
+        Playlist.objects.filter(owner=user, is_active=True).exclude(
+            pk=playlist.pk
+        ).update(is_active=False)
+        Playlist.objects.filter(pk=playlist.pk).update(is_active=True)
+        stamps.touch_user(user.id, "library")
+    playlist.is_active = True
+    cache.set(_active_key(user.id), playlist.pk, PLAYLIST_CACHE_TIMEOUT)
+    user._active_playlist_id = playlist.pk
+
+
+def invalidate_active_playlist(user_or_id) -> None:
+    user_id = getattr(user_or_id, "id", user_or_id)
+    cache.delete(_active_key(user_id))
+    if hasattr(user_or_id, "_active_playlist_id"):
+        del user_or_id._active_playlist_id
+
+
+def playlist_track_ids(playlist_id) -> frozenset:
+    """Track IDs in one playlist, from the cache when possible."""
+    if not playlist_id:
+        return frozenset()
+    key = _members_key(playlist_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            PlaylistItem.objects.filter(playlist_id=playlist_id).values_list(
+                "track_id", flat=True
+            )
+        )
+        cache.set(key, ids, PLAYLIST_CACHE_TIMEOUT)
+    return frozenset(ids)
+
+
+def active_playlist_track_ids(user) -> frozenset:
+    """Track IDs in the user's active playlist (empty for guests)."""
+    return playlist_track_ids(get_active_playlist_id(user))
+
+
+def invalidate_playlist_members(playlist_id) -> None:
+    """Call after bulk writes that bypass PlaylistItem signals."""
+    cache.delete(_members_key(playlist_id))
+
+
+def merge_guest_playlist(user, guest_list) -> int:
+    """
+    Append a guest's playlist (core.guest.GuestList) to the user's active
+    playlist in one bulk_create, skipping tracks already there or deleted
+    since. Clears the guest list and returns how many items were added.
+    """
+    ids = guest_list.ids()
+    if not ids:
+        return 0
+    playlist = get_active_playlist(user)
+    existing = playlist_track_ids(playlist.id)
+    valid = set(Track.objects.filter(id__in=ids).values_list("id", flat=True))
+    new_ids = [tid for tid in ids if tid in valid and tid not in existing]
+    if new_ids:
+        PlaylistItem.objects.bulk_create(
+            [
+                PlaylistItem(playlist=playlist, track_id=tid, position=key)
+                for tid, key in zip(new_ids, next_keys(len(new_ids)))
+            ],
+            ignore_conflicts=True,
+        )
+        invalidate_playlist_members(playlist.id)
+        stamps.touch_user(user.id, "library")
+    guest_list.clear()
+    return len(new_ids)
@@ -1,93 +1,85 @@
 import json
 from typing import Iterable, List
 
-from django.db import transaction
-from django.db.models import Max
+from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.http import (require_GET, require_http_methods,
+                                          require_POST)
 
+from core import stamps, toggles
+from core.ordering import OrderedList, apply_order, next_key, next_keys
+from core.reorder import bump_version, list_key, move_response
+from core.stamps import etag_from_stamps
 from tracks.models import Track
 
-from .models import Playlist, PlaylistItem
+from .models import PlaybackQueue, Playlist, PlaylistItem
+from .shuffle import SeedError, generate_queue
+from .utils import (get_active_playlist, get_active_playlist_id,
+                    invalidate_playlist_members, playlist_track_ids,
+                    set_active_playlist)
 
 # -------------------------- Helpers --------------------------
 
-SESSION_KEY = "guest_playlist_ids"
+# Guest playlists live in request.guest (core.guest): a signed cookie, or a
+# GuestState row once the list is too big for one.
 
 
-def _get_default_playlist(user) -> Playlist:
-    return Playlist.objects.get_or_create(owner=user, name="My Playlist")[0]
+def _guest_get(request) -> List[int]:
+    """Return the guest playlist as a list of track IDs, in order."""
+    return request.guest.playlist.ids()
 
 
-def _session_get_list(request) -> List[int]:
-    """
-    Get the guest playlist as a list of track IDs, preserving order.
-    """
-    lst = request.session.get(SESSION_KEY, [])
-    # normalize to ints (ignore garbage)
-    cleaned = []
-    for x in lst:
-        try:
-            cleaned.append(int(x))
-        except Exception:
-            continue
-    if cleaned != lst:
-        request.session[SESSION_KEY] = cleaned
-        request.session.modified = True
-    return cleaned
+def _guest_set(request, ids: Iterable[int]) -> None:
+    """Replace the guest playlist with the given track IDs."""
+    request.guest.playlist.clear()
+    request.guest.playlist.extend(ids)
 
 
-def _session_set_list(request, track_ids: Iterable[int]) -> None:
-    request.session[SESSION_KEY] = list(track_ids)
-    request.session.modified = True
+def _guest_toggle(request, track_id: int) -> bool:
+    """Toggle a track for a guest; returns True if now in the playlist."""
+    return request.guest.playlist.toggle(int(track_id))
 
 
-def _session_toggle_track(request, track_id: int) -> bool:
-    """
-    Toggle track in the guest playlist.
-    Returns True if now IN playlist, False if removed.
-    """
-    lst = _session_get_list(request)
-    if track_id in lst:
-        lst = [t for t in lst if t != track_id]
-        _session_set_list(request, lst)
-        return False
-    lst.append(track_id)
-    _session_set_list(request, lst)
-    return True
+def _guest_bulk_add(request, ids: Iterable[int]) -> tuple[int, int]:
+    """Add multiple tracks for a guest, skipping duplicates; (added, skipped)."""
+    ids = list(ids)
+    added = request.guest.playlist.extend(ids)
+    return added, len(ids) - added
 
 
-def _session_bulk_add(request, track_ids: Iterable[int]) -> tuple[int, int]:
+def _guest_reorder(request, order_ids: Iterable[int]) -> None:
     """
-    Add multiple tracks to the session playlist; skip duplicates.
-    Returns (added_count, skipped_count).
+    Reorder the guest playlist by track IDs. Tracks missing from
+    ``order_ids`` are kept after, in their previous relative order.
     """
-    existing = _session_get_list(request)
-    s = set(existing)
-    added = 0
-    for tid in track_ids:
-        if tid in s:
-            continue
-        existing.append(tid)
-        s.add(tid)
-        added += 1
-    _session_set_list(request, existing)
-    skipped = len(track_ids) - added
-    return added, skipped
+    request.guest.playlist.reorder(order_ids)
 
 
-def _session_reorder(request, order_ids: List[int]) -> None:
-    """
-    Reorder the session playlist according to the list of track IDs provided.
-    Any tracks not in 'order_ids' are kept after, in their previous relative order.
-    """
-    cur = _session_get_list(request)
-    want = [tid for tid in order_ids if tid in cur]
-    # keep leftovers (present in cur but not in want) preserving old order
-    leftovers = [tid for tid in cur if tid not in set(want)]
-    _session_set_list(request, want + leftovers)
+def _guest_clear(request) -> None:
+    request.guest.playlist.clear()
+
+
+def _track_src(track) -> str:
+    """Playable URL for a track: uploaded file first, then source URL."""
+    src = ""
+    if getattr(track, "audio_file", None):
+        try:
+            src = track.audio_file.url
+        except Exception:
+            src = ""
+    return src or track.source_url or ""
+
+
+def _json_body(request) -> dict:
+    try:
+        payload = json.loads(request.body or "{}")
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
 
 
 # -------------------------- Views --------------------------
@@ -95,31 +87,26 @@ def _session_reorder(request, order_ids: List[int]) -> None:
 
 @require_GET
 @ensure_csrf_cookie  # ensures guests receive a CSRF cookie for subsequent POSTs
+# Signed-in: the viewer's own stamps cover it; guest lists are not stamped
+@etag_from_stamps(lambda request: [] if request.user.is_authenticated else None)
 def playlist_json(request):
     """
     Return the current playlist (tracks with playable src) for:
       - authenticated users: DB playlist
-      - guests: session playlist (track IDs stored in session)
+      - guests: guest playlist (track IDs in request.guest)
     """
     data = []
 
     if request.user.is_authenticated:
-        pl = _get_default_playlist(request.user)
+        # Read-only: a user without a playlist just gets an empty list
         items = (
             PlaylistItem.objects.select_related("track")
-            .filter(playlist=pl)
+            .filter(playlist_id=get_active_playlist_id(request.user))
             .order_by("position", "id")
         )
         for it in items:
             t = it.track
-            src = ""
-            if getattr(t, "audio_file", None):
-                try:
-                    src = t.audio_file.url
-                except Exception:
-                    src = ""
-            if not src:
-                src = t.source_url or ""
+            src = _track_src(t)
             if not src:
                 continue
             data.append(
@@ -127,8 +114,8 @@ def playlist_json(request):
             )
         return JsonResponse({"tracks": data})
 
-    # Guest: build from session IDs
-    ids = _session_get_list(request)
+    # Guest: build from the guest list
+    ids = _guest_get(request)
     if not ids:
         return JsonResponse({"tracks": []})
 
@@ -142,14 +129,7 @@ def playlist_json(request):
         t = tracks_by_id.get(tid)
         if not t:
             continue
-        src = ""
-        if getattr(t, "audio_file", None):
-            try:
-                src = t.audio_file.url
-            except Exception:
-                src = ""
-        if not src:
-            src = t.source_url or ""
+        src = _track_src(t)
         if not src:
             continue
         data.append({"id": t.id, "name": getattr(t, "name", "Untitled"), "src": src})
@@ -161,43 +141,37 @@ def playlist_toggle(request, track_id: int):
     """
     Toggle a track in/out of the default playlist.
       - Auth: DB PlaylistItem
-      - Guest: session list
+      - Guest: guest list (core.guest)
     """
     # Validate track exists (both auth & guest)
     track = get_object_or_404(Track, pk=track_id)
 
     if request.user.is_authenticated:
-        pl = _get_default_playlist(request.user)
-        existing = (
-            PlaylistItem.objects.filter(playlist=pl, track=track).order_by("id").first()
+        pl = get_active_playlist(request.user)
+        # New items go to the end of the list
+        res = toggles.toggle(
+            PlaylistItem,
+            {"playlist": pl, "track": track},
+            defaults={"position": next_key()},
+            count=pl.items.all(),
         )
-        if existing:
-            existing.delete()
-            count = PlaylistItem.objects.filter(playlist=pl).count()
+        if not res.active:
             return JsonResponse(
-                {"ok": True, "in_playlist": False, "removed": True, "count": count}
+                {"ok": True, "in_playlist": False, "removed": True, "count": res.count}
             )
-
-        # append to end
-        max_pos = PlaylistItem.objects.filter(playlist=pl).aggregate(m=Max("position"))[
-            "m"
-        ]
-        pos = (max_pos if max_pos is not None else -1) + 1
-        item = PlaylistItem.objects.create(playlist=pl, track=track, position=pos)
-        count = PlaylistItem.objects.filter(playlist=pl).count()
         return JsonResponse(
             {
                 "ok": True,
                 "in_playlist": True,
-                "added": True,
-                "item_id": item.id,
-                "count": count,
+                "added": res.changed,
+                "item_id": res.pk,
+                "count": res.count,
             }
         )
 
     # Guest
-    now_in = _session_toggle_track(request, track_id)
-    count = len(_session_get_list(request))
+    now_in = _guest_toggle(request, track_id)
+    count = len(request.guest.playlist)
     return JsonResponse({"ok": True, "in_playlist": now_in, "count": count})
 
 
@@ -206,13 +180,15 @@ def playlist_clear(request):
     """
     Clear the playlist.
       - Auth: delete items in DB
-      - Guest: clear session list
+      - Guest: clear the guest list
     """
     if request.user.is_authenticated:
-        pl = _get_default_playlist(request.user)
-        pl.items.all().delete()
+        pl = get_active_playlist(request.user, create=False)
+        if pl:
+            pl.items.all().delete()
+            invalidate_playlist_members(pl.id)
     else:
-        _session_set_list(request, [])
+        _guest_clear(request)
     return JsonResponse({"ok": True})
 
 
@@ -249,39 +225,27 @@ def bulk_add_to_playlist(request):
         return JsonResponse({"ok": True, "added": 0, "skipped": 0})
 
     if request.user.is_authenticated:
-        playlist = _get_default_playlist(request.user)
-        existing = set(
-            PlaylistItem.objects.filter(
-                playlist=playlist, track_id__in=track_ids
-            ).values_list("track_id", flat=True)
-        )
-
-        added = 0
-        with transaction.atomic():
-            # Determine starting position
-            max_pos = PlaylistItem.objects.filter(playlist=playlist).aggregate(
-                m=Max("position")
-            )["m"]
-            pos = (max_pos if max_pos is not None else -1) + 1
-
-            to_create = []
-            for tid in track_ids:
-                if tid in existing:
-                    continue
-                to_create.append(
-                    PlaylistItem(playlist=playlist, track_id=tid, position=pos)
-                )
-                pos += 1
-                added += 1
-
-            if to_create:
-                PlaylistItem.objects.bulk_create(to_create, ignore_conflicts=True)
+        playlist = get_active_playlist(request.user)
+        existing = playlist_track_ids(playlist.id)
+
+        new_ids = [tid for tid in dict.fromkeys(track_ids) if tid not in existing]
+        added = len(new_ids)
+        if new_ids:
+            # bulk_create skips save(), so hand out append keys here
+            to_create = [
+                PlaylistItem(playlist=playlist, track_id=tid, position=key)
+                for tid, key in zip(new_ids, next_keys(len(new_ids)))
+            ]
+            PlaylistItem.objects.bulk_create(to_create, ignore_conflicts=True)
+            # bulk_create skips signals
+            invalidate_playlist_members(playlist.id)
+            stamps.touch_user(request.user.id, "library")
 
         skipped = len(track_ids) - added
         return JsonResponse({"ok": True, "added": added, "skipped": skipped})
 
     # Guest
-    added, skipped = _session_bulk_add(request, track_ids)
+    added, skipped = _guest_bulk_add(request, track_ids)
     return JsonResponse({"ok": True, "added": added, "skipped": skipped})
 
 
@@ -302,72 +266,256 @@ def reorder(request):
         return JsonResponse({"ok": True})
 
     if request.user.is_authenticated:
-        playlist = _get_default_playlist(request.user)
-        items = PlaylistItem.objects.filter(playlist=playlist, id__in=order)
-        by_id = {it.id: it for it in items}
-
-        pos = 1
-        to_update = []
-        for iid in order:
-            it = by_id.get(iid)
-            if it:
-                it.position = pos
-                to_update.append(it)
-                pos += 1
-
+        playlist = get_active_playlist(request.user)
         with transaction.atomic():
-            if to_update:
-                PlaylistItem.objects.bulk_update(to_update, ["position"])
-
-        return JsonResponse({"ok": True})
+            apply_order(
+                OrderedList(PlaylistItem, "position", {"playlist": playlist}), order
+            )
+            version = bump_version(list_key("playlist", playlist.id))
+            stamps.touch_user(request.user.id, "library")
+        return JsonResponse({"ok": True, "version": version})
 
     # Guest: reorder by track IDs
-    _session_reorder(request, order)
+    _guest_reorder(request, order)
     return JsonResponse({"ok": True})
 
 
-# ---------- Compatibility shims for old imports ----------
+@login_required
+@require_POST
+def move(request):
+    """
+    Move items of the user's playlist by delta (PlaylistItem IDs). Expects
+    JSON { "version": n, "ops": [{"moved_id", "before_id", "after_id"}] }.
+    Guests keep posting the full order to ``reorder``.
+    """
+    playlist = get_active_playlist(request.user)
+    response = move_response(
+        request,
+        OrderedList(PlaylistItem, "position", {"playlist": playlist}),
+        list_key("playlist", playlist.id),
+    )
+    if response.status_code == 200:
+        stamps.touch_user(request.user.id, "library")
+    return response
 
 
-def _guest_get(request):
-    """Return guest playlist as a list of track IDs (session-based)."""
-    return _session_get_list(request)
+# -------------------------- Playlists (CRUD) --------------------------
 
+MAX_PLAYLIST_NAME = Playlist._meta.get_field("name").max_length
 
-def _guest_set(request, ids):
-    """Replace guest playlist with given list of track IDs."""
-    _session_set_list(request, ids)
 
+def _playlist_dict(pl, active_id=None) -> dict:
+    return {
+        "id": pl.id,
+        "name": pl.name,
+        "count": getattr(pl, "item_count", None),
+        "active": pl.id == active_id,
+    }
 
-def _guest_toggle(request, track_id: int):
-    """Toggle a track for guest; returns True if now in playlist."""
-    return _session_toggle_track(request, int(track_id))
 
+def _clean_name(request) -> str:
+    name = (_json_body(request).get("name") or request.POST.get("name") or "").strip()
+    return name[:MAX_PLAYLIST_NAME]
 
-def _guest_bulk_add(request, ids):
-    """Add multiple tracks for guest; returns (added, skipped)."""
-    # normalize to ints
-    norm = []
-    for x in ids:
-        try:
-            norm.append(int(x))
-        except Exception:
-            continue
-    return _session_bulk_add(request, norm)
 
+@login_required
+@require_GET
+def playlist_list(request):
+    """The user's playlists: { playlists: [{id, name, count, active}] }"""
+    active_id = get_active_playlist_id(request.user)
+    playlists = Playlist.objects.filter(owner=request.user).annotate(
+        item_count=Count("items")
+    )
+    return JsonResponse(
+        {"playlists": [_playlist_dict(pl, active_id) for pl in playlists]}
+    )
 
-def _guest_reorder(request, order_ids):
-    """Reorder guest playlist by track IDs."""
-    # normalize to ints
-    norm = []
-    for x in order_ids:
-        try:
-            norm.append(int(x))
-        except Exception:
-            continue
-    _session_reorder(request, norm)
 
+@login_required
+@require_POST
+def playlist_create(request):
+    """Create a playlist and make it the active one. Body: { name }"""
+    name = _clean_name(request)
+    if not name:
+        return JsonResponse({"ok": False, "error": "Name required."}, status=400)
+    try:
+        with transaction.atomic():
+            pl = Playlist.objects.create(owner=request.user, name=name)
+    except IntegrityError:
+        return JsonResponse(
+            {"ok": False, "error": "You already have a playlist with that name."},
+            status=400,
+        )
+    set_active_playlist(request.user, pl)
+    pl.item_count = 0
+    return JsonResponse({"ok": True, "playlist": _playlist_dict(pl, pl.id)}, status=201)
+
+
+@login_required
+@require_POST
+def playlist_rename(request, pk: int):
+    pl = get_object_or_404(Playlist, pk=pk, owner=request.user)
+    name = _clean_name(request)
+    if not name:
+        return JsonResponse({"ok": False, "error": "Name required."}, status=400)
+    try:
+        with transaction.atomic():
+            pl.name = name
+            pl.save(update_fields=["name", "updated_at"])
+    except IntegrityError:
+        return JsonResponse(
+            {"ok": False, "error": "You already have a playlist with that name."},
+            status=400,
+        )
+    return JsonResponse({"ok": True, "id": pl.id, "name": pl.name})
+
+
+@login_required
+@require_POST
+def playlist_delete(request, pk: int):
+    """Delete a playlist; if it was active, the oldest remaining one takes over."""
+    pl = get_object_or_404(Playlist, pk=pk, owner=request.user)
+    was_active = pl.id == get_active_playlist_id(request.user)
+    pl.delete()
+
+    active_id = None
+    if was_active:
+        nxt = Playlist.objects.filter(owner=request.user).first()
+        if nxt:
+            set_active_playlist(request.user, nxt)
+            active_id = nxt.id
+    return JsonResponse({"ok": True, "deleted": pk, "active_id": active_id})
+
+
+@login_required
+@require_POST
+def playlist_activate(request, pk: int):
+    """Switch the active playlist (what ✓/➕ and the player use)."""
+    pl = get_object_or_404(Playlist, pk=pk, owner=request.user)
+    set_active_playlist(request.user, pl)
+    return JsonResponse(
+        {"ok": True, "active_id": pl.id, "in_ids": sorted(playlist_track_ids(pl.id))}
+    )
+
+
+# -------------------------- Playback queue --------------------------
+
+MAX_QUEUE_LENGTH = 1000
+
+
+def _queue_payload(queue) -> dict:
+    """Queue state with playable tracks, in play order."""
+    if queue is None:
+        return {
+            "tracks": [],
+            "cursor": 0,
+            "shuffle": False,
+            "position": 0,
+            "playlist_id": None,
+        }
+    ids = [int(t) for t in queue.track_ids]
+    by_id = (
+        Track.objects.filter(id__in=ids)
+        .only("id", "name", "audio_file", "source_url")
+        .in_bulk(ids)
+    )
+    current_id = ids[queue.cursor] if queue.cursor < len(ids) else None
+
+    tracks = []
+    cursor = 0
+    for tid in ids:
+        t = by_id.get(tid)
+        src = _track_src(t) if t else ""
+        if not src:
+            continue  # deleted or unplayable since the queue was saved
+        if tid == current_id:
+            cursor = len(tracks)
+        tracks.append({"id": t.id, "name": t.name, "src": src})
+
+    return {
+        "tracks": tracks,
+        "cursor": cursor,
+        "shuffle": queue.shuffle,
+        "position": queue.position if current_id in by_id else 0,
+        "playlist_id": queue.playlist_id,
+    }
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def queue_state(request):
+    """
+    GET: the saved "now playing" queue { tracks, cursor, shuffle, position }.
+    POST: update any of { track_ids, cursor, shuffle, position, playlist_id }.
+    The player only sends track_ids when the queue itself changed, so the
+    frequent cursor/position saves stay tiny.
+    """
+    if request.method == "GET":
+        queue = PlaybackQueue.objects.filter(user=request.user).first()
+        return JsonResponse(_queue_payload(queue))
+
+    payload = _json_body(request)
+    changes = {}
+    try:
+        if "track_ids" in payload:
+            ids = [int(t) for t in payload["track_ids"]][:MAX_QUEUE_LENGTH]
+            changes["track_ids"] = ids
+        if "cursor" in payload:
+            changes["cursor"] = max(int(payload["cursor"]), 0)
+        if "shuffle" in payload:
+            changes["shuffle"] = bool(payload["shuffle"])
+        if "position" in payload:
+            changes["position"] = max(float(payload["position"]), 0.0)
+        if "playlist_id" in payload:
+            pid = payload["playlist_id"]
+            if (
+                pid is not None
+                and not Playlist.objects.filter(pk=pid, owner=request.user).exists()
+            ):
+                return JsonResponse(
+                    {"ok": False, "error": "Unknown playlist."}, status=400
+                )
+            changes["playlist_id"] = pid
+    except (TypeError, ValueError):
+        return JsonResponse({"ok": False, "error": "Bad JSON"}, status=400)
 
-def _guest_clear(request):
-    """Clear guest playlist."""
-    _session_set_list(request, [])
+    if not changes:
+        return JsonResponse({"ok": True})
+
+    queue, created = PlaybackQueue.objects.get_or_create(
+        user=request.user, defaults=changes
+    )
+    if not created:
+        for field, value in changes.items():
+            setattr(queue, field, value)
+        queue.save(update_fields=[*changes, "updated_at"])
+    return JsonResponse({"ok": True})
+
+
+@login_required
+@require_POST
+def queue_generate(request):
+    """
+    Shuffled or weighted play order for a seed:
+      { seed: playlist|album|favorites|collection|ids, id?, track_ids?,
+        mode: shuffle|smart, first?, limit? }
+    Returns only track IDs; the player already has (or fetches) the rest.
+    """
+    payload = _json_body(request)
+    try:
+        limit = payload.get("limit")
+        first = payload.get("first")
+        order = generate_queue(
+            request.user,
+            str(payload.get("seed") or "ids"),
+            payload.get("id"),
+            mode=str(payload.get("mode") or "smart"),
+            track_ids=[int(t) for t in payload.get("track_ids") or []],
+            limit=min(int(limit), MAX_QUEUE_LENGTH) if limit else MAX_QUEUE_LENGTH,
+            first=int(first) if first else None,
+        )
+    except (TypeError, ValueError):
+        return JsonResponse({"ok": False, "error": "Bad JSON"}, status=400)
+    except SeedError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+    return JsonResponse({"ok": True, "track_ids": order})
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    UserProfile = apps.get_model("profile_page", "UserProfile")
+    Follow = apps.get_model("follow_system", "Follow")
+
+    def counted(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef("user_id")})
+                .order_by()
+                .values(field)
+                .annotate(n=Count("id"))
+                .values("n")[:1]
+            ),
+            Value(0),
+        )
+
+    UserProfile.objects.update(
+        followers_count=counted("following_id"),
+        following_count=counted("follower_id"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profile_page", "0001_initial"),
+        ("follow_system", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
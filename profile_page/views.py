@@ -4,13 +4,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.db.models import Count, OuterRef, Q, Subquery
 from django.shortcuts import get_object_or_404, redirect, render
-from django.template.loader import render_to_string
 
 from album.models import Album
+from album.services import attach_track_cards
 from checkout.models import Order
 from cloud_connect.models import CloudAccount, CloudFolderLink
-from follow_system.models import Follow
+from core.pagecache import cache_anonymous_page
+from core.stamps import etag_from_stamps, stamp_key
+from follow_system.counters import counts_for
+from follow_system.suggestions import suggestions_for
+from follow_system.utils import is_following as follow_is_following
 from ratings.utils import annotate_albums, annotate_tracks
+from tracks.cards import track_cards
 from tracks.models import Track
 from ratings.models import TrackRating
 
@@ -74,6 +79,8 @@ def profile_view(request):
         .order_by("username")
     )
 
+    suggestions = suggestions_for(request.user)
+
     cloud_accounts = CloudAccount.objects.filter(user=request.user)
     my_albums = Album.objects.filter(owner=request.user).order_by("name")
     cloud_links = CloudFolderLink.objects.filter(
@@ -88,6 +95,7 @@ def profile_view(request):
         "orders": orders,
         "following": following,
         "followers": followers,
+        "suggestions": suggestions,
         "cloud_accounts": cloud_accounts,
         "my_albums": my_albums,
         "cloud_links": cloud_links,
@@ -119,6 +127,20 @@ def order_history(request, order_number):
 
 
 
+def _public_profile_stamps(request, username: str):
+    user_id = (
+        User.objects.filter(username=username).values_list("pk", flat=True).first()
+    )
+    if user_id is None:
+        return None  # the view answers 404
+    return [
+        *(stamp_key(kind, user_id) for kind in ("albums", "tracks", "social")),
+        stamp_key("track_ratings"),
+    ]
+
+
+@etag_from_stamps(_public_profile_stamps)
+@cache_anonymous_page(_public_profile_stamps)
 def public_profile(request, username: str):
     """
     Public-facing profile page for a given user (no login required).
@@ -127,88 +149,58 @@ def public_profile(request, username: str):
     """
     view_user = get_object_or_404(User, username=username)
     profile = UserProfile.objects.filter(user=view_user).first()
-    followers_count = Follow.objects.filter(following=view_user).count()
-    following_count = Follow.objects.filter(follower=view_user).count()
-    is_following = False
-    if request.user.is_authenticated and request.user != view_user:
-        is_following = Follow.objects.filter(
-            follower=request.user, following=view_user
-        ).exists()
-
-    public_albums = annotate_albums(
-        Album.objects.filter(owner=view_user, is_public=True).annotate(
-            track_count=Count("album_tracks", distinct=True)
-        )
-    ).order_by("-created_at")
-
-    # NEW: normalise album track ratings
-    for album in public_albums:
-        for at in album.album_tracks.all():
-            avg = float(getattr(at, "track_avg", 0) or 0.0)
-            count = int(getattr(at, "track_count", 0) or 0)
-
-            user_rating = (
-                TrackRating.objects.filter(user=view_user, track=at.track)
-                .values_list("stars", flat=True)
-                .first()
-            )
+    if profile is not None:
+        followers_count = profile.followers_count
+        following_count = profile.following_count
+    else:
+        counts = counts_for(view_user)
+        followers_count, following_count = counts["followers"], counts["following"]
+    is_following = request.user != view_user and follow_is_following(
+        request, view_user
+    )
+    # The viewer's own suggestions, minus the person they are looking at
+    suggestions = suggestions_for(request.user, exclude=[view_user.pk])
 
-            at.track.rating_avg = avg
-            at.track.rating_count = count
-            at.track.user_rating = int(user_rating) if user_rating else None
-            at.track.rating_html = render_to_string(
-                "ratings/_stars.html",
-                {
-                    "type": "track",
-                    "id": at.track.id,
-                    "avg": avg,
-                    "count": count,
-                    "user_rating": at.track.user_rating,
-                },
-                request=request,
+    public_albums = attach_track_cards(
+        annotate_albums(
+            Album.objects.filter(owner=view_user, is_public=True).annotate(
+                track_count=Count("album_tracks", distinct=True)
             )
+        )
+        .select_related("owner")
+        .order_by("-created_at"),
+        request.user,
+    )
 
-    # Handle public tracks (independent of albums)
+    # Public tracks (independent of albums), the ones they rated best first
     user_rating_subquery = TrackRating.objects.filter(
         user=view_user, track=OuterRef("pk")
     ).values("stars")[:1]
 
-    public_tracks_qs = annotate_tracks(
-        Track.objects.filter(track_albums__album__is_public=True)
-        .filter(
-            Q(track_albums__album__owner=view_user)
-            | Q(ratings__user=view_user)
-        )
-        .annotate(user_rating=Subquery(user_rating_subquery))
-        .select_related("owner")
-        .distinct()
-    ).order_by("-user_rating", "-rating_avg", "-created_at")
-
-    public_tracks = []
-    for track in public_tracks_qs:
-        raw_avg = getattr(track, "rating_avg", None)
-        raw_count = getattr(track, "rating_count", None)
-        raw_user_rating = getattr(track, "user_rating", None)
-
-        avg = float(raw_avg) if raw_avg else 0.0
-        count = int(raw_count) if raw_count else 0
-        user_rating = int(raw_user_rating) if raw_user_rating else None
-
-        track.rating_avg = avg
-        track.rating_count = count
-        track.user_rating = user_rating
-        track.rating_html = render_to_string(
-            "ratings/_stars.html",
-            {
-                "type": "track",
-                "id": track.id,
-                "avg": avg,
-                "count": count,
-                "user_rating": user_rating,
-            },
-            request=request,
+    public_track_ids = (
+        annotate_tracks(
+            Track.objects.filter(track_albums__album__is_public=True)
+            .filter(
+                Q(track_albums__album__owner=view_user)
+                | Q(ratings__user=view_user)
+            )
+            .annotate(user_rating=Subquery(user_rating_subquery))
+            .distinct()
         )
-        public_tracks.append(track)
+        .order_by("-user_rating", "-rating_avg", "-created_at")
+        .values_list("id", flat=True)
+    )
+    public_tracks = track_cards(request.user, public_track_ids)
+
+    # Every card shows the profile owner's stars; fetched in one query
+    cards = public_tracks + [c for a in public_albums for c in a.track_cards]
+    own_ratings = dict(
+        TrackRating.objects.filter(
+            user=view_user, track__in={card.id for card in cards}
+        ).values_list("track_id", "stars")
+    )
+    for card in cards:
+        card.user_rating = own_ratings.get(card.id)
 
     return render(
         request,
@@ -221,6 +213,7 @@ def public_profile(request, username: str):
             "followers_count": followers_count,
             "following_count": following_count,
             "is_following": is_following,
+            "suggestions": suggestions,
         },
     )
 
@@ -0,0 +1,23 @@
+# ratings/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import stamps
+
+from .models import AlbumRating, TrackRating
+
+
+@receiver(post_save, sender=AlbumRating)
+@receiver(post_delete, sender=AlbumRating)
+def album_rating_changed(sender, instance, **kwargs):
+    # The album's own pages are touched by album.signals
+    stamps.touch_user(instance.user_id, "library")
+
+
+@receiver(post_save, sender=TrackRating)
+@receiver(post_delete, sender=TrackRating)
+def track_rating_changed(sender, instance, **kwargs):
+    # Averages appear on every card of the track, on anyone's page: one
+    # site-wide stamp instead of fanning out to every list it is in
+    stamps.touch_user(instance.user_id, "library")
+    stamps.touch(stamps.stamp_key("track_ratings"))
@@ -15,6 +15,9 @@ class SavedAlbumAdmin(admin.ModelAdmin):
     list_filter = ("owner",)
     search_fields = ("name_snapshot",)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_updates()
+
 
 @admin.register(SavedTrack)
 class SavedTrackAdmin(admin.ModelAdmin):
@@ -28,3 +31,6 @@ class SavedTrackAdmin(admin.ModelAdmin):
     )
     list_filter = ("owner", "album")
     search_fields = ("name_snapshot",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_updates()
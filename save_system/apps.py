@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SaveSystemConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "save_system"
+
+    def ready(self):
+        import save_system.signals  # noqa: F401  change stamps
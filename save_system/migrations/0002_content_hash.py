@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:05
+
+import hashlib
+
+from django.db import migrations, models
+
+# Hash what each saved copy captured, so has-updates becomes a column compare.
+BATCH = 1000
+
+
+def content_hash(*parts):
+    # As core.snapshots.content_hash was when this migration was written;
+    # copied so later changes there cannot alter the stored hashes
+    joined = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def fill_album_snapshots(apps, schema_editor):
+    Model = apps.get_model("save_system", "SavedAlbum")
+    batch = []
+    for obj in Model.objects.only("name_snapshot", "description_snapshot").iterator(
+        chunk_size=BATCH
+    ):
+        obj.hash_snapshot = content_hash(obj.name_snapshot, obj.description_snapshot)
+        batch.append(obj)
+        if len(batch) >= BATCH:
+            Model.objects.bulk_update(batch, ["hash_snapshot"])
+            batch = []
+    Model.objects.bulk_update(batch, ["hash_snapshot"])
+
+
+def fill_track_snapshots(apps, schema_editor):
+    Model = apps.get_model("save_system", "SavedTrack")
+    batch = []
+    for obj in Model.objects.only("name_snapshot").iterator(chunk_size=BATCH):
+        obj.hash_snapshot = content_hash(obj.name_snapshot)
+        batch.append(obj)
+        if len(batch) >= BATCH:
+            Model.objects.bulk_update(batch, ["hash_snapshot"])
+            batch = []
+    Model.objects.bulk_update(batch, ["hash_snapshot"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("save_system", "0001_initial"),
+        ("album", "0003_content_hash"),
+        ("tracks", "0006_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedalbum",
+            name="hash_snapshot",
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name="savedtrack",
+            name="hash_snapshot",
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.RunPython(fill_album_snapshots, migrations.RunPython.noop),
+        migrations.RunPython(fill_track_snapshots, migrations.RunPython.noop),
+    ]
@@ -1,32 +1,46 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Case, F, Value, When
 from django.utils import timezone
 
 # Import your existing models
 from album.models import Album
+from core.snapshots import HASH_LENGTH, content_hash
 from tracks.models import Track
 
 
-def _safe_str(x):
-    try:
-        return str(x)
-    except Exception:
-        return ""
+class SnapshotQuerySet(models.QuerySet):
+    """Saved copies, with update detection done in SQL."""
 
+    original = ""  # FK to the saved original
 
-def _get_name(obj):
-    # tolerate title/name differences
-    for attr in ("name", "title"):
-        if hasattr(obj, attr) and getattr(obj, attr):
-            return getattr(obj, attr)
-    return _safe_str(obj)
+    def with_updates(self):
+        """
+        Annotate ``is_updated``: the original is gone or its content hash
+        no longer matches the one captured at save time.
+        """
+        return self.annotate(
+            is_updated=Case(
+                When(**{f"{self.original}__isnull": True}, then=Value(True)),
+                When(
+                    hash_snapshot=F(f"{self.original}__content_hash"),
+                    then=Value(False),
+                ),
+                default=Value(True),
+                output_field=models.BooleanField(),
+            )
+        )
 
+    def updated(self):
+        return self.with_updates().filter(is_updated=True)
 
-def _get_description(obj):
-    for attr in ("description", "desc", "summary"):
-        if hasattr(obj, attr) and getattr(obj, attr):
-            return getattr(obj, attr) or ""
-    return ""
+
+class SavedAlbumQuerySet(SnapshotQuerySet):
+    original = "original_album"
+
+
+class SavedTrackQuerySet(SnapshotQuerySet):
+    original = "original_track"
 
 
 class SavedAlbum(models.Model):
@@ -45,8 +59,12 @@ class SavedAlbum(models.Model):
     )
     name_snapshot = models.CharField(max_length=200)
     description_snapshot = models.TextField(blank=True)
+    # Album.content_hash of the snapshot above
+    hash_snapshot = models.CharField(max_length=HASH_LENGTH, blank=True)
     saved_at = models.DateTimeField(default=timezone.now)
 
+    objects = SavedAlbumQuerySet.as_manager()
+
     class Meta:
         unique_together = (("owner", "original_album"),)
         indexes = [
@@ -58,17 +76,25 @@ class SavedAlbum(models.Model):
         base = self.name_snapshot or "(unnamed album)"
         return f"{self.owner} saved “{base}”"
 
+    def save(self, *args, **kwargs):
+        if not self.hash_snapshot:
+            self.hash_snapshot = content_hash(
+                self.name_snapshot, self.description_snapshot
+            )
+        super().save(*args, **kwargs)
+
     @property
     def has_updates(self):
-        """True if current album metadata differs from the snapshot."""
+        """
+        True if current album metadata differs from the snapshot. Prefer
+        ``SavedAlbum.objects.with_updates()``, which works this out in SQL.
+        """
+        if hasattr(self, "is_updated"):
+            return self.is_updated
         if not self.original_album:
             # original deleted -> definitely 'changed'
             return True
-        current_name = _get_name(self.original_album)
-        current_desc = _get_description(self.original_album)
-        return (current_name or "") != (self.name_snapshot or "") or (
-            current_desc or ""
-        ) != (self.description_snapshot or "")
+        return self.original_album.content_hash != self.hash_snapshot
 
 
 class SavedTrack(models.Model):
@@ -91,8 +117,12 @@ class SavedTrack(models.Model):
         related_name="saved_tracks",
     )
     name_snapshot = models.CharField(max_length=200)
+    # Track.content_hash of the snapshot above
+    hash_snapshot = models.CharField(max_length=HASH_LENGTH, blank=True)
     saved_at = models.DateTimeField(default=timezone.now)
 
+    objects = SavedTrackQuerySet.as_manager()
+
     class Meta:
         unique_together = (("owner", "original_track", "album"),)
         indexes = [
@@ -105,9 +135,15 @@ class SavedTrack(models.Model):
         base = self.name_snapshot or "(unnamed track)"
         return f"{self.owner} saved track “{base}” → {self.album}"
 
+    def save(self, *args, **kwargs):
+        if not self.hash_snapshot:
+            self.hash_snapshot = content_hash(self.name_snapshot)
+        super().save(*args, **kwargs)
+
     @property
     def has_updates(self):
+        if hasattr(self, "is_updated"):
+            return self.is_updated
         if not self.original_track:
             return True
-        current_name = _get_name(self.original_track)
-        return (current_name or "") != (self.name_snapshot or "")
+        return self.original_track.content_hash != self.hash_snapshot
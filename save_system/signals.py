@@ -0,0 +1,15 @@
+# save_system/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import stamps
+
+from .models import SavedAlbum, SavedTrack
+
+
+@receiver(post_save, sender=SavedAlbum)
+@receiver(post_delete, sender=SavedAlbum)
+@receiver(post_save, sender=SavedTrack)
+@receiver(post_delete, sender=SavedTrack)
+def saved_item_changed(sender, instance, **kwargs):
+    stamps.touch_user(instance.owner_id, "library")
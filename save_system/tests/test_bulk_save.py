@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from save_system.models import SavedTrack
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkSaveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        artist = User.objects.create_user(username="artist", password="pw")
+        self.tracks = [
+            Track.objects.create(owner=artist, name=f"t{i}") for i in range(40)
+        ]
+        self.album = Album.objects.create(owner=self.user, name="Mine")
+        self.client.force_login(self.user)
+
+    def bulk_save(self, tracks, ajax=True):
+        ids = ",".join(str(t if isinstance(t, int) else t.pk) for t in tracks)
+        headers = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"} if ajax else {}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(
+                reverse("save_system:bulk_save_tracks"),
+                {"track_ids": ids, "album_id": self.album.pk},
+                **headers,
+            )
+        return res, len(ctx.captured_queries)
+
+    def test_adds_in_order_and_skips_known_or_missing(self):
+        AlbumTrack.objects.create(album=self.album, track=self.tracks[1])
+        picked = [self.tracks[3], self.tracks[1], self.tracks[0], 999999]
+        res, _ = self.bulk_save(picked)
+        data = res.json()
+        self.assertEqual((data["added"], data["skipped"]), (2, 2))
+        self.assertEqual(
+            list(self.album.album_tracks.values_list("track__name", flat=True)),
+            ["t1", "t3", "t0"],
+        )
+        snap = SavedTrack.objects.get(original_track=self.tracks[3])
+        self.assertFalse(SavedTrack.objects.with_updates().get(pk=snap.pk).is_updated)
+        self.assertEqual(data["html"].count('data-role="track-title"'), 2)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        # Cards are rendered too: none of them may query per track
+        self.bulk_save([])  # first request creates the profile
+        _, few = self.bulk_save(self.tracks[:2])
+        _, many = self.bulk_save(self.tracks[2:])
+        self.assertEqual(few, many)
+        self.assertEqual(self.album.album_tracks.count(), 40)
+        self.assertEqual(SavedTrack.objects.filter(album=self.album).count(), 40)
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album
+from save_system.models import SavedAlbum, SavedTrack
+from tracks.models import Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SnapshotUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artist = User.objects.create_user(username="artist", password="pw")
+        self.fan = User.objects.create_user(username="fan", password="pw")
+        self.album = Album.objects.create(
+            owner=self.artist, name="A", description="d", is_public=True
+        )
+        self.track = Track.objects.create(owner=self.artist, name="t")
+        self.mine = Album.objects.create(owner=self.fan, name="Mine")
+        self.client.force_login(self.fan)
+        self.client.post(reverse("save_system:save_album", args=[self.album.pk]))
+        self.client.post(
+            reverse("save_system:save_track", args=[self.track.pk]),
+            {"album_id": self.mine.pk},
+        )
+
+    def updated(self, model):
+        return list(model.objects.filter(owner=self.fan).updated())
+
+    def test_edits_are_detected_in_sql(self):
+        self.assertEqual(self.updated(SavedAlbum), [])
+        self.assertEqual(self.updated(SavedTrack), [])
+
+        self.album.description = "new"
+        self.album.save(update_fields=["description"])
+        self.track.name = "t2"
+        self.track.save(update_fields=["name"])
+        self.assertEqual(len(self.updated(SavedAlbum)), 1)
+        self.assertEqual(len(self.updated(SavedTrack)), 1)
+
+        # Renaming back means nothing changed after all
+        self.track.name = "t"
+        self.track.save()
+        self.assertEqual(self.updated(SavedTrack), [])
+
+    def test_deleted_original_counts_as_updated(self):
+        self.track.delete()
+        saved = SavedTrack.objects.with_updates().get()
+        self.assertTrue(saved.is_updated)
+        self.assertTrue(saved.has_updates)
+
+    def test_album_list_filters_without_per_row_queries(self):
+        self.album.name = "B"
+        self.album.save()
+        res = self.client.get(reverse("album:album_list"), {"saved": "updated"})
+        self.assertEqual(len(res.context["saved_albums"]), 1)
+        self.assertEqual(len(res.context["saved_tracks"]), 0)
+        self.assertContains(res, "Updated")
+        with self.assertNumQueries(0):
+            [s.has_updates for s in res.context["saved_albums"]]
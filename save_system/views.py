@@ -1,7 +1,6 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
-from django.db.models import Max
+from django.db import IntegrityError, transaction
 from django.http import (HttpResponseBadRequest, HttpResponseForbidden,
                          JsonResponse)
 from django.shortcuts import get_object_or_404, redirect
@@ -9,6 +8,13 @@ from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
 
 from album.models import Album, AlbumTrack
+from album.signals import touch_albums
+from core import stamps, toggles
+from core.ordering import next_keys
+from core.snapshots import content_hash
+from follow_system import feed
+from follow_system.models import Activity
+from tracks.cards import CardRow, track_cards
 from tracks.models import Track
 
 from .models import SavedAlbum, SavedTrack
@@ -34,6 +40,20 @@ def _is_public_album(album):
     return True
 
 
+def _album_snapshot(album) -> dict:
+    name_snapshot = getattr(album, "name", str(album)) or ""
+    description_snapshot = ""
+    for attr in ("description", "desc", "summary"):
+        if hasattr(album, attr):
+            description_snapshot = getattr(album, attr) or ""
+            break
+    return {
+        "name_snapshot": name_snapshot,
+        "description_snapshot": description_snapshot,
+        "hash_snapshot": content_hash(name_snapshot, description_snapshot),
+    }
+
+
 @login_required
 @require_POST
 def save_album(request, pk):
@@ -48,25 +68,30 @@ def save_album(request, pk):
     if not _is_public_album(album):
         return HttpResponseForbidden("Album is not public.")
 
-    name_snapshot = getattr(album, "name", str(album)) or ""
-    description_snapshot = ""
-    for attr in ("description", "desc", "summary"):
-        if hasattr(album, attr):
-            description_snapshot = getattr(album, attr) or ""
-            break
+    res = toggles.add(
+        SavedAlbum,
+        {"owner": request.user, "original_album": album},
+        defaults=_album_snapshot(album),
+    )
+    return JsonResponse({"ok": True, "created": res.changed})
 
-    try:
-        obj, created = SavedAlbum.objects.get_or_create(
-            owner=request.user,
-            original_album=album,
-            defaults={
-                "name_snapshot": name_snapshot,
-                "description_snapshot": description_snapshot,
-            },
+
+@login_required
+@require_POST
+def toggle_save_album(request, pk):
+    """Save a public album, or un-save it if it is already saved."""
+    album = get_object_or_404(Album, pk=pk)
+    if album.owner_id == request.user.id:
+        return JsonResponse(
+            {"ok": False, "error": "You already own this album."}, status=400
         )
-        return JsonResponse({"ok": True, "created": created})
-    except IntegrityError:
-        return JsonResponse({"ok": True, "created": False})
+    lookup = {"owner": request.user, "original_album": album}
+    if not _is_public_album(album):
+        # Still allow dropping a copy of an album that went private
+        res = toggles.remove(SavedAlbum, lookup)
+    else:
+        res = toggles.toggle(SavedAlbum, lookup, defaults=_album_snapshot(album))
+    return JsonResponse({"ok": True, "saved": res.active})
 
 
 @login_required
@@ -107,16 +132,10 @@ def save_track(request, pk):
 
     # 2) ALSO attach to the album so it appears on album_detail
     try:
-        # next position at the end
-        next_pos = (
-            AlbumTrack.objects.filter(album=album).aggregate(mp=Max("position"))["mp"]
-            or 0
-        ) + 1
-
+        # AlbumTrack.save appends new rows to the end of the album
         album_track, attached_created = AlbumTrack.objects.get_or_create(
             album=album,
             track=track,
-            defaults={"position": next_pos},
         )
     except IntegrityError:
         album_track = AlbumTrack.objects.filter(album=album, track=track).first()
@@ -134,18 +153,15 @@ def save_track(request, pk):
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         if attached_created and album_track:
+            (card,) = track_cards(request.user, [CardRow(track.id, album_track.id)])
             payload["html"] = render_to_string(
                 "tracks/_track_card.html",
                 {
-                    "track": album_track.track,
+                    "track": card,
                     "album": album,
                     "album_item_id": album_track.id,
                     "is_owner": True,
                     "show_checkbox": True,
-                    "is_favorited": False,
-                    "in_playlist": False,
-                    "avg": getattr(track, "rating_avg", 0),
-                    "count": getattr(track, "rating_count", 0),
                 },
                 request=request,
             )
@@ -155,51 +171,81 @@ def save_track(request, pk):
     return JsonResponse(payload)
 
 
+def _parse_ids(raw: str) -> list[int]:
+    """Digits from a comma-separated list, de-duplicated, in order."""
+    return list(dict.fromkeys(int(x) for x in raw.split(",") if x.isdigit()))
+
+
+def _bulk_attach(user, album, track_ids):
+    """
+    Add ``track_ids`` to ``album`` and record SavedTrack snapshots, as a
+    handful of set-based queries whatever the number of tracks. Returns
+    (new AlbumTrack rows in submitted order, skipped IDs).
+    """
+    tracks = Track.objects.select_related("owner").in_bulk(track_ids)
+    present = set(
+        AlbumTrack.objects.filter(album=album, track_id__in=tracks).values_list(
+            "track_id", flat=True
+        )
+    )
+    new_ids = [tid for tid in track_ids if tid in tracks and tid not in present]
+    skipped = [tid for tid in track_ids if tid not in new_ids]
+
+    rows = [
+        AlbumTrack(album=album, track=tracks[tid], position=key)
+        for tid, key in zip(new_ids, next_keys(len(new_ids)))
+    ]
+    snapshots = [
+        SavedTrack(
+            owner=user,
+            original_track_id=tid,
+            album=album,
+            name_snapshot=tracks[tid].name,
+            hash_snapshot=content_hash(tracks[tid].name),
+        )
+        for tid in new_ids
+    ]
+    with transaction.atomic():
+        AlbumTrack.objects.bulk_create(rows)
+        SavedTrack.objects.bulk_create(snapshots, ignore_conflicts=True)
+        # bulk_create skips post_save, so announce the batch once rather
+        # than once per track (see follow_system.signals.track_added)
+        if rows and album.is_public:
+            feed.publish(
+                album.owner, Activity.TRACK_ADDED, album=album, track=rows[0].track
+            )
+        if rows:
+            touch_albums(album.owner_id, album.pk, album.is_public)
+            stamps.touch_user(user.id, "library")
+    return rows, skipped
+
+
 @login_required
 def bulk_save_tracks(request):
     if request.method != "POST":
         return redirect("album:album_list")
 
-    track_ids = [
-        int(x) for x in request.POST.get("track_ids", "").split(",") if x.isdigit()
-    ]
+    track_ids = _parse_ids(request.POST.get("track_ids", ""))
     album_id = request.POST.get("album_id")
     album = get_object_or_404(Album, pk=album_id, owner=request.user)
 
-    added, skipped = [], []
-    for tid in track_ids:
-        try:
-            track = Track.objects.get(pk=tid)
-        except Track.DoesNotExist:
-            skipped.append(tid)
-            continue
-
-        if AlbumTrack.objects.filter(album=album, track=track).exists():
-            skipped.append(tid)
-            continue
-
-        at = AlbumTrack.objects.create(album=album, track=track)
-        added.append(at)
+    try:
+        added, skipped = _bulk_attach(request.user, album, track_ids)
+    except IntegrityError:
+        # A concurrent save attached some of the same tracks; diff again
+        added, skipped = _bulk_attach(request.user, album, track_ids)
 
     # If AJAX, send JSON + rendered HTML
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
-        html = "".join(
-            render_to_string(
-                "tracks/_track_card.html",
-                {
-                    "track": at.track,
-                    "album": album,
-                    "album_item_id": at.id,
-                    "is_owner": True,
-                    "show_checkbox": True,
-                    "is_favorited": False,
-                    "in_playlist": False,
-                    "avg": 0,
-                    "count": 0,
-                },
-                request=request,
-            )
-            for at in added
+        html = render_to_string(
+            "save_system/_added_track_cards.html",
+            {
+                "added": track_cards(
+                    request.user, [CardRow(at.track_id, at.id) for at in added]
+                ),
+                "album": album,
+            },
+            request=request,
         )
         return JsonResponse(
             {
@@ -0,0 +1,43 @@
+// -------------------- static/js/album_dashboard.js --------------------
+// Keeps the album dashboard's per-album figures fresh from the compact
+// summary endpoint. Requests revalidate with If-Modified-Since, so a
+// revisit without changes costs a 304.
+(() => {
+  "use strict";
+
+  const list = document.getElementById("album-list");
+  const url = list?.dataset.summaryUrl;
+  if (!url) return;
+
+  const plural = (n) => `${n} track${n === 1 ? "" : "s"}`;
+
+  function apply(albums) {
+    albums.forEach((a) => {
+      const card = list.querySelector(`.album[data-id="${a.id}"]`);
+      if (!card) return;
+      const tracks = card.querySelector("[data-summary-tracks]");
+      if (tracks) tracks.textContent = plural(a.track_count);
+      const sync = card.querySelector("[data-summary-sync]");
+      if (sync) {
+        sync.textContent = `☁ ${a.sync.state}`;
+        sync.title = a.sync.last_sync || "never synced";
+      }
+    });
+  }
+
+  async function refresh() {
+    try {
+      // "no-cache" = use the cached copy only after the server says 304
+      const res = await fetch(url, { cache: "no-cache", credentials: "same-origin" });
+      if (!res.ok) return;
+      const data = await res.json();
+      apply(data.albums || []);
+    } catch (err) {
+      console.error("Album summary refresh failed", err);
+    }
+  }
+
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "visible") refresh();
+  });
+})();
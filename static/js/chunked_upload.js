@@ -0,0 +1,112 @@
+// -------------------- static/js/chunked_upload.js --------------------
+// Chunked, resumable uploads: initiate → PUT numbered chunks → finalize.
+// Progress is remembered in localStorage so a reload can resume.
+(() => {
+  "use strict";
+  const U = window.AlbumUtils || {};
+  const MAX_RETRIES = 4;
+
+  const notify = (message, level) => {
+    if (typeof window.showMessage === "function") {
+      return window.showMessage(message, level);
+    }
+    if (typeof window.alert === "function") {
+      window.alert(message);
+    }
+    return false;
+  };
+
+  const csrf = () => (U.getCSRF ? U.getCSRF() : "");
+  const resumeKey = (file, albumId) =>
+    `chunked_upload:${albumId}:${file.name}:${file.size}:${file.lastModified}`;
+
+  async function sha256Hex(file) {
+    // Hashing the whole file in the browser is only cheap for small files;
+    // the server hashes while assembling either way.
+    if (!window.crypto?.subtle || file.size > 64 * 1024 * 1024) return "";
+    const buf = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+    return [...new Uint8Array(buf)].map((b) => b.toString(16).padStart(2, "0")).join("");
+  }
+
+  async function postJSON(url, body) {
+    const res = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrf() },
+      body: JSON.stringify(body || {}),
+    });
+    const data = await res.json().catch(() => ({}));
+    if (!res.ok || data.ok === false) throw new Error(data.error || `HTTP ${res.status}`);
+    return data;
+  }
+
+  async function session(form, file) {
+    const key = resumeKey(file, form.dataset.albumId);
+    const saved = localStorage.getItem(key);
+    if (saved) {
+      // Ask the server what it already has
+      const res = await fetch(`${form.dataset.initiateUrl}${saved}/`);
+      if (res.ok) return { key, data: await res.json() };
+      localStorage.removeItem(key);
+    }
+    const data = await postJSON(form.dataset.initiateUrl, {
+      filename: file.name,
+      size: file.size,
+      name: form.querySelector("[name=name]")?.value || "",
+      album_id: form.dataset.albumId || null,
+      checksum: await sha256Hex(file),
+    });
+    localStorage.setItem(key, data.upload_id);
+    return { key, data };
+  }
+
+  async function putChunk(url, blob) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        const res = await fetch(url, {
+          method: "PUT",
+          headers: { "X-CSRFToken": csrf(), "Content-Type": "application/octet-stream" },
+          body: blob,
+        });
+        if (res.ok) return;
+        if (res.status < 500) throw Object.assign(new Error(`HTTP ${res.status}`), { fatal: true });
+      } catch (err) {
+        if (err.fatal || attempt >= MAX_RETRIES) throw err;
+      }
+      await new Promise((r) => setTimeout(r, 500 * 2 ** attempt));
+    }
+  }
+
+  async function upload(form) {
+    const file = form.querySelector("input[type=file]")?.files?.[0];
+    if (!file) return;
+    const bar = form.querySelector(".progress");
+    const fill = bar?.querySelector(".progress-bar");
+    bar?.classList.remove("d-none");
+
+    const { key, data } = await session(form, file);
+    const have = new Set(data.received || []);
+    const chunkUrl = (i) => data.chunk_url.replace(/\/0\/$/, `/${i}/`);
+
+    for (let i = 0; i < data.total_chunks; i++) {
+      if (!have.has(i)) {
+        const start = i * data.chunk_size;
+        await putChunk(chunkUrl(i), file.slice(start, start + data.chunk_size));
+      }
+      if (fill) fill.style.width = `${Math.round(((i + 1) / data.total_chunks) * 100)}%`;
+    }
+
+    await postJSON(data.finalize_url);
+    localStorage.removeItem(key);
+    window.location.reload();
+  }
+
+  document.addEventListener("submit", (e) => {
+    const form = e.target.closest("form.js-chunked-upload");
+    if (!form) return;
+    e.preventDefault();
+    upload(form).catch((err) => {
+      console.error("Chunked upload failed:", err);
+      notify(`Upload failed: ${err.message}`, "danger");
+    });
+  });
+})();
@@ -23,14 +23,22 @@
   // --- Config from data-* attributes (NO inline <script>) ---
   const TRACKS_JSON_URL = playerCard?.dataset.tracksUrl || null;
   const LOG_PLAY_URL_TMPL = playerCard?.dataset.logPlayUrl || null;
+  const QUEUE_URL = playerCard?.dataset.queueUrl || null; // signed-in users only
+  const SHUFFLE_URL = playerCard?.dataset.shuffleUrl || null; // server-side smart shuffle
 
   // --- State ---
   let tracks = [];
   let idx = -1;
   let shuffled = localStorage.getItem("player_shuffle") === "1";
+  let queueSig = ""; // track IDs last saved to the server queue
+  let lastQueueSave = 0;
+  let resumeAt = 0; // seconds to seek to once a resumed track is loaded
+  let shuffleOrder = null; // track IDs in server-generated play order
+  let shuffleSig = ""; // queue the order above was generated for
 
   // Convenience: are we on a page with checkboxes (track list)?
-  const checkboxMode = () => !!document.querySelector(".track-check");
+  // Lazy tab panes (track list pages) hold checkbox rows once loaded
+  const checkboxMode = () => !!document.querySelector(".track-check, [data-tab-url]");
 
   // --- Utils ---
   const clampIndex = (i) => (tracks.length ? (i + tracks.length) % tracks.length : -1);
@@ -187,6 +195,84 @@
     fetch(url, { method: "POST", headers: { "X-CSRFToken": csrf } }).catch(() => {});
   }
 
+  // --- Server-side queue (playlist:queue) so playback resumes across pages ---
+  const queueSignature = () => tracks.map((t) => t.id).join(",");
+
+  function saveQueue({ keepalive = false } = {}) {
+    if (!QUEUE_URL) return;
+    const body = {
+      cursor: Math.max(idx, 0),
+      shuffle: shuffled,
+      position: hasSource() ? audio.currentTime || 0 : 0,
+    };
+    const sig = queueSignature();
+    if (sig !== queueSig) {
+      const ids = tracks.map((t) => parseInt(t.id, 10));
+      if (!ids.every(Number.isFinite)) return; // rows without IDs can't be resumed
+      body.track_ids = ids;
+      queueSig = sig;
+    }
+    lastQueueSave = Date.now();
+    const csrf = typeof getCookie === "function" ? getCookie("csrftoken") : "";
+    fetch(QUEUE_URL, {
+      method: "POST",
+      keepalive,
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrf },
+      body: JSON.stringify(body),
+    }).catch(() => {});
+  }
+
+  async function resumeQueue() {
+    if (!QUEUE_URL || tracks.length) return false;
+    try {
+      const res = await fetch(QUEUE_URL);
+      if (!res.ok) return false;
+      const data = await res.json();
+      const list = Array.isArray(data?.tracks) ? data.tracks.filter((t) => t.src) : [];
+      if (!list.length) return false;
+
+      tracks = list.map((t) => ({ id: t.id, name: t.name || "Untitled", src: t.src }));
+      queueSig = queueSignature();
+      shuffled = !!data.shuffle;
+      localStorage.setItem("player_shuffle", shuffled ? "1" : "0");
+      updateShuffleUI();
+
+      idx = clampIndex(parseInt(data.cursor, 10) || 0);
+      resumeAt = Number(data.position) || 0;
+      audio.src = tracks[idx].src;
+      audio.load();
+      setNowPlaying("Resume");
+      highlightActiveButton();
+      setPlaypauseLabel();
+      return true;
+    } catch {
+      return false;
+    }
+  }
+
+  // --- Server-side shuffle order (playlist:queue_generate) ---
+  async function refreshShuffleOrder() {
+    if (!SHUFFLE_URL || !shuffled || tracks.length < 3) return;
+    const sig = queueSignature();
+    if (sig === shuffleSig) return;
+    const ids = tracks.map((t) => parseInt(t.id, 10));
+    if (!ids.every(Number.isFinite)) return; // fall back to random picks
+    shuffleSig = sig;
+    shuffleOrder = null;
+    try {
+      const csrf = typeof getCookie === "function" ? getCookie("csrftoken") : "";
+      const res = await fetch(SHUFFLE_URL, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "X-CSRFToken": csrf },
+        body: JSON.stringify({ seed: "ids", track_ids: ids, mode: "smart", first: ids[Math.max(idx, 0)] }),
+      });
+      const data = res.ok ? await res.json() : null;
+      if (sig === shuffleSig && Array.isArray(data?.track_ids)) shuffleOrder = data.track_ids.map(String);
+    } catch {
+      shuffleSig = "";
+    }
+  }
+
   function clearPlayback({ clearQueue = false, clearChecks = false } = {}) {
     audio.pause();
     audio.currentTime = 0;
@@ -196,6 +282,7 @@
 
     if (clearQueue) tracks = [];
     idx = -1;
+    resumeAt = 0;
 
     setNowPlaying();
     highlightActiveButton();
@@ -216,6 +303,7 @@
   function stopPlayback() {
     const useCheckboxQueue = checkboxMode();
     clearPlayback({ clearQueue: useCheckboxQueue, clearChecks: useCheckboxQueue });
+    saveQueue();
   }
 
   // --- Build queue from checked rows (DOM order) ---
@@ -303,12 +391,21 @@
     setPlaypauseLabel();
 
     if (t.id != null) logPlay(t.id);
+    resumeAt = 0;
+    saveQueue();
+    refreshShuffleOrder(); // no-op unless the queue changed while shuffling
   }
 
   function next() {
     if (!tracks.length) return;
     if (shuffled) {
       if (tracks.length === 1) return load(idx, true);
+      if (shuffleOrder && queueSignature() === shuffleSig) {
+        const pos = shuffleOrder.indexOf(String(tracks[idx]?.id));
+        const nextId = shuffleOrder[(pos + 1) % shuffleOrder.length];
+        const i = tracks.findIndex((t) => String(t.id) === nextId);
+        if (i !== -1 && i !== idx) return load(i, true);
+      }
       let r;
       do {
         r = Math.floor(Math.random() * tracks.length);
@@ -355,6 +452,8 @@
       shuffled = !shuffled;
       localStorage.setItem("player_shuffle", shuffled ? "1" : "0");
       updateShuffleUI();
+      saveQueue();
+      refreshShuffleOrder();
     });
   }
 
@@ -367,15 +466,23 @@
   audio.addEventListener("pause", () => {
     setPlaypauseLabel();
     highlightActiveButton();
+    if (!audio.ended) saveQueue();
+  });
+  window.addEventListener("pagehide", () => {
+    if (hasSource()) saveQueue({ keepalive: true });
   });
   audio.addEventListener("emptied", resetTimeline);
 
   audio.addEventListener("loadedmetadata", () => {
     if (durEl) durEl.textContent = fmt(audio.duration);
+    if (resumeAt > 0 && resumeAt < audio.duration) audio.currentTime = resumeAt;
+    resumeAt = 0;
   });
 
   audio.addEventListener("timeupdate", () => {
     if (curTimeEl) curTimeEl.textContent = fmt(audio.currentTime);
+    // Keep the saved position roughly current without chatty requests
+    if (!audio.paused && Date.now() - lastQueueSave > 15000) saveQueue();
     if (progress && audio.duration > 0) {
       progress.value = ((audio.currentTime / audio.duration) * 100).toFixed(2);
     }
@@ -443,7 +550,33 @@
   });
 
   // --- Bootstrap initial queue ---
-  document.addEventListener("DOMContentLoaded", () => {
+  function loadFromJson() {
+    fetch(TRACKS_JSON_URL)
+      .then((r) => r.json())
+      .then((data) => {
+        const list = Array.isArray(data?.tracks) ? data.tracks : [];
+        tracks = list
+          .map((t) => ({
+            id: t.id != null ? t.id : null,
+            name: t.name || t.title || "Untitled",
+            src: t.src || t.file_url || t.url || "",
+          }))
+          .filter((t) => t.src);
+
+        if (tracks.length) {
+          idx = 0;
+          setNowPlaying("Ready");
+          setPlaypauseLabel();
+        } else {
+          np && (np.textContent = "No tracks available");
+        }
+      })
+      .catch(() => {
+        np && (np.textContent = "Error loading tracks");
+      });
+  }
+
+  document.addEventListener("DOMContentLoaded", async () => {
     if (checkboxMode()) {
       // Build initial queue from any pre-checked rows
       rebuildQueueFromChecks({ maintainCurrent: false, autoplay: false });
@@ -458,31 +591,14 @@
       // Rebuild when user finishes a drag (tracks or albums)
       const albumsEl = document.getElementById("albums");
       if (albumsEl) albumsEl.addEventListener("dragend", () => rebuildQueueFromChecks({ maintainCurrent: true }));
+
+      // Nothing pre-checked: pick up where the user left off
+      await resumeQueue();
+    } else if (await resumeQueue()) {
+      // Resumed the saved server-side queue
     } else if (TRACKS_JSON_URL) {
       // Fallback: fetch from JSON if there is no checkbox UI on this page
-      fetch(TRACKS_JSON_URL)
-        .then((r) => r.json())
-        .then((data) => {
-          const list = Array.isArray(data?.tracks) ? data.tracks : [];
-          tracks = list
-            .map((t) => ({
-              id: t.id != null ? t.id : null,
-              name: t.name || t.title || "Untitled",
-              src: t.src || t.file_url || t.url || "",
-            }))
-            .filter((t) => t.src);
-
-          if (tracks.length) {
-            idx = 0;
-            setNowPlaying("Ready");
-            setPlaypauseLabel();
-          } else {
-            np && (np.textContent = "No tracks available");
-          }
-        })
-        .catch(() => {
-          np && (np.textContent = "Error loading tracks");
-        });
+      loadFromJson();
     } else {
       np && (np.textContent = "No data source configured");
     }
@@ -156,4 +156,45 @@
       btn.disabled = false;
     }
   });
+
+  // --- Switch / create playlists (templates/playlist/_playlist_switcher.html) ---
+  async function postJSON(url, body) {
+    const res = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": CSRF },
+      body: JSON.stringify(body || {}),
+    });
+    const data = await res.json().catch(() => ({}));
+    if (!res.ok || data.ok === false) throw new Error(data.error || "Request failed");
+    return data;
+  }
+
+  document.addEventListener("change", async (e) => {
+    const sel = e.target.closest(".js-playlist-switch");
+    if (!sel || !sel.value) return;
+    const url = sel.dataset.activateUrl.replace("/0/activate/", `/${sel.value}/activate/`);
+    sel.disabled = true;
+    try {
+      await postJSON(url);
+      window.location.reload();
+    } catch (err) {
+      console.error(err);
+      sel.disabled = false;
+    }
+  });
+
+  document.addEventListener("click", async (e) => {
+    const btn = e.target.closest(".js-playlist-new");
+    if (!btn) return;
+    const name = (window.prompt("New playlist name:") || "").trim();
+    if (!name) return;
+    btn.disabled = true;
+    try {
+      await postJSON(btn.dataset.url, { name });
+      window.location.reload();
+    } catch (err) {
+      if (typeof window.showMessage === "function") window.showMessage(err.message, "danger");
+      btn.disabled = false;
+    }
+  });
 })();
@@ -94,7 +94,13 @@
       const data = await resp.json().catch(() => ({}));
       // alert(data && data.ok ? (data.created ? "Album saved ✓" : "Album already saved.") : "Could not save album.");
       const ok = !!(data && data.ok);
-      if (ok) {
+      if (ok && typeof data.saved === "boolean") {
+        // Toggle endpoint: reflect the new state on the button
+        a.textContent = data.saved ? "✓ Saved" : "💾 Save Album";
+        a.classList.toggle("btn-success", data.saved);
+        a.classList.toggle("btn-outline-success", !data.saved);
+        notify(data.saved ? "Album saved ✓" : "Removed from saved albums.", "info");
+      } else if (ok) {
         const created = !!data.created;
         const message = created ? "Album saved ✓" : "Album already saved.";
         notify(message, created ? "success" : "info");
@@ -0,0 +1,62 @@
+/* jshint esversion: 11 */
+// "Listeners also played": fills [data-similar-url] sections from the
+// similar-tracks API with rows the inline/global player can play.
+(function () {
+  "use strict";
+
+  const fillId = (urlTmpl, id) => (urlTmpl ? urlTmpl.replace(/\/0\/?$/, "/" + id + "/") : "");
+
+  function row(t, logUrlTmpl) {
+    const li = document.createElement("li");
+    li.className = "list-group-item track-card d-flex align-items-center gap-2";
+    li.dataset.trackId = t.id;
+    li.dataset.src = t.src;
+    li.dataset.name = t.name;
+
+    const btn = document.createElement("button");
+    btn.type = "button";
+    btn.className = "btn btn-sm border-0 fs-5 js-inline-play";
+    btn.title = "Play/Pause";
+    btn.dataset.id = t.id;
+    btn.dataset.name = t.name;
+    btn.dataset.src = t.src;
+    btn.textContent = "▶";
+
+    const label = document.createElement("span");
+    label.className = "flex-grow-1";
+    label.textContent = t.name;
+
+    const by = document.createElement("small");
+    by.className = "text-muted";
+    by.textContent = "by " + t.owner;
+
+    const audio = document.createElement("audio");
+    audio.className = "inline-audio d-none";
+    audio.preload = "none";
+    audio.src = t.src;
+    if (logUrlTmpl) audio.dataset.logUrl = fillId(logUrlTmpl, t.id);
+
+    li.append(btn, label, by, audio);
+    return li;
+  }
+
+  async function load(section) {
+    const list = section.querySelector("ul");
+    if (!list) return;
+    try {
+      const res = await fetch(section.dataset.similarUrl, { headers: { Accept: "application/json" } });
+      if (!res.ok) return;
+      const data = await res.json();
+      const tracks = (data.tracks || []).filter((t) => t.src);
+      if (!tracks.length) return;
+      list.replaceChildren(...tracks.map((t) => row(t, section.dataset.logPlayUrl)));
+      section.classList.remove("d-none");
+    } catch {
+      /* recommendations are optional */
+    }
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("[data-similar-url]").forEach(load);
+  });
+})();
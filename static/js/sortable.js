@@ -27,16 +27,17 @@
   }
   const CSRF = getCookie("csrftoken");
 
-  const lists = document.querySelectorAll("[data-reorder-url]");
-  if (!lists.length) return;
+  function bind(list) {
+    if (list.dataset.sortableBound) return;
+    list.dataset.sortableBound = "1";
 
-  lists.forEach((list) => {
     // Ensure immediate children are draggable (safe even if already set)
     list.querySelectorAll(":scope > li").forEach((li) => {
       if (!li.hasAttribute("draggable")) li.setAttribute("draggable", "true");
     });
 
     let dragEl = null;
+    let startPrev = null;
 
     list.addEventListener("dragstart", (e) => {
       const li = e.target.closest("li[data-id]");
@@ -51,6 +52,7 @@
       }
 
       dragEl = li;
+      startPrev = siblingWithId(li, "prev");
       li.classList.add("dragging");
       e.dataTransfer.effectAllowed = "move";
       try {
@@ -74,23 +76,14 @@
       if (!dragEl) return;
       dragEl.classList.remove("dragging");
 
-      // Collect the new order
-      const ids = [...list.querySelectorAll(":scope > li[data-id]")].map((li) => {
-        const id = li.dataset.id;
-        return /^\d+$/.test(id) ? parseInt(id, 10) : id;
-      });
-
       try {
-        const res = await fetch(list.dataset.reorderUrl, {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-            "X-CSRFToken": CSRF || "",
-          },
-          body: JSON.stringify({ order: ids }),
-        });
-        if (!res.ok) throw new Error("HTTP " + res.status);
-        await res.json();
+        if (list.dataset.moveUrl) {
+          // Dropped where it started: nothing to save
+          if (siblingWithId(dragEl, "prev") === startPrev) return;
+          await saveMove(list, dragEl);
+        } else {
+          await saveFullOrder(list);
+        }
       } catch (err) {
         console.error("Reorder save failed:", err);
         notify("Couldn't save order. Please try again.", "danger");
@@ -98,7 +91,72 @@
         dragEl = null;
       }
     });
-  });
+  }
+
+  // Lists in the page now; lists inserted later (lazy tabs) call this
+  window.initSortable = (root = document) => {
+    root.querySelectorAll("[data-reorder-url]").forEach(bind);
+  };
+  window.initSortable();
+
+  function parseId(li) {
+    if (!li) return null;
+    const id = li.dataset.id;
+    return /^\d+$/.test(id) ? parseInt(id, 10) : id;
+  }
+
+  function siblingWithId(li, dir) {
+    let el = dir === "prev" ? li.previousElementSibling : li.nextElementSibling;
+    while (el && !el.matches("li[data-id]")) {
+      el = dir === "prev" ? el.previousElementSibling : el.nextElementSibling;
+    }
+    return el;
+  }
+
+  function postJSON(url, body) {
+    return fetch(url, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFToken": CSRF || "",
+      },
+      body: JSON.stringify(body),
+    });
+  }
+
+  // Send only the move itself: { moved_id, before_id, after_id } + version
+  async function saveMove(list, li) {
+    const afterId = parseId(siblingWithId(li, "prev"));
+    const beforeId = parseId(siblingWithId(li, "next"));
+    if (afterId === null && beforeId === null) return; // nothing to order against
+
+    const body = {
+      moved_id: parseId(li),
+      before_id: beforeId,
+      after_id: afterId,
+    };
+    if (list.dataset.listVersion !== undefined) {
+      body.version = parseInt(list.dataset.listVersion, 10) || 0;
+    }
+
+    const res = await postJSON(list.dataset.moveUrl, body);
+    if (res.status === 409) {
+      notify("This list was changed elsewhere. Reloading…", "warning");
+      window.location.reload();
+      return;
+    }
+    if (!res.ok) throw new Error("HTTP " + res.status);
+    const data = await res.json();
+    if (data.version !== undefined) list.dataset.listVersion = data.version;
+  }
+
+  async function saveFullOrder(list) {
+    const ids = [...list.querySelectorAll(":scope > li[data-id]")].map(parseId);
+    const res = await postJSON(list.dataset.reorderUrl, { order: ids });
+    if (!res.ok) throw new Error("HTTP " + res.status);
+    const data = await res.json();
+    if (data.version !== undefined) list.dataset.listVersion = data.version;
+  }
 
   function getAfter(container, y) {
     // IMPORTANT: don't rely on a class that may not exist; use all child LIs
@@ -86,34 +86,30 @@ const trackListNotify = (message, level) => {
 })();
 
 // ----------------------- Clear recent tracks list ----------------------- //
-document.addEventListener("DOMContentLoaded", () => {
-  const clearBtn = document.getElementById("clear-recent");
-  // const list = document.getElementById("recent-list");
+// Delegated: the Recently Played card is loaded with its tab
+document.addEventListener("click", async (e) => {
+  const clearBtn = e.target.closest("#clear-recent");
   const list = document.getElementById("recent-tracks");
+  if (!clearBtn || !list) return;
+  if (!confirm("Clear all recently played tracks?")) return;
 
-  if (clearBtn && list) {
-    clearBtn.addEventListener("click", async () => {
-      if (!confirm("Clear all recently played tracks?")) return;
-
-      try {
-        const res = await fetch(clearBtn.dataset.url, {
-          method: "POST",
-          headers: {
-            "X-CSRFToken": getCSRF(),
-            Accept: "application/json",
-          },
-          credentials: "same-origin",
-        });
-        const data = await res.json().catch(() => ({}));
-
-        if (data && data.ok) {
-          list.innerHTML = '<li class="list-group-item text-muted">No recently played tracks.</li>';
-        } else {
-          trackListNotify((data && data.error) || "Failed to clear recent list.", "danger");
-        }
-      } catch (err) {
-        console.error("Error clearing recent list:", err);
-      }
+  try {
+    const res = await fetch(clearBtn.dataset.url, {
+      method: "POST",
+      headers: {
+        "X-CSRFToken": getCSRF(),
+        Accept: "application/json",
+      },
+      credentials: "same-origin",
     });
+    const data = await res.json().catch(() => ({}));
+
+    if (data && data.ok) {
+      list.innerHTML = '<li class="list-group-item text-muted">No recently played tracks.</li>';
+    } else {
+      trackListNotify((data && data.error) || "Failed to clear recent list.", "danger");
+    }
+  } catch (err) {
+    console.error("Error clearing recent list:", err);
   }
 });
@@ -0,0 +1,42 @@
+// -------------------- static/js/track_tabs.js --------------------
+// Track list pages render an empty pane per tab (data-tab-url). The
+// visible tab's card is fetched right away, the others the first time
+// they are shown. Requests revalidate with the server's ETag, so a
+// revisit without changes costs a 304.
+(() => {
+  "use strict";
+
+  async function load(pane) {
+    if (!pane || !pane.dataset.tabUrl || pane.dataset.loaded || pane.dataset.loading) return;
+    pane.dataset.loading = "1";
+    try {
+      const res = await fetch(pane.dataset.tabUrl, {
+        cache: "no-cache",
+        credentials: "same-origin",
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      });
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      pane.innerHTML = await res.text();
+      pane.dataset.loaded = "1";
+
+      // Hydrate what page scripts bound at load time
+      if (window.initSortable) window.initSortable(pane);
+      if (window.normalizePlaylistButtons) window.normalizePlaylistButtons(pane);
+    } catch (err) {
+      console.error("Failed to load tab:", err);
+      pane.innerHTML = '<div class="text-danger small py-3">Couldn\'t load this list. Switch tabs to retry.</div>';
+    } finally {
+      delete pane.dataset.loading;
+    }
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    load(document.querySelector(".tab-pane.active[data-tab-url]"));
+  });
+
+  // Bootstrap fires shown.bs.tab on the tab button
+  document.addEventListener("shown.bs.tab", (e) => {
+    const target = e.target.dataset.bsTarget;
+    if (target) load(document.querySelector(target));
+  });
+})();
@@ -0,0 +1,139 @@
+# tracks/cards.py
+"""
+View-model for ``tracks/_track_card.html``.
+
+Every list of track cards is built by ``track_cards``. It runs one
+``values()`` query for the tracks (owner name and rating aggregates
+included) and one query per viewer flag, however many cards there are,
+and returns slotted TrackCardVM objects instead of model instances.
+The card template reads track data only from the fields defined here,
+so this class is the whole contract between views and the card. What
+the list around the card decides (album, row id, owner controls,
+checkbox, drag handle) is still passed to the include.
+
+Rows are track ids, or CardRow tuples for cards that stand for a row of
+an album or playlist: the row id is what reorder, rename and detach act
+on, and an album row's custom name is the name the card shows.
+"""
+from dataclasses import dataclass
+from typing import Iterable, NamedTuple, Optional, Union
+
+from album.labels import user_track_labels
+from album.models import AlbumTrack
+from playlist.utils import active_playlist_track_ids
+from ratings.utils import annotate_tracks
+from save_system.models import SavedTrack
+
+from .models import Favorite, Track
+
+_AUDIO_STORAGE = Track._meta.get_field("audio_file").storage
+
+
+@dataclass(slots=True)
+class TrackCardVM:
+    id: int
+    name: str
+    owner_id: int
+    owner_username: str
+    audio_url: str
+    source_url: str
+    display_name: str  # album row label, else viewer's label, else name
+    rating_avg: float = 0.0
+    rating_count: int = 0
+    user_rating: Optional[int] = None  # stars pre-selected on the card
+    is_favorited: bool = False
+    in_playlist: bool = False
+    is_in_my_albums: bool = False  # theirs, in one of their albums, or saved
+    is_my_track: bool = False
+    item_id: Optional[int] = None  # AlbumTrack / PlaylistItem row
+    custom_name: str = ""  # the album row's label
+
+
+class CardRow(NamedTuple):
+    track_id: int
+    item_id: Optional[int] = None
+    custom_name: str = ""
+
+
+def _viewer_flags(user, ids: set[int]) -> tuple[set, frozenset, set]:
+    """(favourite ids, playlist ids, in-my-albums ids)."""
+    favorites = set(
+        Favorite.objects.filter(owner=user, track_id__in=ids).values_list(
+            "track_id", flat=True
+        )
+    )
+    mine = set(
+        AlbumTrack.objects.filter(album__owner=user, track_id__in=ids).values_list(
+            "track_id", flat=True
+        )
+    )
+    mine.update(
+        SavedTrack.objects.filter(owner=user, original_track_id__in=ids).values_list(
+            "original_track_id", flat=True
+        )
+    )
+    return favorites, active_playlist_track_ids(user), mine
+
+
+def track_cards(
+    user, rows: Iterable[Union[int, CardRow]], *, own_labels: bool = False
+) -> list[TrackCardVM]:
+    """
+    Cards for ``rows``, in order; rows whose track is gone are skipped.
+    With ``own_labels`` a track the viewer has renamed in one of their
+    albums shows under that name (the player lists do this); the names
+    come from the viewer's cached label map (album.labels).
+    """
+    rows = [r if isinstance(r, CardRow) else CardRow(r) for r in rows]
+    ids = {r.track_id for r in rows}
+    if not ids:
+        return []
+
+    tracks = {
+        t["id"]: t
+        for t in annotate_tracks(Track.objects.filter(id__in=ids)).values(
+            "id",
+            "name",
+            "owner_id",
+            "owner__username",
+            "audio_file",
+            "source_url",
+            "rating_avg",
+            "rating_count",
+        )
+    }
+    uid = user.id if user.is_authenticated else None
+    favorites, in_playlist, mine = (
+        _viewer_flags(user, ids) if uid else (set(), frozenset(), set())
+    )
+    labels = user_track_labels(user) if own_labels else {}
+
+    cards = []
+    for row in rows:
+        t = tracks.get(row.track_id)
+        if t is None:
+            continue
+        tid = t["id"]
+        label = row.custom_name or labels.get(tid)
+        cards.append(
+            TrackCardVM(
+                id=tid,
+                name=t["name"],
+                owner_id=t["owner_id"],
+                owner_username=t["owner__username"],
+                audio_url=(
+                    _AUDIO_STORAGE.url(t["audio_file"]) if t["audio_file"] else ""
+                ),
+                source_url=t["source_url"] or "",
+                display_name=label or t["name"],
+                rating_avg=float(t["rating_avg"] or 0.0),
+                rating_count=t["rating_count"] or 0,
+                is_favorited=tid in favorites,
+                in_playlist=tid in in_playlist,
+                is_in_my_albums=t["owner_id"] == uid or tid in mine,
+                is_my_track=uid is not None and t["owner_id"] == uid,
+                item_id=row.item_id,
+                custom_name=row.custom_name or "",
+            )
+        )
+    return cards
@@ -42,11 +42,5 @@ class TrackForm(forms.ModelForm):
                     album=chosen_album, track=track
                 ).exists()
             ):
-                last = (
-                    AlbumTrack.objects.filter(album=chosen_album)
-                    .order_by("-position")
-                    .first()
-                )
-                pos = (last.position if last else 0) + 1
-                AlbumTrack.objects.create(album=chosen_album, track=track, position=pos)
+                AlbumTrack.objects.create(album=chosen_album, track=track)
         return track
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from tracks.similar import TOP_K, build_similar_tracks
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the SimilarTrack table from listens, favourites, saves, "
+        "playlists, ratings and album membership."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only rewrite tracks touched since the last finished run. "
+                "Every signal row is still read; this saves scoring and writes."
+            ),
+        )
+        parser.add_argument(
+            "-k", type=int, default=TOP_K, help="Neighbours kept per track."
+        )
+
+    def handle(self, *args, **options):
+        run = build_similar_tracks(
+            incremental=options["incremental"], k=max(1, options["k"])
+        )
+        kind = "Incremental" if run.incremental else "Full"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{kind} run updated neighbours for {run.tracks_updated} track(s)."
+            )
+        )
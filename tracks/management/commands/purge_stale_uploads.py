@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tracks.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished chunked uploads and orphaned spool directories."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=None,
+            help="Hours without a new chunk after which an unfinished upload "
+            "is purged (defaults to CHUNKED_UPLOAD_EXPIRY_HOURS).",
+        )
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options["hours"]) if options["hours"] else None
+        sessions, orphans = purge_stale(max_age)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {sessions} stale upload(s) and "
+                f"{orphans} orphaned spool dir(s)."
+            )
+        )
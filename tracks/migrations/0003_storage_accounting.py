@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0002_upload_session"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="audio_size",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:05
+
+import hashlib
+
+from django.db import migrations, models
+
+# Hash existing tracks so saved snapshots can be compared in SQL.
+BATCH = 1000
+
+
+def content_hash(*parts):
+    # As core.snapshots.content_hash was when this migration was written;
+    # copied so later changes there cannot alter the stored hashes
+    joined = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def fill_hashes(apps, schema_editor):
+    Model = apps.get_model("tracks", "Track")
+    batch = []
+    for obj in Model.objects.only("name").iterator(chunk_size=BATCH):
+        obj.content_hash = content_hash(obj.name)
+        batch.append(obj)
+        if len(batch) >= BATCH:
+            Model.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    Model.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracks", "0005_similar_tracks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="track",
+            name="content_hash",
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_hashes, migrations.RunPython.noop),
+    ]
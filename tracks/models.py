@@ -1,7 +1,11 @@
 # ----------------------- tracks/models.py ----------------------- #
+import uuid
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+
+from core.ordering import front_key
+from core.snapshots import HASH_LENGTH, content_hash, with_hash_field
 
 
 def track_upload_to(instance, filename):
@@ -17,15 +21,36 @@ class Track(models.Model):
 
     name = models.CharField(max_length=200, default="(untitled)")
     audio_file = models.FileField(upload_to="tracks/", blank=True, null=True)
+    # Size of audio_file in bytes, recorded at upload time so quota checks
+    # never have to ask the storage backend (see plans.signals)
+    audio_size = models.BigIntegerField(default=0, editable=False)
     source_url = models.URLField(blank=True, null=True)
     position = models.PositiveIntegerField(default=0)
     play_count = models.PositiveIntegerField(default=0)
     last_played_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Hash of the name, compared against saved snapshots
+    content_hash = models.CharField(max_length=HASH_LENGTH, blank=True, editable=False)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Keep audio_size in step with audio_file on partial saves
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "audio_file" in update_fields:
+            update_fields = {*update_fields, "audio_size"}
+        self.content_hash = content_hash(self.name)
+        kwargs["update_fields"] = with_hash_field(update_fields, ("name",))
+        # Storage accounting runs in pre/post_save signals; keep it in the
+        # same transaction as the row itself
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
 
 class Favorite(models.Model):
     owner = models.ForeignKey(
@@ -42,8 +67,8 @@ class Favorite(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
-    # NEW: persisted sort order
-    position = models.PositiveIntegerField(default=0)
+    # NEW: persisted sort order (sparse key, see core.ordering)
+    position = models.BigIntegerField(default=0)
 
     class Meta:
         unique_together = (("owner", "track"),)
@@ -53,6 +78,12 @@ class Favorite(models.Model):
             models.Index(fields=["owner", "position"]),
         ]
 
+    def save(self, *args, **kwargs):
+        # Newest favourites show on top until the user reorders them
+        if self._state.adding and self.position == 0:
+            self.position = front_key()
+        super().save(*args, **kwargs)
+
 
 class Listen(models.Model):
     user = models.ForeignKey(
@@ -67,3 +98,89 @@ class Listen(models.Model):
 
     def __str__(self):
         return f"{self.user} ▶ {self.track} @ {self.played_at:%Y-%m-%d %H:%M}"
+
+
+class UploadSession(models.Model):
+    """
+    Server-side state of a chunked, resumable audio upload.
+    Chunks are spooled to disk (see tracks.uploads); this row only records
+    what the client promised to send and where the result should go.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    # Optional album to drop the finished track into
+    album = models.ForeignKey(
+        "album.Album",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="upload_sessions",
+    )
+    name = models.CharField(max_length=200, default="(untitled)")
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # Optional client-side SHA-256 (hex) verified on finalize
+    checksum = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"])]
+
+    def __str__(self):
+        return f"{self.owner} ⇪ {self.filename} ({self.total_size} bytes)"
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def expected_chunk_size(self, index: int) -> int:
+        """Byte length the chunk at ``index`` must have (last one may be short)."""
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.total_size - self.chunk_size * (self.total_chunks - 1)
+
+
+class SimilarTrack(models.Model):
+    """
+    Precomputed "listeners also played" neighbour of a track (top K per
+    track, see tracks.similar). Rebuilt offline; never written by views.
+    """
+
+    track = models.ForeignKey(
+        "Track", on_delete=models.CASCADE, related_name="similar_rows"
+    )
+    similar = models.ForeignKey("Track", on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (("track", "similar"),)
+        indexes = [models.Index(fields=["track", "-score"])]
+        ordering = ["-score"]
+
+    def __str__(self):
+        return f"{self.track_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
+class SimilarityRun(models.Model):
+    """One run of build_similar_tracks; the last finished one is the
+    watermark an incremental run starts from."""
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    incremental = models.BooleanField(default=False)
+    tracks_updated = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        kind = "incremental" if self.incremental else "full"
+        return f"{kind} similarity run @ {self.started_at:%Y-%m-%d %H:%M}"
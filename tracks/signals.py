@@ -0,0 +1,60 @@
+# tracks/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from album.models import AlbumTrack
+from album.signals import touch_albums
+from core import stamps
+from playlist.models import PlaylistItem
+from save_system.models import SavedTrack
+
+from .models import Favorite, Listen, Track
+
+# Saved on every play but not shown on any page
+PLAY_FIELDS = frozenset({"play_count", "last_played_at"})
+
+
+@receiver(post_save, sender=Track)
+def track_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= PLAY_FIELDS:
+        return
+    stamps.touch_user(instance.owner_id, "tracks")
+    if created:
+        return
+    # A rename shows wherever the track is listed, not only on its owner's pages
+    for album_id, owner_id, is_public in AlbumTrack.objects.filter(
+        track=instance
+    ).values_list("album_id", "album__owner_id", "album__is_public"):
+        touch_albums(owner_id, album_id, is_public)
+    listed_by = (
+        Favorite.objects.filter(track=instance).order_by().values_list("owner_id")
+    ).union(
+        PlaylistItem.objects.filter(track=instance)
+        .order_by()
+        .values_list("playlist__owner_id"),
+        SavedTrack.objects.filter(original_track=instance)
+        .order_by()
+        .values_list("owner_id"),
+        # Recent plays list it too
+        Listen.objects.filter(track=instance).order_by().values_list("user_id"),
+    )
+    for (user_id,) in listed_by:
+        stamps.touch_user(user_id, "library")
+
+
+@receiver(post_delete, sender=Track)
+def track_deleted(sender, instance, **kwargs):
+    # Album, favourite and playlist rows cascade and send their own signals
+    stamps.touch_user(instance.owner_id, "tracks")
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    stamps.touch_user(instance.owner_id, "library")
+
+
+@receiver(post_save, sender=Listen)
+@receiver(post_delete, sender=Listen)
+def listen_changed(sender, instance, **kwargs):
+    stamps.touch_user(instance.user_id, "library")
@@ -0,0 +1,381 @@
+# tracks/similar.py
+"""
+Item-based "similar tracks" built from what people do with tracks.
+
+Every signal links a *context* to a track: a user (listened, favourited,
+saved, playlisted or rated it 4★+) or an album (the track is on it). The
+job streams those rows in keyset-paginated chunks, folds them into one
+weighted context × track matrix held as NumPy CSR arrays, and scores each
+track's neighbours by (shrunk) cosine similarity of their context vectors.
+The top ``K`` per track are stored in SimilarTrack for cheap lookups.
+
+Memory is bounded by the number of distinct (context, track) pairs, not by
+the number of raw rows: chunks are de-duplicated as they stream in.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from album.models import AlbumTrack
+from playlist.models import PlaylistItem
+from ratings.models import TrackRating
+from save_system.models import SavedTrack
+
+from .models import Favorite, Listen, SimilarityRun, SimilarTrack, Track
+
+TOP_K = 20
+CHUNK_SIZE = 20_000
+MAX_CONTEXT_ITEMS = 500  # heaviest contexts keep only their strongest tracks
+SHRINK = 5.0  # damp scores backed by only a handful of shared contexts
+WRITE_BATCH = 500
+
+USER, ALBUM = 0, 1  # low bit of a context ID
+
+
+@dataclass(frozen=True)
+class Signal:
+    """One source table: which columns give the context and the track."""
+
+    model: type
+    kind: int
+    context: str
+    track: str
+    weight: float
+    stamp: str  # timestamp column, for incremental runs
+    extra: Q = Q()
+
+    def rows(self, since: Optional[datetime] = None) -> Iterator[np.ndarray]:
+        """Stream (context, track) pairs as int64 arrays of shape (n, 2)."""
+        qs = self.model._default_manager.filter(self.extra).exclude(
+            **{f"{self.track}__isnull": True}
+        )
+        if since is not None:
+            qs = qs.filter(**{f"{self.stamp}__gte": since})
+        qs = qs.order_by("pk").values_list("pk", self.context, self.track)
+        last = None
+        while True:
+            page = qs.filter(pk__gt=last) if last is not None else qs
+            chunk = list(page[:CHUNK_SIZE])
+            if not chunk:
+                return
+            last = chunk[-1][0]
+            arr = np.array([r[1:] for r in chunk], dtype=np.int64)
+            arr[:, 0] = arr[:, 0] * 2 + self.kind
+            yield arr
+
+
+SIGNALS = (
+    Signal(Listen, USER, "user_id", "track_id", 1.0, "played_at"),
+    Signal(Favorite, USER, "owner_id", "track_id", 3.0, "created_at"),
+    Signal(SavedTrack, USER, "owner_id", "original_track_id", 3.0, "saved_at"),
+    Signal(PlaylistItem, USER, "playlist__owner_id", "track_id", 2.0, "added_at"),
+    Signal(
+        TrackRating, USER, "user_id", "track_id", 2.0, "updated_at", Q(stars__gte=4)
+    ),
+    Signal(AlbumTrack, ALBUM, "album_id", "track_id", 1.0, "created_at"),
+)
+
+
+# -------------------------- Matrix --------------------------
+
+
+def _compact(ctx: np.ndarray, item: np.ndarray, w: np.ndarray):
+    """Merge duplicate (context, track) pairs, summing their weights."""
+    if not len(ctx):
+        return ctx, item, w
+    order = np.lexsort((item, ctx))
+    ctx, item, w = ctx[order], item[order], w[order]
+    first = np.ones(len(ctx), dtype=bool)
+    first[1:] = (ctx[1:] != ctx[:-1]) | (item[1:] != item[:-1])
+    starts = np.flatnonzero(first)
+    return ctx[starts], item[starts], np.add.reduceat(w, starts)
+
+
+def collect_pairs(signals: Iterable[Signal] = SIGNALS):
+    """All signals as de-duplicated (context, track, weight) arrays."""
+    ctx = np.zeros(0, dtype=np.int64)
+    item = np.zeros(0, dtype=np.int64)
+    w = np.zeros(0, dtype=np.float64)
+    pending = []
+    pending_rows = 0
+    for signal in signals:
+        for arr in signal.rows():
+            pending.append((arr, signal.weight))
+            pending_rows += len(arr)
+            if pending_rows >= CHUNK_SIZE * 10:
+                ctx, item, w = _fold(ctx, item, w, pending)
+                pending, pending_rows = [], 0
+    return _fold(ctx, item, w, pending)
+
+
+def _fold(ctx, item, w, pending):
+    if not pending:
+        return ctx, item, w
+    ctx = np.concatenate([ctx] + [a[:, 0] for a, _ in pending])
+    item = np.concatenate([item] + [a[:, 1] for a, _ in pending])
+    w = np.concatenate([w] + [np.full(len(a), wt) for a, wt in pending])
+    return _compact(ctx, item, w)
+
+
+@dataclass
+class Csr:
+    """Rows of (column, value) pairs: indptr/indices/data as in SciPy."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+    @classmethod
+    def build(cls, rows: np.ndarray, cols: np.ndarray, data: np.ndarray, n: int):
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return cls(indptr, cols[order], data[order])
+
+    def row(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return self.indices[a:b], self.data[a:b]
+
+    def gather(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Concatenated entries of several rows, plus each entry's row slot."""
+        starts = self.indptr[rows]
+        lens = self.indptr[rows + 1] - starts
+        total = int(lens.sum())
+        slot = np.repeat(np.arange(len(rows)), lens)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lens) - lens, lens)
+        pos = starts[slot] + offsets
+        return self.indices[pos], self.data[pos], slot
+
+
+@dataclass
+class CoMatrix:
+    """Weighted context × track matrix in both orientations."""
+
+    track_ids: np.ndarray  # dense track index -> Track.id
+    context_ids: np.ndarray  # dense context index -> encoded context
+    by_context: Csr
+    by_track: Csr
+    norms: np.ndarray
+
+    @classmethod
+    def from_pairs(cls, ctx, item, w) -> "CoMatrix":
+        # Dampen heavy repetition (a track played 200 times is not 200x
+        # stronger evidence than one played a few times)
+        w = np.log1p(w)
+        track_ids, t = np.unique(item, return_inverse=True)
+        context_ids, c = np.unique(ctx, return_inverse=True)
+
+        # Cap each context at its MAX_CONTEXT_ITEMS strongest tracks so one
+        # huge library cannot dominate the (quadratic) co-occurrence count
+        order = np.lexsort((-w, c))
+        c, t, w = c[order], t[order], w[order]
+        sizes = np.bincount(c, minlength=len(context_ids))
+        rank = np.arange(len(c)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        keep = rank < MAX_CONTEXT_ITEMS
+        c, t, w = c[keep], t[keep], w[keep]
+
+        by_context = Csr.build(c, t, w, len(context_ids))
+        by_track = Csr.build(t, c, w, len(track_ids))
+        norms = np.sqrt(np.bincount(t, weights=w * w, minlength=len(track_ids)))
+        return cls(track_ids, context_ids, by_context, by_track, norms)
+
+    def index_of(self, ids) -> np.ndarray:
+        """Dense indexes of the given Track IDs that appear in the matrix."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if not len(ids) or not len(self.track_ids):
+            return np.zeros(0, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.track_ids, ids), len(self.track_ids) - 1)
+        return np.unique(pos[self.track_ids[pos] == ids])
+
+    def neighbours(self, i: int, k: int = TOP_K) -> tuple[np.ndarray, np.ndarray]:
+        """Top ``k`` (track index, score) for track index ``i``."""
+        ctxs, wi = self.by_track.row(i)
+        if not len(ctxs):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        others, wj, slot = self.by_context.gather(ctxs)
+        uniq, inv = np.unique(others, return_inverse=True)
+        dot = np.bincount(inv, weights=wi[slot] * wj, minlength=len(uniq))
+        shared = np.bincount(inv, minlength=len(uniq))
+        score = dot / (self.norms[i] * self.norms[uniq]) * (shared / (shared + SHRINK))
+        score[uniq == i] = 0.0
+        if len(uniq) > k:
+            top = np.argpartition(-score, k)[:k]
+        else:
+            top = np.arange(len(uniq))
+        top = top[score[top] > 0]
+        top = top[np.argsort(-score[top], kind="stable")]
+        return uniq[top], score[top]
+
+    def tracks_in_contexts(self, context_ids) -> np.ndarray:
+        """Dense indexes of every track sharing one of the given contexts."""
+        ids = np.asarray(list(context_ids), dtype=np.int64)
+        if not len(ids) or not len(self.context_ids):
+            return np.zeros(0, dtype=np.int64)
+        pos = np.minimum(
+            np.searchsorted(self.context_ids, ids), len(self.context_ids) - 1
+        )
+        rows = np.unique(pos[self.context_ids[pos] == ids])
+        tracks, _, _ = self.by_context.gather(rows)
+        return np.unique(tracks)
+
+
+# -------------------------- Job --------------------------
+
+
+def touched_since(since: datetime) -> tuple[set, set]:
+    """Contexts and tracks with new signal rows since ``since``."""
+    contexts, tracks = set(), set()
+    for signal in SIGNALS:
+        for arr in signal.rows(since):
+            contexts.update(arr[:, 0].tolist())
+            tracks.update(arr[:, 1].tolist())
+    return contexts, tracks
+
+
+def _write(matrix: CoMatrix, targets: np.ndarray, k: int) -> int:
+    """Replace the stored neighbour lists of ``targets`` (dense indexes)."""
+    written = 0
+    for start in range(0, len(targets), WRITE_BATCH):
+        batch = targets[start : start + WRITE_BATCH]
+        rows = []
+        for i in batch:
+            nbrs, scores = matrix.neighbours(int(i), k)
+            tid = int(matrix.track_ids[i])
+            rows.extend(
+                SimilarTrack(track_id=tid, similar_id=int(j), score=float(s))
+                for j, s in zip(matrix.track_ids[nbrs], scores)
+            )
+        with transaction.atomic():
+            SimilarTrack.objects.filter(
+                track_id__in=matrix.track_ids[batch].tolist()
+            ).delete()
+            SimilarTrack.objects.bulk_create(rows, batch_size=1000)
+        written += len(batch)
+    return written
+
+
+def _delete_stale(matrix: CoMatrix) -> None:
+    """Drop stored neighbours of tracks that lost every signal."""
+    stored = np.fromiter(
+        SimilarTrack.objects.order_by()
+        .values_list("track_id", flat=True)
+        .distinct()
+        .iterator(),
+        dtype=np.int64,
+    )
+    stale = stored[~np.isin(stored, matrix.track_ids)].tolist()
+    for start in range(0, len(stale), WRITE_BATCH):
+        SimilarTrack.objects.filter(
+            track_id__in=stale[start : start + WRITE_BATCH]
+        ).delete()
+
+
+def _listing(track_ids: set) -> list[int]:
+    """Tracks whose stored neighbours include one of ``track_ids``."""
+    ids = sorted(track_ids)
+    out = []
+    for start in range(0, len(ids), WRITE_BATCH):
+        out.extend(
+            SimilarTrack.objects.filter(
+                similar_id__in=ids[start : start + WRITE_BATCH]
+            ).values_list("track_id", flat=True)
+        )
+    return out
+
+
+def build_similar_tracks(incremental: bool = False, k: int = TOP_K) -> SimilarityRun:
+    """
+    Recompute stored neighbours. A full run rewrites every track; an
+    incremental run only the tracks sharing a context with new activity
+    since the last finished run (plus tracks currently listing those as
+    neighbours).
+
+    Both kinds read and fold every signal row: a neighbour list depends on
+    all of a track's contexts, not just the new ones. Incremental runs save
+    the similarity scoring and the writes, not the read. Removals
+    (un-favourite etc.) leave no timestamp, so a full run should still
+    happen periodically.
+    """
+    last = (
+        SimilarityRun.objects.filter(finished_at__isnull=False)
+        .order_by("-started_at")
+        .first()
+    )
+    incremental = incremental and last is not None
+    run = SimilarityRun.objects.create(
+        started_at=timezone.now(), incremental=incremental
+    )
+
+    matrix = CoMatrix.from_pairs(*collect_pairs())
+    if incremental:
+        contexts, tracks = touched_since(last.started_at)
+        affected = set(matrix.tracks_in_contexts(contexts).tolist())
+        affected.update(matrix.index_of(tracks).tolist())
+        affected.update(matrix.index_of(_listing(tracks)).tolist())
+        targets = np.array(sorted(affected), dtype=np.int64)
+    else:
+        targets = np.arange(len(matrix.track_ids))
+        _delete_stale(matrix)
+
+    run.tracks_updated = _write(matrix, targets, k)
+    run.finished_at = timezone.now()
+    run.save(update_fields=["tracks_updated", "finished_at"])
+    return run
+
+
+# -------------------------- Lookups --------------------------
+
+
+def similar_to(track_ids, user=None, limit: int = 10) -> list[tuple[Track, float]]:
+    """
+    Tracks most similar to ``track_ids`` (scores summed across seeds),
+    excluding the seeds themselves. Only tracks the user may play are
+    returned: their own, or ones on a public album.
+    """
+    seeds = list(track_ids)
+    scores: dict[int, float] = {}
+    rows = SimilarTrack.objects.filter(track_id__in=seeds).exclude(similar_id__in=seeds)
+    for sid, score in rows.values_list("similar_id", "score"):
+        scores[sid] = scores.get(sid, 0.0) + score
+    if not scores:
+        return []
+
+    visible = Q(track_albums__album__is_public=True)
+    if user is not None and user.is_authenticated:
+        visible |= Q(owner=user)
+    ranked = sorted(scores, key=scores.get, reverse=True)[: limit * 3]
+    tracks = (
+        Track.objects.filter(visible, id__in=ranked)
+        .select_related("owner")
+        .distinct()
+        .in_bulk()
+    )
+    out = [(tracks[t], scores[t]) for t in ranked if t in tracks]
+    return out[:limit]
+
+
+def similar_payload(pairs) -> list[dict]:
+    """JSON-ready rows for the API: what the player needs to queue them."""
+    out = []
+    for track, score in pairs:
+        src = ""
+        if getattr(track, "audio_file", None):
+            try:
+                src = track.audio_file.url
+            except Exception:
+                src = ""
+        out.append(
+            {
+                "id": track.id,
+                "name": track.name,
+                "owner": track.owner.username,
+                "src": src or track.source_url or "",
+                "score": round(score, 4),
+            }
+        )
+    return out
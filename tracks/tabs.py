@@ -0,0 +1,89 @@
+# tracks/tabs.py
+"""
+Per-tab fragments for the track list pages.
+
+track_list and track_list_public render only the player and the tab
+strip. Each tab's card is fetched from ``track_list_tab`` when the tab is
+first shown (the visible one straight after page load), so the page no
+longer waits on the whole library and a tab nobody opens costs nothing.
+Each loader below runs only the queries its own tab needs; signed-in
+fragments revalidate with ETags from change stamps (core.stamps).
+
+Guests have no favourites; their playlist and recent tracks come from
+request.guest (core.guest).
+"""
+from typing import Optional
+
+from django.db.models import Max
+
+from playlist.models import Playlist, PlaylistItem
+from playlist.utils import get_active_playlist
+
+from .cards import CardRow, track_cards
+from .models import Favorite, Listen
+
+RECENT_LIMIT = 25
+
+
+def _guest_cards(request, ids):
+    cards = track_cards(request.user, ids)
+    for card in cards:
+        card.in_playlist = card.id in request.guest.playlist
+    return cards
+
+
+def playlist_tab(request) -> dict:
+    user = request.user
+    if not user.is_authenticated:
+        return {"guest_tracks": _guest_cards(request, request.guest.playlist.ids())}
+
+    # Read-only: never create the playlist here
+    playlist = get_active_playlist(user, create=False)
+    rows = (
+        PlaylistItem.objects.filter(playlist=playlist)
+        .order_by("position", "id")
+        .values_list("track_id", "id")
+    )
+    return {
+        "playlist": playlist,
+        "playlists": Playlist.objects.filter(owner=user),
+        "playlist_items": track_cards(
+            user, [CardRow(*row) for row in rows], own_labels=True
+        ),
+    }
+
+
+def favorites_tab(request) -> Optional[dict]:
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    fav_ids = (
+        Favorite.objects.filter(owner=user)
+        .order_by("position", "-created_at")
+        .values_list("track_id", flat=True)
+    )
+    return {"favorites": track_cards(user, fav_ids, own_labels=True)}
+
+
+def recent_tab(request) -> dict:
+    user = request.user
+    if not user.is_authenticated:
+        return {"recent": _guest_cards(request, request.guest.recent.ids())}
+
+    latest_per_track = (
+        Listen.objects.filter(user=user)
+        .values("track")
+        .annotate(last_played=Max("played_at"))
+        .order_by("-last_played")[:RECENT_LIMIT]
+    )
+    recent_ids = [row["track"] for row in latest_per_track]
+    return {"recent": track_cards(user, recent_ids, own_labels=True)}
+
+
+# Tab name -> loader; a loader returns the fragment's context, or None when
+# the tab does not exist for this visitor
+LOADERS = {
+    "playlist": playlist_tab,
+    "favorites": favorites_tab,
+    "recent": recent_tab,
+}
@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from profile_page.models import UserProfile
+from ratings.models import TrackRating
+from save_system.models import SavedTrack
+from tracks.cards import CardRow, TrackCardVM, track_cards
+from tracks.models import Favorite, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TrackCardsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.me = User.objects.create_user(username="me", password="pw")
+            self.other = User.objects.create_user(username="other", password="pw")
+            for user in (self.me, self.other):
+                UserProfile.objects.get_or_create(user=user)
+            self.mine = Track.objects.create(owner=self.me, name="mine")
+            self.theirs = [
+                Track.objects.create(owner=self.other, name=f"theirs{i}")
+                for i in range(3)
+            ]
+            self.album = Album.objects.create(owner=self.me, name="A", is_public=True)
+            self.row = AlbumTrack.objects.create(
+                album=self.album, track=self.theirs[0], custom_name="my label"
+            )
+            Favorite.objects.create(owner=self.me, track=self.theirs[1])
+            TrackRating.objects.create(user=self.other, track=self.mine, stars=4)
+
+    def test_flags_and_names(self):
+        cards = track_cards(self.me, [self.mine.id, *(t.id for t in self.theirs)])
+        self.assertTrue(all(isinstance(c, TrackCardVM) for c in cards))
+        mine, labelled, favourite, plain = cards
+
+        self.assertTrue(mine.is_my_track and mine.is_in_my_albums)
+        self.assertEqual((mine.rating_avg, mine.rating_count), (4.0, 1))
+        self.assertEqual(mine.owner_username, "me")
+
+        self.assertTrue(labelled.is_in_my_albums)
+        self.assertEqual(labelled.display_name, "theirs0")
+        self.assertTrue(favourite.is_favorited)
+        self.assertFalse(plain.is_favorited or plain.is_in_my_albums)
+
+        (own_label,) = track_cards(self.me, [self.theirs[0].id], own_labels=True)
+        self.assertEqual(own_label.display_name, "my label")
+
+    def test_rows_and_guests(self):
+        (card,) = track_cards(
+            User(), [CardRow(self.theirs[0].id, self.row.id, "my label"), 0]
+        )
+        self.assertEqual((card.item_id, card.display_name), (self.row.id, "my label"))
+        self.assertFalse(card.is_in_my_albums or card.is_my_track)
+        with self.assertRaises(AttributeError):
+            card.extra = 1  # slotted: the card has no other attributes
+
+    def test_query_count_does_not_grow(self):
+        ids = [self.mine.id, *(t.id for t in self.theirs)]
+        track_cards(self.me, ids)  # caches the active playlist lookup
+        with CaptureQueriesContext(connection) as one:
+            track_cards(self.me, ids[:1])
+        with CaptureQueriesContext(connection) as many:
+            track_cards(self.me, ids)
+        self.assertEqual(len(many), len(one))
+
+    def test_pages_render_cards(self):
+        SavedTrack.objects.create(
+            owner=self.me,
+            original_track=self.theirs[2],
+            album=self.album,
+            name_snapshot="saved name",
+        )
+        self.client.force_login(self.me)
+        pages = [
+            reverse("album:album_detail", args=[self.album.pk]),
+            reverse("album:public_album_detail", args=[self.album.slug]),
+            reverse("album:album_tracks_fragment", args=[self.album.pk]),
+            reverse("profile:public_profile", args=["me"]),
+        ]
+        for url in pages:
+            with self.subTest(url=url):
+                res = self.client.get(url)
+                self.assertContains(res, "my label")
+                self.assertContains(res, 'by <span class="fw-bold">other</span>')
+
+        ajax = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+        found = self.client.get(
+            reverse("search"), {"q": "theirs", "t": "tracks"}, **ajax
+        )
+        self.assertIn("theirs0", found.json()["html"]["tracks"])
+        found = self.client.get(reverse("album:unified_search"), {"q": "theirs"})
+        self.assertIn("my label", found.json()["tracks_html"])
+        saved = self.client.post(
+            reverse("save_system:save_track", args=[self.theirs[1].pk]),
+            {"album_id": self.album.pk},
+            **ajax,
+        )
+        self.assertIn("♥", saved.json()["html"])
+
+        self.assertContains(self.client.get(reverse("favorites_list")), "theirs1")
+        saved = self.client.get(reverse("album:album_list"))
+        self.assertContains(saved, "saved name")
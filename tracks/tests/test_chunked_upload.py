@@ -0,0 +1,143 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from album.models import AlbumTrack
+from checkout.models import Order, OrderItem
+from plans.models import Plan
+from plans.utils import get_storage_used
+from tracks.models import Track, UploadSession
+from tracks.uploads import purge_stale, spool_dir, write_chunk
+
+SPOOL = tempfile.mkdtemp()
+MEDIA = tempfile.mkdtemp()
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    CHUNKED_UPLOAD_ROOT=SPOOL,
+    CHUNKED_UPLOAD_CHUNK_SIZE=4,
+    MEDIA_ROOT=MEDIA,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SPOOL, ignore_errors=True)
+        shutil.rmtree(MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="pw")
+        self.client.force_login(self.user)
+        self.album = self.user.albums.get(is_default=True)
+
+    def _buy_storage(self):
+        plan = Plan.objects.create(name="1GB", price=7, storage_gb=1)
+        order = Order.objects.create(user=self.user, full_name="U", email="u@x.io")
+        OrderItem.objects.create(order=order, plan=plan, price=plan.price)
+
+    def _initiate(self, data):
+        return self.client.post(
+            reverse("upload_initiate"),
+            json.dumps(data),
+            content_type="application/json",
+        )
+
+    def test_quota_is_checked_at_initiate(self):
+        res = self._initiate({"filename": "a.flac", "size": 10})
+        self.assertEqual(res.status_code, 403)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_chunks_resume_and_finalize_into_track(self):
+        self._buy_storage()
+        payload = b"0123456789"
+        res = self._initiate(
+            {
+                "filename": "song.flac",
+                "size": len(payload),
+                "album_id": self.album.id,
+                "checksum": hashlib.sha256(payload).hexdigest(),
+            }
+        )
+        self.assertEqual(res.status_code, 201)
+        upload_id = res.json()["upload_id"]
+        self.assertEqual(res.json()["total_chunks"], 3)
+
+        def put(i, body):
+            return self.client.put(
+                reverse("upload_chunk", args=[upload_id, i]),
+                body,
+                content_type="application/octet-stream",
+            )
+
+        self.assertEqual(put(2, payload[8:]).status_code, 200)
+        self.assertEqual(put(0, payload[:3]).status_code, 400)  # wrong length
+        self.assertEqual(put(0, payload[:4]).status_code, 200)
+
+        finalize = reverse("upload_finalize", args=[upload_id])
+        res = self.client.post(finalize)
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.json()["missing"], [1])
+
+        status = self.client.get(reverse("upload_status", args=[upload_id]))
+        self.assertEqual(status.json()["received"], [0, 2])
+
+        self.assertEqual(put(1, payload[4:8]).status_code, 200)
+        res = self.client.post(finalize)
+        self.assertEqual(res.status_code, 200, res.content)
+
+        track = Track.objects.get(pk=res.json()["track_id"])
+        with track.audio_file.open("rb") as fh:
+            self.assertEqual(fh.read(), payload)
+        self.assertTrue(AlbumTrack.objects.filter(album=self.album, track=track))
+        self.assertFalse(UploadSession.objects.exists())
+
+        # The quota counter follows the track without asking the storage
+        self.assertEqual(get_storage_used(self.user), len(payload))
+        track.delete()
+        self.assertEqual(get_storage_used(self.user), 0)
+
+    def test_purge_expires_by_last_chunk_not_by_initiate(self):
+        day_ago = timezone.now() - timedelta(days=1, hours=1)
+        old = (day_ago - timedelta(hours=1)).timestamp()
+        sessions = [
+            UploadSession.objects.create(
+                owner=self.user, filename=f"{i}.flac", total_size=8, chunk_size=4
+            )
+            for i in range(2)
+        ]
+        UploadSession.objects.update(updated_at=day_ago)
+        for session in sessions:
+            write_chunk(session, 0, io.BytesIO(b"abcd"))
+        os.utime(spool_dir(sessions[1]), (old, old))  # gave up a day ago
+
+        fresh_orphan = os.path.join(SPOOL, str(uuid.uuid4()))
+        old_orphan = os.path.join(SPOOL, str(uuid.uuid4()))
+        for path in (fresh_orphan, old_orphan):
+            os.makedirs(path)
+        os.utime(old_orphan, (old, old))
+
+        self.assertEqual(purge_stale(), (1, 1))
+        self.assertEqual(list(UploadSession.objects.all()), sessions[:1])
+        self.assertTrue(os.path.isdir(spool_dir(sessions[0])))
+        self.assertFalse(os.path.exists(spool_dir(sessions[1])))
+        self.assertTrue(os.path.isdir(fresh_orphan))
+        self.assertFalse(os.path.exists(old_orphan))
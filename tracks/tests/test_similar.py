@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from album.models import Album, AlbumTrack
+from tracks import similar
+from tracks.models import Favorite, Listen, SimilarTrack, Track
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SimilarTracksTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="o", password="pw")
+        self.album = Album.objects.create(owner=self.owner, name="A", is_public=True)
+        self.a, self.b, self.c, self.d = [
+            Track.objects.create(
+                owner=self.owner, name=n, source_url=f"https://x.io/{n}.mp3"
+            )
+            for n in "abcd"
+        ]
+        for t in (self.a, self.b, self.c, self.d):
+            AlbumTrack.objects.create(album=self.album, track=t)
+        # a and b are played together by several listeners; c only once
+        for i in range(3):
+            u = User.objects.create_user(username=f"l{i}", password="pw")
+            Listen.objects.create(user=u, track=self.a)
+            Favorite.objects.create(owner=u, track=self.b)
+        Listen.objects.create(user=u, track=self.c)
+
+    def neighbours(self, track):
+        return list(
+            SimilarTrack.objects.filter(track=track).values_list(
+                "similar_id", flat=True
+            )
+        )
+
+    def test_full_build_ranks_cooccurring_tracks_first(self):
+        call_command("build_similar_tracks", stdout=StringIO())
+        self.assertEqual(self.neighbours(self.a)[0], self.b.id)
+        self.assertNotIn(self.a.id, self.neighbours(self.a))
+
+    def test_chunks_and_context_cap_do_not_change_result(self):
+        similar.build_similar_tracks()
+        expected = {t.id: self.neighbours(t) for t in (self.a, self.b, self.c)}
+        old = similar.CHUNK_SIZE, similar.MAX_CONTEXT_ITEMS
+        similar.CHUNK_SIZE, similar.MAX_CONTEXT_ITEMS = 1, 4
+        try:
+            similar.build_similar_tracks()
+        finally:
+            similar.CHUNK_SIZE, similar.MAX_CONTEXT_ITEMS = old
+        self.assertEqual(
+            {t.id: self.neighbours(t) for t in (self.a, self.b, self.c)}, expected
+        )
+
+    def test_incremental_only_touches_affected_tracks(self):
+        # An unrelated pair of tracks whose neighbours must not be rewritten
+        other = User.objects.create_user(username="x", password="pw")
+        x, y = [Track.objects.create(owner=other, name=n) for n in "xy"]
+        Listen.objects.create(user=other, track=x)
+        Listen.objects.create(user=other, track=y)
+        similar.build_similar_tracks()
+        untouched = SimilarTrack.objects.get(track=x).updated_at
+        stranger = User.objects.create_user(username="s", password="pw")
+        lonely = Track.objects.create(owner=stranger, name="z")
+        Listen.objects.create(user=stranger, track=lonely)
+        Listen.objects.create(user=stranger, track=self.d)
+
+        run = similar.build_similar_tracks(incremental=True)
+        self.assertTrue(run.incremental)
+        self.assertIn(self.d.id, self.neighbours(lonely))
+        self.assertEqual(run.tracks_updated, 5)  # the album, d's neighbours, lonely
+        self.assertEqual(SimilarTrack.objects.get(track=x).updated_at, untouched)
+
+    def test_full_build_drops_stale_tracks_in_batches(self):
+        stale = [Track.objects.create(owner=self.owner, name=n) for n in "ef"]
+        for t in stale:
+            SimilarTrack.objects.create(track=t, similar=self.a, score=1.0)
+        old = similar.WRITE_BATCH
+        similar.WRITE_BATCH = 1
+        try:
+            similar.build_similar_tracks()
+        finally:
+            similar.WRITE_BATCH = old
+        self.assertFalse(SimilarTrack.objects.filter(track__in=stale).exists())
+        self.assertEqual(self.neighbours(self.a)[0], self.b.id)
+
+    def test_api_hides_tracks_the_user_cannot_see(self):
+        similar.build_similar_tracks()
+        res = self.client.get(reverse("similar_tracks", args=[self.a.id]))
+        self.assertEqual(res.json()["tracks"][0]["id"], self.b.id)
+
+        self.album.is_public = False
+        self.album.save()
+        res = self.client.get(reverse("similar_tracks", args=[self.a.id]))
+        self.assertEqual(res.json()["tracks"], [])
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from playlist.models import Playlist
+from profile_page.models import UserProfile
+from tracks.models import Favorite, Listen, Track
+
+
+def tab(name):
+    return reverse("track_list_tab", args=[name])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TrackListTabTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="u", password="pw")
+            UserProfile.objects.get_or_create(user=self.user)
+            self.tracks = [
+                Track.objects.create(owner=self.user, name=f"song{i}") for i in range(3)
+            ]
+            Favorite.objects.create(owner=self.user, track=self.tracks[0])
+            Listen.objects.create(user=self.user, track=self.tracks[1])
+
+    def test_shell_renders_no_library(self):
+        self.client.force_login(self.user)
+        res = self.client.get(reverse("track_list"))
+        for name in ("playlist", "favorites", "recent"):
+            self.assertContains(res, f'data-tab-url="{tab(name)}"')
+        self.assertNotContains(res, "song0")
+        self.assertFalse(Playlist.objects.filter(owner=self.user).exists())
+
+    def test_each_tab_renders_its_own_card(self):
+        self.client.force_login(self.user)
+        favorites = self.client.get(tab("favorites"))
+        self.assertContains(favorites, 'id="favorites-tracks"')
+        self.assertContains(favorites, "song0")
+        self.assertNotContains(favorites, "song1")
+
+        recent = self.client.get(tab("recent"))
+        self.assertContains(recent, "song1")
+        self.assertNotContains(recent, "song0")
+
+        playlist = self.client.get(tab("playlist"))
+        self.assertContains(playlist, "No tracks in your playlist yet.")
+        self.assertFalse(Playlist.objects.filter(owner=self.user).exists())
+
+        self.assertEqual(self.client.get(tab("albums")).status_code, 404)
+
+    def test_tab_revalidates_until_its_data_changes(self):
+        self.client.force_login(self.user)
+        url = tab("favorites")
+        self.client.get(url)  # the first visit hands out the CSRF cookie
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("toggle_favorite", args=[self.tracks[2].pk]))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "song2")
+
+    def test_guest_tabs(self):
+        self.client.post(reverse("playlist:toggle", args=[self.tracks[2].id]))
+        self.assertContains(self.client.get(tab("playlist")), "song2")
+        self.assertContains(self.client.get(tab("recent")), "No recently played")
+        self.assertEqual(self.client.get(tab("favorites")).status_code, 404)
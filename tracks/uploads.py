@@ -0,0 +1,177 @@
+# tracks/uploads.py
+"""
+Disk spool for chunked uploads.
+
+Each UploadSession owns a directory under settings.CHUNKED_UPLOAD_ROOT that
+holds one ``<index>.part`` file per received chunk. Which chunks exist on
+disk *is* the resume state, so accepting a chunk never touches the database.
+The directory's mtime doubles as the session's last activity: purge_stale
+only expires uploads that stopped receiving chunks.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+
+COPY_BUFFER = 64 * 1024
+
+
+class ChunkError(Exception):
+    """Raised when a chunk or the assembled file fails validation."""
+
+
+def _root() -> str:
+    return getattr(
+        settings,
+        "CHUNKED_UPLOAD_ROOT",
+        os.path.join(tempfile.gettempdir(), "music_archiver_uploads"),
+    )
+
+
+def spool_dir(session: UploadSession) -> str:
+    return os.path.join(_root(), str(session.id))
+
+
+def _chunk_path(session: UploadSession, index: int) -> str:
+    return os.path.join(spool_dir(session), f"{index:06d}.part")
+
+
+def write_chunk(session: UploadSession, index: int, stream) -> int:
+    """
+    Copy one chunk from a file-like ``stream`` to disk without buffering it
+    in memory. Re-sending a chunk simply replaces it, which is what makes
+    retries after a dropped connection safe.
+    """
+    if not 0 <= index < session.total_chunks:
+        raise ChunkError("Chunk index out of range.")
+
+    expected = session.expected_chunk_size(index)
+    os.makedirs(spool_dir(session), exist_ok=True)
+    final_path = _chunk_path(session, index)
+    tmp_path = final_path + ".tmp"
+
+    written = 0
+    with open(tmp_path, "wb") as out:
+        while written <= expected:
+            buf = stream.read(min(COPY_BUFFER, expected + 1 - written))
+            if not buf:
+                break
+            out.write(buf)
+            written += len(buf)
+
+    if written != expected:
+        os.remove(tmp_path)
+        raise ChunkError(f"Chunk {index} must be {expected} bytes, got {written}.")
+
+    # Atomic swap so a half-written chunk is never seen as received
+    os.replace(tmp_path, final_path)
+    os.utime(spool_dir(session))  # still active: see purge_stale
+    return written
+
+
+def received_chunks(session: UploadSession) -> list[int]:
+    """Indexes of chunks that are fully on disk (sorted)."""
+    try:
+        names = os.listdir(spool_dir(session))
+    except FileNotFoundError:
+        return []
+    out = []
+    for name in names:
+        if name.endswith(".part"):
+            try:
+                out.append(int(name[:-5]))
+            except ValueError:
+                continue
+    return sorted(out)
+
+
+def missing_chunks(session: UploadSession) -> list[int]:
+    have = set(received_chunks(session))
+    return [i for i in range(session.total_chunks) if i not in have]
+
+
+def assemble(session: UploadSession) -> tuple[str, str]:
+    """
+    Concatenate all chunks into one file while hashing it.
+    Returns (path, sha256 hex). Raises ChunkError if anything is missing or
+    the checksum does not match the one announced at initiate time.
+    """
+    if missing_chunks(session):
+        raise ChunkError("Upload is incomplete.")
+
+    digest = hashlib.sha256()
+    out_path = os.path.join(spool_dir(session), "assembled")
+    size = 0
+    with open(out_path, "wb") as out:
+        for index in range(session.total_chunks):
+            with open(_chunk_path(session, index), "rb") as part:
+                while True:
+                    buf = part.read(COPY_BUFFER)
+                    if not buf:
+                        break
+                    digest.update(buf)
+                    out.write(buf)
+                    size += len(buf)
+
+    if size != session.total_size:
+        raise ChunkError("Assembled size does not match the announced size.")
+
+    sha256 = digest.hexdigest()
+    if session.checksum and session.checksum.lower() != sha256:
+        raise ChunkError("Checksum mismatch.")
+    return out_path, sha256
+
+
+def discard(session: UploadSession) -> None:
+    """Remove the spool directory (the session row is left to the caller)."""
+    shutil.rmtree(spool_dir(session), ignore_errors=True)
+
+
+def _idle_since(path: str, cutoff: float) -> bool:
+    """Whether nothing was written to ``path`` since ``cutoff`` (or it is gone)."""
+    try:
+        return os.stat(path).st_mtime < cutoff
+    except FileNotFoundError:
+        return True
+
+
+def purge_stale(max_age: timedelta | None = None) -> tuple[int, int]:
+    """
+    Garbage-collect unfinished uploads that received nothing for
+    ``max_age``, plus any idle spool directory that no longer has a
+    session row. Returns (sessions, orphans).
+    """
+    if max_age is None:
+        max_age = timedelta(hours=getattr(settings, "CHUNKED_UPLOAD_EXPIRY_HOURS", 24))
+    cutoff = timezone.now() - max_age
+    idle = cutoff.timestamp()
+
+    # The row only moves at initiate; chunks touch the spool directory
+    stale = [
+        session
+        for session in UploadSession.objects.filter(updated_at__lt=cutoff)
+        if _idle_since(spool_dir(session), idle)
+    ]
+    for session in stale:
+        discard(session)
+    UploadSession.objects.filter(pk__in=[s.pk for s in stale]).delete()
+
+    orphans = 0
+    root = _root()
+    if os.path.isdir(root):
+        live = {
+            str(pk) for pk in UploadSession.objects.values_list("id", flat=True)
+        }
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            # A session created after ``live`` was read has a fresh directory
+            if name not in live and _idle_since(path, idle):
+                shutil.rmtree(path, ignore_errors=True)
+                orphans += 1
+    return len(stale), orphans
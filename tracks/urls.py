@@ -7,6 +7,7 @@ urlpatterns = [
     # Track list / main player
     path("", views.track_list, name="track_list"),
     path("public/", views.track_list_public, name="track_list_public"),
+    path("tabs/<slug:tab>/", views.track_list_tab, name="track_list_tab"),
     # Favourites & Recently Played
     path("favorites/", views.favorites_list, name="favorites_list"),
     path("recent/", views.recently_played, name="recently_played"),
@@ -19,6 +20,9 @@ urlpatterns = [
         name="toggle_favorite",
     ),
     path("api/plays/<int:track_id>/", views.log_play, name="log_play"),
+    path(
+        "api/<int:track_id>/similar/", views.similar_tracks, name="similar_tracks"
+    ),
     # Clear recent list
     path("tracks/api/recent/clear/", views.clear_recent, name="clear_recent"),
     # Legacy aliases (keep if you want backwards compatibility)
@@ -30,6 +34,22 @@ urlpatterns = [
     path("by/<str:username>/", views.user_tracks, name="user_tracks"),
     # Delete track
     path("<int:pk>/delete/", views.delete_track, name="delete_track"),
+    # Chunked, resumable uploads
+    path("api/uploads/", views.upload_initiate, name="upload_initiate"),
+    path(
+        "api/uploads/<uuid:upload_id>/", views.upload_status, name="upload_status"
+    ),
+    path(
+        "api/uploads/<uuid:upload_id>/chunks/<int:index>/",
+        views.upload_chunk,
+        name="upload_chunk",
+    ),
+    path(
+        "api/uploads/<uuid:upload_id>/finalize/",
+        views.upload_finalize,
+        name="upload_finalize",
+    ),
     # NEW: save favourites order
     path("api/favorites/reorder/", views.favorites_reorder, name="favorites_reorder"),
+    path("api/favorites/move/", views.favorites_move, name="favorites_move"),
 ]
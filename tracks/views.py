@@ -1,439 +1,96 @@
 # ----------------------- tracks/views.py ----------------------- #
+import json
 import os
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
-from django.db.models import (Avg, Count, Exists, F, Max, OuterRef, Prefetch,
-                              Subquery)
-from django.db.models.functions import Coalesce
-from django.http import (FileResponse, HttpResponseNotFound,
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Max
+from django.http import (FileResponse, Http404, HttpResponseNotFound,
                          HttpResponseRedirect, JsonResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import (require_GET, require_http_methods,
+                                          require_POST)
 
 from album.models import Album, AlbumTrack
-from playlist.models import Playlist, PlaylistItem
-from playlist.views import _guest_get
-from ratings.utils import annotate_albums, annotate_tracks
-
-from .models import Favorite, Listen, Track
+from core import stamps, toggles
+from core.ordering import OrderedList, apply_order, front_key
+from core.pagecache import cache_anonymous_page
+from core.reorder import bump_version, list_key, move_response
+from core.stamps import etag_from_stamps, stamp_key
+from plans.utils import can_upload_file
+
+from . import tabs, uploads
+from .cards import track_cards
+from .models import Favorite, Listen, Track, UploadSession
+from .similar import similar_payload, similar_to
 
 # -------- Guest Users Recent List -------- #
+# Stored in request.guest (core.guest), not in the session.
 
-GUEST_RECENT_SESSION_KEY = "guest_recent_track_ids"
 GUEST_RECENT_LIMIT = 25
 
 
 def _guest_recent_get(request):
     """Return guest recent track IDs (most recent first)."""
-    raw = request.session.get(GUEST_RECENT_SESSION_KEY, [])
-    cleaned = []
-    for value in raw:
-        try:
-            cleaned.append(int(value))
-        except (TypeError, ValueError):
-            continue
-    if cleaned != raw:
-        request.session[GUEST_RECENT_SESSION_KEY] = cleaned
-        request.session.modified = True
-    return cleaned
+    return request.guest.recent.ids()
 
 
 def _guest_recent_push(request, track_id: int):
     """Add a track to the guest recent list (front of list)."""
-    ids = _guest_recent_get(request)
-    if track_id in ids:
-        ids = [tid for tid in ids if tid != track_id]
-    ids.insert(0, track_id)
-    if len(ids) > GUEST_RECENT_LIMIT:
-        ids = ids[:GUEST_RECENT_LIMIT]
-    request.session[GUEST_RECENT_SESSION_KEY] = ids
-    request.session.modified = True
-    return ids
+    request.guest.recent.push_front(track_id, limit=GUEST_RECENT_LIMIT)
+    return request.guest.recent.ids()
 
 
 def _guest_recent_clear(request):
-    """Clear guest recent list from the session."""
-    if request.session.get(GUEST_RECENT_SESSION_KEY) is not None:
-        request.session[GUEST_RECENT_SESSION_KEY] = []
-        request.session.modified = True
+    """Clear the guest recent list."""
+    request.guest.recent.clear()
 
 
 # -------- Track List (main tabs UI) ---------- #
 
 
-def _has_field(model_cls, field_name: str) -> bool:
-    return any(f.name == field_name for f in model_cls._meta.fields)
-
-
 @login_required
+@etag_from_stamps(lambda request: [])
 def track_list(request):
     """
-    Track list page with four tabs:
-      - Albums
-      - Favourites
-      - Recently Played
-      - Playlist (with initial '✓ In' toggle state)
+    Track list page with three tabs (Playlists, Favourites, Recently
+    Played). Only the shell renders here; each tab loads from
+    track_list_tab when first shown.
     """
-    from tracks.utils import annotate_is_in_my_albums  # local import
-
-    # ----------------------------- PLAYLIST (FIRST) ----------------------------- #
-    playlist = None
-    playlist_items = []
-    in_playlist_ids: set[int] = set()
-
-    if request.user.is_authenticated:
-        playlist, _ = Playlist.objects.get_or_create(
-            owner=request.user, name="My Playlist"
-        )
-
-        # Your chosen label from ANY of your albums containing this track
-        user_label_sq = (
-            AlbumTrack.objects.filter(
-                album__owner=request.user, track_id=OuterRef("track_id")
-            )
-            .exclude(custom_name__isnull=True)
-            .exclude(custom_name="")
-            .values("custom_name")[:1]
-        )
-
-        playlist_items_qs = (
-            PlaylistItem.objects.select_related("track")
-            .filter(playlist=playlist)
-            .annotate(
-                # preferred display name: your custom label, else original track name
-                display_name=Coalesce(Subquery(user_label_sq), F("track__name"))
-            )
-            .order_by("position", "id")
-        )
-
-        playlist_items = list(playlist_items_qs)
-        in_playlist_ids = {item.track_id for item in playlist_items}
-
-        if playlist_items:
-            rated_tracks = annotate_tracks(Track.objects.filter(id__in=in_playlist_ids))
-            rating_map = {t.id: t for t in rated_tracks}
-            for item in playlist_items:
-                rated = rating_map.get(item.track_id)
-                if not rated:
-                    continue
-                item.track.rating_avg = getattr(rated, "rating_avg", 0)
-                item.track.rating_count = getattr(rated, "rating_count", 0)
-
-    # ------------------------------- FAVOURITES -------------------------------- #
-    fav_rows = (
-        Favorite.objects.filter(owner=request.user)
-        .order_by("position", "-created_at")
-        .values_list("track_id", flat=True)
-    )
-    fav_id_set = set(fav_rows)
-
-    # Subquery to pull your custom label from any of your albums
-    user_label_sq = (
-        AlbumTrack.objects.filter(album__owner=request.user, track_id=OuterRef("pk"))
-        .exclude(custom_name__isnull=True)
-        .exclude(custom_name="")
-        .values("custom_name")[:1]
-    )
-
-    # Fetch tracks in bulk with annotations, then reassemble in fav order
-    tracks_by_id = (
-        annotate_tracks(Track.objects.filter(id__in=fav_id_set))
-        .annotate(display_name=Coalesce(Subquery(user_label_sq), F("name")))
-        .in_bulk()
-    )
-
-    favorites = []
-    for tid in fav_rows:
-        t = tracks_by_id.get(tid)
-        if not t:
-            continue
-        t.is_favorited = True
-        t.in_playlist = t.id in in_playlist_ids
-        t.display_name = getattr(t, "display_name", t.name)
-        favorites.append(t)
-
-    annotate_is_in_my_albums(favorites, request.user)
-
-    # ---------------------------- RECENTLY PLAYED ------------------------------ #
-    latest_per_track = (
-        Listen.objects.filter(user=request.user)
-        .values("track")
-        .annotate(last_played=Max("played_at"))
-        .order_by("-last_played")[:25]
-    )
-
-    recent_track_ids = [row["track"] for row in latest_per_track]
-
-    # Subquery: pick your custom name from any of your albums
-    user_label_sq = (
-        AlbumTrack.objects.filter(album__owner=request.user, track_id=OuterRef("pk"))
-        .exclude(custom_name__isnull=True)
-        .exclude(custom_name="")
-        .values("custom_name")[:1]
-    )
-
-    recent_tracks_by_id = (
-        annotate_tracks(Track.objects.filter(id__in=recent_track_ids))
-        .annotate(display_name=Coalesce(Subquery(user_label_sq), F("name")))
-        .in_bulk()
-    )
-
-    recent = []
-    for row in latest_per_track:
-        tid = row["track"]
-        trk = recent_tracks_by_id.get(tid)
-        if not trk:
-            continue
-        trk.is_favorited = tid in fav_id_set
-        trk.in_playlist = tid in in_playlist_ids
-        # convenience: always have display_name available
-        trk.display_name = getattr(trk, "display_name", trk.name)
-        recent.append(trk)
-
-    annotate_is_in_my_albums(recent, request.user)
-
-    # ---------------------------------- ALBUMS --------------------------------- #
-    fav_subquery = Favorite.objects.filter(
-        owner=request.user, track=OuterRef("track_id")
-    )
-
-    albums_qs = annotate_albums(
-        Album.objects.filter(owner=request.user)
-    ).prefetch_related(
-        Prefetch(
-            "album_tracks",
-            queryset=(
-                AlbumTrack.objects.select_related("track")
-                .annotate(
-                    is_favorited=Exists(fav_subquery),
-                    track_avg=Avg("track__ratings__stars"),
-                    track_count=Count("track__ratings", distinct=True),
-                )
-                .order_by("position", "id")
-            ),
-            to_attr="album_tracks_annotated",
-        )
-    )
-
-    albums_qs = (
-        albums_qs.order_by("order", "id")
-        if _has_field(Album, "order")
-        else albums_qs.order_by("-created_at", "id")
-    )
-    albums = list(albums_qs)
-
-    for album in albums:
-        annotate_is_in_my_albums(
-            album.album_tracks_annotated, request.user, attr="track"
-        )
-        for at in album.album_tracks_annotated:
-            at.track.in_playlist = at.track.id in in_playlist_ids
-
-    # ---------------------- PLAYLIST ROWS THEMSELVES --------------------------- #
-    if request.user.is_authenticated and playlist_items:
-        for it in playlist_items:
-            it.track.is_favorited = it.track.id in fav_id_set
-            it.track.in_playlist = True
-            it.track.display_name = it.display_name
-
-    # ------------------------------- RENDER ------------------------------------ #
-    return render(
-        request,
-        "tracks/track_list.html",
-        {
-            "albums": albums,
-            "favorites": favorites,
-            "recent": recent,
-            "playlist": playlist,
-            "playlist_items": playlist_items,
-            "in_playlist_ids": list(in_playlist_ids),
-        },
-    )
+    return render(request, "tracks/track_list.html")
 
 
 @ensure_csrf_cookie
 def track_list_public(request):
     """
-    Public player page for everyone.
-    If logged in, also shows Playlists, Favourites, Recently Played.
+    Public player page for everyone: Playlists and Recently Played tabs,
+    from the guest state for visitors. Tabs load from track_list_tab.
     """
-    # Safe imports here so this function can be pasted anywhere
-    from django.core.exceptions import FieldDoesNotExist
-    from django.db.models import (Avg, Count, Exists, F, Max, OuterRef,
-                                  Prefetch, Subquery)
-    from django.db.models.functions import Coalesce
-    from django.shortcuts import render
+    return render(request, "tracks/track_list_public.html")
 
-    from tracks.utils import \
-        annotate_is_in_my_albums  # keep if you use it below
 
-    # --------------------------- ANONYMOUS: EARLY RETURN --------------------------- #
+def _tab_stamps(request, tab):
+    # Guest tabs come from the guest cookie, which stamps do not cover
     if not request.user.is_authenticated:
-        guest_ids = _guest_get(request)
-        guest_recent_ids = _guest_recent_get(request)
-
-        playlist_map = {t.id: t for t in Track.objects.filter(id__in=guest_ids)}
-        guest_tracks = [playlist_map[i] for i in guest_ids if i in playlist_map]
-
-        recent_map = {t.id: t for t in Track.objects.filter(id__in=guest_recent_ids)}
-        guest_recent = []
-        playlist_id_set = set(guest_ids)
-        for tid in guest_recent_ids:
-            trk = recent_map.get(tid)
-            if not trk:
-                continue
-            trk.is_favorited = False
-            trk.in_playlist = tid in playlist_id_set
-            trk.display_name = getattr(trk, "display_name", trk.name)
-            guest_recent.append(trk)
-
-        return render(
-            request,
-            "tracks/track_list_public.html",
-            {
-                "albums": [],
-                "favorites": [],
-                "recent": guest_recent,
-                "playlist": None,
-                "playlist_items": [],
-                "guest_tracks": guest_tracks,
-                "in_playlist_ids": guest_ids,
-            },
-        )
-
-    # ----------------------------- PLAYLIST (FIRST) ----------------------------- #
-    playlist = None
-    playlist_items = []
-    in_playlist_ids: set[int] = set()
-
-    playlist, _ = Playlist.objects.get_or_create(owner=request.user, name="My Playlist")
-
-    # Your chosen label from ANY of your albums containing this track
-    user_label_sq = (
-        AlbumTrack.objects.filter(
-            album__owner=request.user, track_id=OuterRef("track_id")
-        )
-        .exclude(custom_name__isnull=True)
-        .exclude(custom_name="")
-        .values("custom_name")[:1]
-    )
-
-    playlist_items_qs = (
-        PlaylistItem.objects.select_related("track")
-        .filter(playlist=playlist)
-        .annotate(
-            # preferred display name: your custom label, else original track name
-            display_name=Coalesce(Subquery(user_label_sq), F("track__name"))
-        )
-        .order_by("position", "id")
-    )
-
-    playlist_items = list(playlist_items_qs)
-    in_playlist_ids = {item.track_id for item in playlist_items}
-
-    if playlist_items:
-        rated_tracks = annotate_tracks(Track.objects.filter(id__in=in_playlist_ids))
-        rating_map = {t.id: t for t in rated_tracks}
-        for item in playlist_items:
-            rated = rating_map.get(item.track_id)
-            if not rated:
-                continue
-            item.track.rating_avg = getattr(rated, "rating_avg", 0)
-            item.track.rating_count = getattr(rated, "rating_count", 0)
-
-    # ---------------------------- RECENTLY PLAYED ------------------------------ #
-    latest_per_track = (
-        Listen.objects.filter(user=request.user)
-        .values("track")
-        .annotate(last_played=Max("played_at"))
-        .order_by("-last_played")[:25]
-    )
-
-    recent_track_ids = [row["track"] for row in latest_per_track]
-
-    user_label_sq = (
-        AlbumTrack.objects.filter(album__owner=request.user, track_id=OuterRef("pk"))
-        .exclude(custom_name__isnull=True)
-        .exclude(custom_name="")
-        .values("custom_name")[:1]
-    )
-
-    recent_tracks_by_id = (
-        Track.objects.filter(id__in=recent_track_ids)
-        .annotate(display_name=Coalesce(Subquery(user_label_sq), F("name")))
-        .in_bulk()
-    )
-
-    recent = []
-    for row in latest_per_track:
-        tid = row["track"]
-        trk = recent_tracks_by_id.get(tid)
-        if not trk:
-            continue
-        trk.in_playlist = tid in in_playlist_ids
-        trk.display_name = getattr(trk, "display_name", trk.name)
-        recent.append(trk)
-
-    annotate_is_in_my_albums(recent, request.user)
-
-    # ---------------------------------- ALBUMS --------------------------------- #
-    fav_subquery = Favorite.objects.filter(
-        owner=request.user, track=OuterRef("track_id")
-    )
-
-    albums_qs = Album.objects.filter(owner=request.user).prefetch_related(
-        Prefetch(
-            "album_tracks",
-            queryset=(
-                AlbumTrack.objects.select_related("track")
-                .annotate(
-                    is_favorited=Exists(fav_subquery),
-                    track_avg=Avg("track__ratings__stars"),
-                    track_count=Count("track__ratings", distinct=True),
-                )
-                .order_by("position", "id")
-            ),
-            to_attr="album_tracks_annotated",
-        )
-    )
+        return None
+    return [stamp_key("track_ratings")]
 
-    try:
-        Album._meta.get_field("order")
-        albums_qs = albums_qs.order_by("order", "id")
-    except FieldDoesNotExist:
-        albums_qs = albums_qs.order_by("-created_at", "id")
-
-    albums = list(albums_qs)
-
-    for album in albums:
-        annotate_is_in_my_albums(
-            album.album_tracks_annotated, request.user, attr="track"
-        )
-        for at in album.album_tracks_annotated:
-            at.track.in_playlist = at.track.id in in_playlist_ids
-
-    # ---------------------- PLAYLIST ROWS THEMSELVES --------------------------- #
-    if playlist_items:
-        for it in playlist_items:
-            it.track.in_playlist = True
-            it.track.display_name = it.display_name
 
-    # ------------------------------- RENDER ------------------------------------ #
-    return render(
-        request,
-        "tracks/track_list_public.html",
-        {
-            "albums": albums,
-            "recent": recent,
-            "playlist": playlist,
-            "playlist_items": playlist_items,
-            "in_playlist_ids": list(in_playlist_ids),
-        },
-    )
+@require_GET
+@etag_from_stamps(_tab_stamps)
+def track_list_tab(request, tab):
+    """One tab card of the track list pages, as an HTML fragment."""
+    loader = tabs.LOADERS.get(tab)
+    context = loader(request) if loader else None
+    if context is None:
+        raise Http404("No such tab.")
+    return render(request, f"tracks/_tab_{tab}.html", context)
 
 
 # ---------- Utility Endpoints ----------
@@ -455,6 +112,18 @@ def tracks_json(request):
     return JsonResponse({"tracks": data})
 
 
+@require_GET
+def similar_tracks(request, track_id):
+    """Tracks listeners of this one also played (see tracks.similar)."""
+    track = get_object_or_404(Track, pk=track_id)
+    try:
+        limit = min(max(int(request.GET.get("limit") or 10), 1), 50)
+    except ValueError:
+        limit = 10
+    pairs = similar_to([track.id], request.user, limit=limit)
+    return JsonResponse({"track_id": track.id, "tracks": similar_payload(pairs)})
+
+
 # ---------- Track Plays / Favorites ----------
 
 
@@ -481,13 +150,10 @@ def recently_played(request):
         .order_by("-last_played")[:25]
     )
 
-    track_ids = [item["track"] for item in latest_per_track]
-    tracks = Track.objects.in_bulk(track_ids)
-
+    last_played = {item["track"]: item["last_played"] for item in latest_per_track}
     results = [
-        {"track": tracks[item["track"]], "last_played": item["last_played"]}
-        for item in latest_per_track
-        if item["track"] in tracks
+        {"track": card, "last_played": last_played[card.id]}
+        for card in track_cards(request.user, last_played)
     ]
     return render(request, "tracks/recently_played.html", {"results": results})
 
@@ -506,34 +172,35 @@ def clear_recent(request):
 def toggle_favorite(request, track_id):
     """Toggle a track in/out of favorites."""
     track = get_object_or_404(Track, pk=track_id)
-    qs = Favorite.objects.filter(owner=request.user, track=track)
-    if qs.exists():
-        qs.delete()
-        return JsonResponse({"favorited": False})
-    try:
-        Favorite.objects.create(owner=request.user, track=track)
-    except IntegrityError:
-        return JsonResponse({"favorited": True})
-    return JsonResponse({"favorited": True})
+    # Newest favourites show on top until the user reorders them
+    res = toggles.toggle(
+        Favorite,
+        {"owner": request.user, "track": track},
+        defaults={"position": front_key()},
+    )
+    return JsonResponse({"favorited": res.active})
 
 
 @login_required
 def favorites_list(request):
-    favs = (
+    fav_ids = (
         Favorite.objects.filter(owner=request.user)
-        .select_related("track")
         .order_by("position", "-created_at")  # ⬅️ saved order
+        .values_list("track_id", flat=True)
     )
+    favs = track_cards(request.user, fav_ids)
     return render(request, "tracks/favorites.html", {"favorites": favs})
 
 
+def _favorites_list(user) -> OrderedList:
+    return OrderedList(Favorite, "position", {"owner": user}, tiebreak="-created_at")
+
+
 @login_required
 @require_POST
 def favorites_reorder(request):
     import json
 
-    from django.db import transaction
-
     try:
         payload = json.loads(request.body or "{}")
         order = [int(x) for x in payload.get("order", [])]
@@ -543,25 +210,47 @@ def favorites_reorder(request):
     if not order:
         return JsonResponse({"ok": True})
 
-    favs = Favorite.objects.select_related("track").filter(
-        owner=request.user, track_id__in=order
+    # The client sends track IDs; the ordered rows are Favorite IDs
+    fav_by_tid = dict(
+        Favorite.objects.filter(owner=request.user, track_id__in=order).values_list(
+            "track_id", "id"
+        )
     )
-    by_tid = {f.track_id: f for f in favs}
+    with transaction.atomic():
+        apply_order(
+            _favorites_list(request.user),
+            [fav_by_tid[tid] for tid in order if tid in fav_by_tid],
+        )
+        version = bump_version(list_key("favorites", request.user.id))
+        stamps.touch_user(request.user.id, "library")
 
-    pos = 1
-    to_update = []
-    for tid in order:
-        f = by_tid.get(tid)
-        if f:
-            f.position = pos
-            to_update.append(f)
-            pos += 1
+    return JsonResponse({"ok": True, "version": version})
 
-    with transaction.atomic():
-        if to_update:
-            Favorite.objects.bulk_update(to_update, ["position"])
 
-    return JsonResponse({"ok": True})
+@login_required
+@require_POST
+def favorites_move(request):
+    """
+    Move favourites by delta. Like ``favorites_reorder`` the client sends
+    track IDs: { "version": n, "ops": [{"moved_id", "before_id", "after_id"}] }
+    """
+
+    def to_favorite_ids(track_ids):
+        return dict(
+            Favorite.objects.filter(
+                owner=request.user, track_id__in=track_ids
+            ).values_list("track_id", "id")
+        )
+
+    response = move_response(
+        request,
+        _favorites_list(request.user),
+        list_key("favorites", request.user.id),
+        translate=to_favorite_ids,
+    )
+    if response.status_code == 200:
+        stamps.touch_user(request.user.id, "library")
+    return response
 
 
 @require_POST
@@ -595,10 +284,27 @@ def download_track(request, pk):
 User = get_user_model()
 
 
+def _user_tracks_stamps(request, username):
+    author_id = (
+        User.objects.filter(username=username).values_list("pk", flat=True).first()
+    )
+    if author_id is None:
+        return None  # the view answers 404
+    return [
+        stamp_key("tracks", author_id),
+        stamp_key("social", author_id),
+        stamp_key("track_ratings"),
+    ]
+
+
+@cache_anonymous_page(_user_tracks_stamps)
 def user_tracks(request, username):
     author = get_object_or_404(User, username=username)
-    qs = annotate_tracks(Track.objects.filter(owner=author).order_by("-created_at"))
-    return render(request, "tracks/user_tracks.html", {"author": author, "tracks": qs})
+    ids = Track.objects.filter(owner=author).order_by("-created_at").values_list(
+        "id", flat=True
+    )
+    context = {"author": author, "tracks": track_cards(request.user, ids)}
+    return render(request, "tracks/user_tracks.html", context)
 
 
 @login_required
@@ -607,3 +313,131 @@ def delete_track(request, pk):
     track = get_object_or_404(Track, pk=pk, owner=request.user)
     track.delete()
     return JsonResponse({"ok": True, "id": pk})
+
+
+# -------- Chunked, resumable uploads -------- #
+
+
+def _upload_payload(session):
+    return {
+        "ok": True,
+        "upload_id": str(session.id),
+        "chunk_size": session.chunk_size,
+        "total_chunks": session.total_chunks,
+        "received": uploads.received_chunks(session),
+        "chunk_url": reverse("upload_chunk", args=[session.id, 0]),
+        "finalize_url": reverse("upload_finalize", args=[session.id]),
+    }
+
+
+@login_required
+@require_POST
+def upload_initiate(request):
+    """
+    Start a chunked upload.
+    Expects JSON: { "filename", "size", "name"?, "album_id"?, "checksum"? }
+    The storage quota is checked here, before any bytes are sent.
+    """
+    try:
+        payload = json.loads(request.body or "{}")
+        size = int(payload.get("size") or 0)
+    except Exception:
+        return JsonResponse({"ok": False, "error": "Bad JSON"}, status=400)
+
+    filename = os.path.basename((payload.get("filename") or "").strip())
+    if not filename or size <= 0:
+        return JsonResponse(
+            {"ok": False, "error": "filename and size are required."}, status=400
+        )
+
+    album = None
+    if payload.get("album_id"):
+        album = get_object_or_404(Album, pk=payload["album_id"], owner=request.user)
+
+    ok, reason = can_upload_file(request.user, size)
+    if not ok:
+        return JsonResponse({"ok": False, "error": reason}, status=403)
+
+    session = UploadSession.objects.create(
+        owner=request.user,
+        album=album,
+        name=(payload.get("name") or "").strip() or os.path.splitext(filename)[0],
+        filename=filename,
+        total_size=size,
+        chunk_size=getattr(settings, "CHUNKED_UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024),
+        checksum=(payload.get("checksum") or "").strip()[:64],
+    )
+    return JsonResponse(_upload_payload(session), status=201)
+
+
+@login_required
+@require_GET
+def upload_status(request, upload_id):
+    """Report which chunks the server already has so a client can resume."""
+    session = get_object_or_404(UploadSession, pk=upload_id, owner=request.user)
+    return JsonResponse(_upload_payload(session))
+
+
+@login_required
+@require_http_methods(["PUT"])
+def upload_chunk(request, upload_id, index):
+    """Receive one numbered chunk as the raw request body."""
+    session = get_object_or_404(UploadSession, pk=upload_id, owner=request.user)
+    try:
+        # Read from the stream (not request.body) so chunks are never held in
+        # memory and DATA_UPLOAD_MAX_MEMORY_SIZE does not apply.
+        written = uploads.write_chunk(session, index, request)
+    except uploads.ChunkError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+    return JsonResponse({"ok": True, "index": index, "bytes": written})
+
+
+@login_required
+@require_POST
+def upload_finalize(request, upload_id):
+    """Assemble the chunks, hand the file to storage and create the Track."""
+    session = get_object_or_404(UploadSession, pk=upload_id, owner=request.user)
+
+    missing = uploads.missing_chunks(session)
+    if missing:
+        return JsonResponse(
+            {"ok": False, "error": "Upload is incomplete.", "missing": missing},
+            status=409,
+        )
+
+    # Several sessions may have been opened in parallel; re-check the quota
+    ok, reason = can_upload_file(request.user, session.total_size)
+    if not ok:
+        uploads.discard(session)
+        session.delete()
+        return JsonResponse({"ok": False, "error": reason}, status=403)
+
+    try:
+        path, sha256 = uploads.assemble(session)
+    except uploads.ChunkError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    with transaction.atomic():
+        # The file is committed to storage before the row is saved, so tell
+        # the quota accounting its size up front
+        track = Track(owner=request.user, name=session.name)
+        track.audio_size = session.total_size
+        with open(path, "rb") as fh:
+            track.audio_file.save(session.filename, File(fh), save=False)
+        track.save()
+        if session.album_id:
+            AlbumTrack.objects.get_or_create(album_id=session.album_id, track=track)
+        session_album_id = session.album_id
+        # The file now lives in storage; drop the spool before the row
+        uploads.discard(session)
+        session.delete()
+
+    return JsonResponse(
+        {
+            "ok": True,
+            "track_id": track.id,
+            "name": track.name,
+            "sha256": sha256,
+            "album_id": session_album_id,
+        }
+    )